@@ -3,12 +3,14 @@ Accommodation Agent - CORRECTED Overpass Query Format
 Uses CORRECT Overpass query syntax with bounding boxes
 """
 
-import requests
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 import random
-import math
-import time  # For rate limiting
+
+from geocoder import get_geocoder
+from poi_fetcher import POIBundle, get_poi_fetcher
+from scoring import Criterion, ScoringEngine
+from spatial_index import haversine_km
 
 
 @dataclass
@@ -38,22 +40,19 @@ class AccommodationOption:
 class AccommodationAgent:
     """CORRECTED Accommodation Agent - Proper Overpass Queries"""
 
+    # rank_accommodations score: cheaper, central and well rated is better
+    RANKING = ScoringEngine(
+        Criterion('price_per_night', 0.3, lower_is_better=True),
+        Criterion('distance_to_center_km', 0.3, lower_is_better=True),
+        Criterion('rating', 0.4, scale=5.0),
+    )
+
     def __init__(self):
-        self.nominatim_url = "https://nominatim.openstreetmap.org/search"
-        
-        # Multiple Overpass servers (fallback list)
-        self.overpass_urls = [
-            "https://overpass-api.de/api/interpreter",  # Primary
-            "https://overpass.kumi.systems/api/interpreter",  # Backup 1
-            "https://overpass.openstreetmap.ru/api/interpreter",  # Backup 2
-        ]
+        self.geocoder = get_geocoder()
         
+        # Combined Overpass query shared with the restaurant/activity agents
+        self.poi_fetcher = get_poi_fetcher()
         self.headers = {'User-Agent': 'TravelPlannerApp/1.0 (student project)'}
-        self.current_overpass_index = 0
-
-        # Rate limiting to avoid being blocked
-        self.last_request_time = 0
-        self.min_request_interval = 1.0  # Minimum 1 second between requests
 
     def search_accommodations(self, destination: str, check_in: str, check_out: str,
                              guests: int = 1, accommodation_types: Optional[List[str]] = None,
@@ -79,6 +78,33 @@ class AccommodationAgent:
         accommodations = self._search_via_overpass(lat, lon, accommodation_types,
                                                   radius_km, max_results)
 
+        return self._filter_results(accommodations, max_price, min_rating, max_results)
+
+    async def search_accommodations_async(self, destination: str, check_in: str, check_out: str,
+                                          guests: int = 1, accommodation_types: Optional[List[str]] = None,
+                                          max_price: Optional[float] = None, min_rating: float = 3.0,
+                                          radius_km: float = 10.0, max_results: int = 15) -> List[AccommodationOption]:
+        """Async variant of search_accommodations using the shared non-blocking HTTP client"""
+
+        if accommodation_types is None:
+            accommodation_types = ['hotel', 'apartment', 'guest_house']
+
+        print(f"🔍 Searching accommodations in {destination} (async)...")
+
+        location_coords = await self._get_location_coordinates_async(destination)
+        if not location_coords:
+            print(f"  ❌ Location not found")
+            return []
+
+        lat, lon = location_coords
+        accommodations = await self._search_via_overpass_async(lat, lon, accommodation_types,
+                                                               radius_km, max_results)
+
+        return self._filter_results(accommodations, max_price, min_rating, max_results)
+
+    def _filter_results(self, accommodations: List[AccommodationOption], max_price: Optional[float],
+                        min_rating: float, max_results: int) -> List[AccommodationOption]:
+        """Apply price/rating filters and sort by rating"""
         # Filter by price
         if max_price and accommodations:
             accommodations = [a for a in accommodations if a.price_per_night <= max_price]
@@ -90,114 +116,46 @@ class AccommodationAgent:
         print(f"  ✓ Found {len(accommodations)} accommodations")
         return accommodations[:max_results]
 
+    async def _get_location_coordinates_async(self, location: str) -> Optional[tuple]:
+        """Async variant of _get_location_coordinates"""
+        coords = await self.geocoder.geocode_async(location)
+        if coords is None:
+            print(f"  ❌ Location error: could not geocode {location}")
+        return coords
+
+    async def _search_via_overpass_async(self, lat: float, lon: float, accommodation_types: List[str],
+                                         radius_km: float, max_results: int) -> List[AccommodationOption]:
+        """Async variant of _search_via_overpass"""
+        bundle = await self.poi_fetcher.fetch_async(lat, lon)
+        return self._accommodations_from_bundle(bundle, lat, lon, radius_km, max_results)
+
     def _get_location_coordinates(self, location: str) -> Optional[tuple]:
-        """Get location coordinates"""
-        try:
-            params = {'q': location, 'format': 'json', 'limit': 1}
-            response = requests.get(self.nominatim_url, params=params,
-                                   headers=self.headers, timeout=10)
-            response.raise_for_status()
-
-            data = response.json()
-            if data:
-                return (float(data[0]['lat']), float(data[0]['lon']))
-            return None
-        except Exception as e:
-            print(f"  ❌ Location error: {e}")
-            return None
+        """Get location coordinates (via the shared cached geocoder)"""
+        coords = self.geocoder.geocode(location)
+        if coords is None:
+            print(f"  ❌ Location error: could not geocode {location}")
+        return coords
 
     def _search_via_overpass(self, lat: float, lon: float, accommodation_types: List[str],
                             radius_km: float, max_results: int) -> List[AccommodationOption]:
-        """Search via Overpass with multiple server fallback and rate limiting"""
-        
-        # Try each Overpass server in sequence
-        for server_index, overpass_url in enumerate(self.overpass_urls, 1):
-            try:
-                print(f"  🔍 Querying Overpass server {server_index}/{len(self.overpass_urls)}...")
-                
-                # Rate limiting: wait if needed
-                self._apply_rate_limit()
-                
-                # CORRECTED: Proper Overpass query with bounding box (south, west, north, east)
-                lat1 = lat - (radius_km / 111.0)  # south
-                lon1 = lon - (radius_km / 111.0)  # west
-                lat2 = lat + (radius_km / 111.0)  # north
-                lon2 = lon + (radius_km / 111.0)  # east
-
-                # Optimized query - reduced timeout, limited types
-                query = f"""[out:json][timeout:15];
-(
-  node["tourism"="hotel"]({lat1},{lon1},{lat2},{lon2});
-  way["tourism"="hotel"]({lat1},{lon1},{lat2},{lon2});
-  node["tourism"="guest_house"]({lat1},{lon1},{lat2},{lon2});
-  way["tourism"="guest_house"]({lat1},{lon1},{lat2},{lon2});
-  node["tourism"="hostel"]({lat1},{lon1},{lat2},{lon2});
-);
-out center {max_results};
-"""
+        """Get hotels from the shared combined Overpass query (see poi_fetcher)"""
+        bundle = self.poi_fetcher.fetch(lat, lon)
+        return self._accommodations_from_bundle(bundle, lat, lon, radius_km, max_results)
+
+    def _accommodations_from_bundle(self, bundle: Optional[POIBundle], lat: float, lon: float,
+                                    radius_km: float, max_results: int) -> List[AccommodationOption]:
+        """Parse the hotel elements of a POI bundle, falling back to mock data"""
+        if bundle is not None:
+            accommodations = self._parse_overpass_results(
+                bundle.as_overpass('hotels', radius_km), lat, lon, max_results
+            )
+            if accommodations:
+                print(f"  ✓ Extracted {len(accommodations)} accommodations")
+                return accommodations
+            print(f"  ⚠️  Overpass returned 0 accommodations")
 
-                # Make request with timeout
-                response = requests.post(
-                    overpass_url, 
-                    data=query,
-                    headers=self.headers, 
-                    timeout=20  # 20 second timeout
-                )
-
-                # Check response status
-                if response.status_code == 200:
-                    # Success! Parse and return results
-                    data = response.json()
-                    accommodations = self._parse_overpass_results(
-                        data, lat, lon, max_results
-                    )
-                    
-                    if accommodations:
-                        print(f"  ✅ Server {server_index} succeeded!")
-                        print(f"  ✓ Extracted {len(accommodations)} accommodations")
-                        return accommodations
-                    else:
-                        print(f"  ⚠️  Server {server_index} returned 0 results, trying next...")
-                        continue
-                
-                elif response.status_code == 429:
-                    # Rate limited
-                    print(f"  ⚠️  Server {server_index} rate limited (429), trying next...")
-                    continue
-                
-                elif response.status_code == 504:
-                    # Gateway timeout
-                    print(f"  ⚠️  Server {server_index} timeout (504), trying next...")
-                    continue
-                
-                else:
-                    print(f"  ⚠️  Server {server_index} error {response.status_code}, trying next...")
-                    continue
-
-            except requests.exceptions.Timeout:
-                print(f"  ⚠️  Server {server_index} timeout, trying next...")
-                continue
-            
-            except requests.exceptions.ConnectionError:
-                print(f"  ⚠️  Server {server_index} connection error, trying next...")
-                continue
-            
-            except Exception as e:
-                print(f"  ⚠️  Server {server_index} error: {str(e)[:50]}, trying next...")
-                continue
-        
-        # All servers failed
-        print(f"  ❌ All {len(self.overpass_urls)} Overpass servers failed")
         print(f"  🔄 Generating mock accommodations as fallback...")
         return self._generate_mock_accommodations(lat, lon, max_results)
-    
-    def _apply_rate_limit(self):
-        """Apply rate limiting between requests"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            sleep_time = self.min_request_interval - elapsed
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
 
     def _parse_overpass_results(self, data: dict, center_lat: float, 
                                 center_lon: float, max_results: int) -> List[AccommodationOption]:
@@ -342,27 +300,9 @@ out center {max_results};
     def _calculate_distance(self, lat1: float, lon1: float,
                            lat2: float, lon2: float) -> float:
         """Calculate distance in km"""
-        lat_diff = abs(lat1 - lat2)
-        lon_diff = abs(lon1 - lon2)
-        distance = math.sqrt(lat_diff**2 + lon_diff**2) * 111
-        return round(distance, 1)
-
-    def rank_accommodations(self, accommodations: List[AccommodationOption]) -> List[AccommodationOption]:
-        """Rank accommodations"""
-        if not accommodations:
-            return []
-
-        max_price = max(a.price_per_night for a in accommodations)
-        max_dist = max(a.distance_to_center_km for a in accommodations) or 1
-
-        scored = []
-        for acc in accommodations:
-            price_score = 1 - (acc.price_per_night / max_price) if max_price > 0 else 0
-            dist_score = 1 - (acc.distance_to_center_km / max_dist) if max_dist > 0 else 0
-            rating_score = acc.rating / 5.0
-
-            score = 0.3 * price_score + 0.3 * dist_score + 0.4 * rating_score
-            scored.append((score, acc))
+        return round(float(haversine_km(lat1, lon1, lat2, lon2)), 1)
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [a for _, a in scored]
\ No newline at end of file
+    def rank_accommodations(self, accommodations: List[AccommodationOption],
+                            top_k: Optional[int] = None) -> List[AccommodationOption]:
+        """Rank accommodations (only the best top_k when given)"""
+        return self.RANKING.rank(accommodations, top_k)
\ No newline at end of file
@@ -266,12 +266,18 @@ Addresses common integration issues:
 """
 
 import os
-import requests
+import asyncio
 import random
-import time
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 
+import async_http
+import http_session
+from gazetteer import get_gazetteer
+from geocoder import get_geocoder
+from poi_fetcher import POIBundle, get_poi_fetcher
+from scoring import Criterion, ScoringEngine
+
 
 @dataclass
 class ActivityOption:
@@ -306,19 +312,13 @@ class ActivityOption:
 class ActivityAgent:
     """Activity & Experience Agent - uses REAL APIs for activity searches"""
 
-    # City coordinates for better mock data
-    CITY_COORDINATES = {
-        'tokyo': (35.6762, 139.6503),
-        'paris': (48.8566, 2.3522),
-        'london': (51.5074, -0.1278),
-        'new york': (40.7128, -74.0060),
-        'dubai': (25.2048, 55.2708),
-        'rome': (41.9028, 12.4964),
-        'barcelona': (41.3851, 2.1734),
-        'amsterdam': (52.3676, 4.9041),
-        'bangkok': (13.7563, 100.5018),
-        'sydney': (-33.8688, 151.2093),
-    }
+    # rank_activities score; its weight_* arguments replace these weights
+    RANKING = ScoringEngine(
+        Criterion('price', 0.2, lower_is_better=True),
+        Criterion('rating', 0.3, scale=5.0),
+        Criterion('popularity_score', 0.3),
+        Criterion('duration_minutes', 0.2, lower_is_better=True),
+    )
 
     def __init__(self, google_api_key: Optional[str] = None):
         """
@@ -327,21 +327,15 @@ class ActivityAgent:
         """
         self.google_api_key = google_api_key or os.getenv('GOOGLE_PLACES_API_KEY')
         
-        # Overpass API endpoints (multiple for redundancy)
-        self.overpass_urls = [
-            "https://overpass-api.de/api/interpreter",
-            "https://overpass.kumi.systems/api/interpreter",
-            "https://overpass.openstreetmap.ru/api/interpreter",
-        ]
+        # Combined Overpass query shared with the hotel/restaurant agents
+        self.poi_fetcher = get_poi_fetcher()
         
         self.headers = {'User-Agent': 'TravelPlannerApp/1.0 (student project)'}
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1.0  # 1 second between requests
-        
         # Nominatim for geocoding
-        self.nominatim_url = "https://nominatim.openstreetmap.org/search"
+        self.geocoder = get_geocoder()
+        
+        self.google_places_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
 
     def search_activities(self,
                          location: str,
@@ -400,6 +394,62 @@ class ActivityAgent:
                 location, categories, max_results, coords=coords
             )
         
+        return self._finalize_activities(activities, interests, max_price,
+                                         max_duration_minutes, max_results)
+
+    async def search_activities_async(self,
+                                      location: str,
+                                      categories: Optional[List[str]] = None,
+                                      interests: Optional[List[str]] = None,
+                                      max_duration_minutes: Optional[int] = None,
+                                      max_price: Optional[float] = None,
+                                      min_rating: float = 3.5,
+                                      max_results: int = 15) -> List[ActivityOption]:
+        """
+        Async variant of search_activities (same Google → Overpass → mock strategy)
+        using the shared non-blocking HTTP client
+        """
+        print(f"\n🎯 Searching activities in {location} (async)...")
+        
+        coords = await self._get_coordinates_async(location)
+        if not coords:
+            print(f"   ⚠️ Could not geocode {location}, using default coordinates")
+            coords = self._get_default_coords(location)
+        
+        lat, lon = coords
+        activities = []
+        
+        if self.google_api_key:
+            try:
+                activities = await self._search_google_places_async(
+                    lat, lon, location, categories, max_results
+                )
+            except Exception as e:
+                print(f"   ⚠️  Google Places failed: {str(e)[:50]}")
+        
+        if not activities:
+            try:
+                activities = await self._search_overpass_async(
+                    lat, lon, location, categories, max_results
+                )
+            except Exception as e:
+                print(f"   ⚠️  Overpass failed: {str(e)[:50]}")
+        
+        if not activities:
+            print(f"   ⚠️ All APIs failed, generating mock data")
+            activities = self._generate_mock_activities(
+                location, categories, max_results, coords=coords
+            )
+        
+        return self._finalize_activities(activities, interests, max_price,
+                                         max_duration_minutes, max_results)
+
+    def _finalize_activities(self, activities: List[ActivityOption],
+                             interests: Optional[List[str]],
+                             max_price: Optional[float],
+                             max_duration_minutes: Optional[int],
+                             max_results: int) -> List[ActivityOption]:
+        """Apply interest/price/duration filters, rank and truncate"""
         # Filter by interests
         if interests:
             activities = self.filter_by_interests(activities, interests)
@@ -416,68 +466,66 @@ class ActivityAgent:
         print(f"   ✅ Returning {len(activities)} activities")
         return activities[:max_results]
 
+    async def _get_coordinates_async(self, location: str) -> Optional[tuple]:
+        """Async variant of _get_coordinates"""
+        return await self.geocoder.geocode_async(location)
+
+    async def _search_google_places_async(self, lat: float, lon: float,
+                                          location: str, categories: Optional[List[str]],
+                                          max_results: int) -> List[ActivityOption]:
+        """Async variant of _search_google_places; queries all place types concurrently"""
+        
+        async def search_type(place_type: str) -> List[ActivityOption]:
+            try:
+                params = {
+                    'location': f"{lat},{lon}",
+                    'radius': 10000,  # 10km radius
+                    'type': place_type,
+                    'key': self.google_api_key
+                }
+                response = await async_http.get(self.google_places_url, params=params, timeout=10)
+                if response.status_code != 200:
+                    return []
+                
+                results = []
+                for place in response.json().get('results', [])[:5]:  # Top 5 per type
+                    activity = self._parse_google_place(place, location)
+                    if activity:
+                        results.append(activity)
+                return results
+            except Exception as e:
+                print(f"   ⚠️ Google API error for {place_type}: {str(e)[:30]}")
+                return []
+        
+        batches = await asyncio.gather(
+            *(search_type(t) for t in self._google_place_types(categories))
+        )
+        
+        activities = [activity for batch in batches for activity in batch]
+        return activities[:max_results]
+
+    async def _search_overpass_async(self, lat: float, lon: float,
+                                     location: str, categories: Optional[List[str]],
+                                     max_results: int) -> List[ActivityOption]:
+        """Async variant of _search_overpass"""
+        bundle = await self.poi_fetcher.fetch_async(lat, lon)
+        return self._activities_from_bundle(bundle, location, categories, max_results)
+
     def _get_coordinates(self, location: str) -> Optional[tuple]:
-        """Get coordinates from location name using Nominatim"""
-        try:
-            self._apply_rate_limit()
-            
-            params = {
-                'q': location,
-                'format': 'json',
-                'limit': 1
-            }
-            
-            response = requests.get(
-                self.nominatim_url,
-                params=params,
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    return (float(data[0]['lat']), float(data[0]['lon']))
-            
-            return None
-        except Exception as e:
-            print(f"   ⚠️ Geocoding error: {str(e)[:50]}")
-            return None
+        """Get coordinates from location name (via the shared cached geocoder)"""
+        return self.geocoder.geocode(location)
 
     def _get_default_coords(self, location: str) -> tuple:
-        """Get default coordinates for known cities or generate reasonable ones"""
-        # Check if location matches known cities
-        location_lower = location.lower()
-        for city, coords in self.CITY_COORDINATES.items():
-            if city in location_lower:
-                return coords
-        
-        # Default to Tokyo coordinates as fallback
-        return self.CITY_COORDINATES['tokyo']
+        """Coordinates of a known city from the offline gazetteer (Tokyo if unknown)"""
+        gazetteer = get_gazetteer()
+        return gazetteer.coordinates(location) or gazetteer.coordinates('tokyo')
 
     def _search_google_places(self, lat: float, lon: float, 
                              location: str, categories: Optional[List[str]],
                              max_results: int) -> List[ActivityOption]:
         """Search using Google Places API"""
         
-        # Map categories to Google Places types
-        category_mapping = {
-            'museums': ['museum', 'art_gallery'],
-            'cultural': ['museum', 'art_gallery', 'place_of_worship', 'tourist_attraction'],
-            'outdoor': ['park', 'amusement_park', 'zoo', 'aquarium'],
-            'culinary': ['restaurant', 'cafe', 'bakery'],
-            'tour': ['tourist_attraction', 'point_of_interest'],
-            'adventure': ['tourist_attraction', 'park']
-        }
-        
-        # Determine which types to search
-        if categories:
-            types_to_search = set()
-            for cat in categories:
-                if cat in category_mapping:
-                    types_to_search.update(category_mapping[cat])
-        else:
-            types_to_search = {'tourist_attraction', 'museum', 'park', 'art_gallery'}
+        types_to_search = self._google_place_types(categories)
         
         activities = []
         
@@ -486,9 +534,7 @@ class ActivityAgent:
                 break
             
             try:
-                self._apply_rate_limit()
-                
-                url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+                url = self.google_places_url
                 params = {
                     'location': f"{lat},{lon}",
                     'radius': 10000,  # 10km radius
@@ -496,7 +542,7 @@ class ActivityAgent:
                     'key': self.google_api_key
                 }
                 
-                response = requests.get(url, params=params, timeout=10)
+                response = http_session.get(url, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -571,74 +617,41 @@ class ActivityAgent:
     def _search_overpass(self, lat: float, lon: float,
                         location: str, categories: Optional[List[str]],
                         max_results: int) -> List[ActivityOption]:
-        """Search using Overpass API (OpenStreetMap)"""
-        
-        # Map categories to OSM tags
-        osm_mapping = {
-            'museums': ['museum'],
-            'cultural': ['museum', 'theatre', 'arts_centre'],
-            'outdoor': ['park', 'viewpoint', 'attraction'],
-            'tour': ['attraction', 'viewpoint'],
-            'adventure': ['park', 'attraction']
+        """Get attractions from the shared combined Overpass query (see poi_fetcher)"""
+        bundle = self.poi_fetcher.fetch(lat, lon)
+        return self._activities_from_bundle(bundle, location, categories, max_results)
+
+    def _activities_from_bundle(self, bundle: Optional[POIBundle], location: str,
+                                categories: Optional[List[str]],
+                                max_results: int) -> List[ActivityOption]:
+        """Parse the attraction elements of a POI bundle"""
+        if bundle is None:
+            return []
+        activities = self._parse_overpass_results(bundle.as_overpass('activities'), location, categories)
+        return activities[:max_results]
+
+    def _google_place_types(self, categories: Optional[List[str]]) -> set:
+        """Map our categories to Google Places types"""
+        # Map categories to Google Places types
+        category_mapping = {
+            'museums': ['museum', 'art_gallery'],
+            'cultural': ['museum', 'art_gallery', 'place_of_worship', 'tourist_attraction'],
+            'outdoor': ['park', 'amusement_park', 'zoo', 'aquarium'],
+            'culinary': ['restaurant', 'cafe', 'bakery'],
+            'tour': ['tourist_attraction', 'point_of_interest'],
+            'adventure': ['tourist_attraction', 'park']
         }
         
-        # Determine tags to search
-        tags_to_search = set()
+        # Determine which types to search
         if categories:
+            types_to_search = set()
             for cat in categories:
-                if cat in osm_mapping:
-                    tags_to_search.update(osm_mapping[cat])
+                if cat in category_mapping:
+                    types_to_search.update(category_mapping[cat])
         else:
-            tags_to_search = {'museum', 'attraction', 'park', 'viewpoint'}
-        
-        # Try each Overpass server
-        for server_index, overpass_url in enumerate(self.overpass_urls, 1):
-            try:
-                print(f"      Trying Overpass server {server_index}/{len(self.overpass_urls)}...")
-                
-                self._apply_rate_limit()
-                
-                # Build query
-                radius_km = 10
-                lat1 = lat - (radius_km / 111.0)
-                lon1 = lon - (radius_km / 111.0)
-                lat2 = lat + (radius_km / 111.0)
-                lon2 = lon + (radius_km / 111.0)
-                
-                query_parts = []
-                for tag in tags_to_search:
-                    query_parts.append(f'node["tourism"="{tag}"]({lat1},{lon1},{lat2},{lon2});')
-                    query_parts.append(f'way["tourism"="{tag}"]({lat1},{lon1},{lat2},{lon2});')
-                
-                query = f"""[out:json][timeout:15];
-(
-  {'  '.join(query_parts)}
-);
-out center {max_results * 2};
-"""
-                
-                response = requests.post(
-                    overpass_url,
-                    data=query,
-                    headers=self.headers,
-                    timeout=20
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    activities = self._parse_overpass_results(
-                        data, location, categories
-                    )
-                    
-                    if activities:
-                        print(f"      ✅ Server {server_index} succeeded!")
-                        return activities[:max_results]
-                
-            except Exception as e:
-                print(f"      ⚠️ Server {server_index} error: {str(e)[:30]}")
-                continue
+            types_to_search = {'tourist_attraction', 'museum', 'park', 'art_gallery'}
         
-        return []
+        return types_to_search
 
     def _parse_overpass_results(self, data: dict, location: str,
                                 categories: Optional[List[str]]) -> List[ActivityOption]:
@@ -808,13 +821,6 @@ out center {max_results * 2};
 
     # Helper methods
     
-    def _apply_rate_limit(self):
-        """Apply rate limiting between requests"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
-
     def _determine_category(self, types: List[str]) -> str:
         """Determine activity category from Google Place types"""
         if 'museum' in types or 'art_gallery' in types:
@@ -958,32 +964,14 @@ out center {max_results * 2};
                        weight_price: float = 0.2,
                        weight_rating: float = 0.3,
                        weight_popularity: float = 0.3,
-                       weight_duration: float = 0.2) -> List[ActivityOption]:
-        """Rank activities based on multiple criteria"""
-        if not activities:
-            return []
-
-        max_price = max(act.price for act in activities) or 1
-        max_duration = max(act.duration_minutes for act in activities) or 1
-
-        scored = []
-        for activity in activities:
-            price_score = 1 - (activity.price / max_price)
-            rating_score = activity.rating / 5.0
-            popularity_score = activity.popularity_score
-            duration_score = 1 - (activity.duration_minutes / max_duration)
-
-            total_score = (
-                weight_price * price_score +
-                weight_rating * rating_score +
-                weight_popularity * popularity_score +
-                weight_duration * duration_score
-            )
-
-            scored.append((total_score, activity))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [activity for _, activity in scored]
+                       weight_duration: float = 0.2,
+                       top_k: Optional[int] = None) -> List[ActivityOption]:
+        """Rank activities based on multiple criteria (only the best top_k when given)"""
+        # Shorter activities score higher for flexibility
+        engine = self.RANKING.with_weights(price=weight_price, rating=weight_rating,
+                                           popularity_score=weight_popularity,
+                                           duration_minutes=weight_duration)
+        return engine.rank(activities, top_k)
 
 
 if __name__ == "__main__":
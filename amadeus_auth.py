@@ -0,0 +1,269 @@
+"""
+Amadeus Auth Module
+Shared OAuth token cache for the Amadeus API
+
+FlightAgent used to authenticate synchronously in __init__, so every process
+start and every new agent paid an auth round-trip, and a token that expired
+mid-session made the next search return nothing. Tokens now live in one
+AmadeusTokenManager per set of credentials:
+- shared by every FlightAgent in the process
+- persisted to TRAVEL_CACHE_DIR/amadeus_token.json so other processes reuse it
+  until its expires_in runs out
+- refreshed in the background AMADEUS_TOKEN_REFRESH_MARGIN seconds before
+  expiry, so requests never wait on an expired token
+- invalidated on a 401, after which the caller retries once with a new token
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import http_session
+
+
+class AmadeusTokenManager:
+    """Process-wide, disk-backed Amadeus access token with background refresh"""
+
+    def __init__(self, client_id: str, client_secret: str, auth_url: str,
+                 cache_path: Optional[str] = None, refresh_margin: float = 300):
+        self.client_id = client_id.strip()
+        self.client_secret = client_secret.strip()
+        self.auth_url = auth_url
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+
+        # Tokens are stored per client id (hashed, so the file never names the account)
+        self.cache_key = hashlib.sha256(f"{auth_url}|{self.client_id}".encode()).hexdigest()[:16]
+
+        self.access_token: Optional[str] = None
+        self.expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._refreshing = False  # A background refresh is talking to the auth endpoint
+
+        self.stats = {'fetched': 0, 'disk_hits': 0, 'refreshed': 0, 'invalidated': 0, 'failures': 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_token(self) -> Optional[str]:
+        """Current valid token, loading from disk or authenticating if needed"""
+        with self._lock:
+            if self._valid():
+                return self.access_token
+
+            if self._load_from_disk():
+                self._schedule_refresh()
+                return self.access_token
+
+            if self._fetch():
+                return self.access_token
+            return None
+
+    def invalidate(self, token: Optional[str]) -> Optional[str]:
+        """
+        Drop a token the API rejected (401) and return a fresh one
+
+        Only the rejected token is dropped: if another thread already replaced
+        it, that newer token is returned without another auth call.
+        """
+        with self._lock:
+            if token is not None and token != self.access_token and self._valid():
+                return self.access_token
+
+            self.stats['invalidated'] += 1
+            self.access_token = None
+            self.expires_at = 0.0
+            self._remove_from_disk(token)
+
+            if self._fetch():
+                return self.access_token
+            return None
+
+    def warm_up(self):
+        """Load or fetch a token in the background so startup never blocks on auth"""
+        threading.Thread(target=self.get_token, name="amadeus-auth", daemon=True).start()
+
+    def expires_in(self) -> float:
+        """Seconds until the current token expires (0 if none)"""
+        return max(0.0, self.expires_at - time.time())
+
+    def get_stats(self) -> Dict[str, int]:
+        """Auth counters"""
+        return dict(self.stats)
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _valid(self) -> bool:
+        # Treat the last 30 s as expired so a token never runs out mid-request
+        return self.access_token is not None and time.time() < self.expires_at - 30
+
+    def _fetch(self) -> bool:
+        """Authenticate and adopt the new token"""
+        result = self._request_token()
+        if result is None:
+            return False
+        self._adopt(*result)
+        return True
+
+    def _adopt(self, access_token: str, expires_in: float):
+        self.access_token = access_token
+        self.expires_at = time.time() + expires_in
+        self._save_to_disk()
+        self._schedule_refresh()
+
+    def _request_token(self) -> Optional[Tuple[str, float]]:
+        """(access_token, expires_in) from the OAuth endpoint; touches no token state, so needs no lock"""
+        try:
+            print(f"\n  🔐 Authenticating with TEST API...")
+            payload = {
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            }
+            response = http_session.post(self.auth_url, data=payload, timeout=10)
+
+            if response.status_code != 200:
+                print(f"  ❌ Authentication error {response.status_code}")
+                if response.text:
+                    print(f"  Response: {response.text[:200]}")
+                self.stats['failures'] += 1
+                return None
+
+            data = response.json()
+            if 'access_token' not in data:
+                print(f"  ❌ No access token in response")
+                self.stats['failures'] += 1
+                return None
+
+            expires_in = data.get('expires_in', 1800)
+            self.stats['fetched'] += 1
+
+            print(f"  ✅ Authentication successful!")
+            print(f"  Valid for: {expires_in} seconds")
+            return data['access_token'], expires_in
+
+        except Exception as e:
+            print(f"  ❌ Authentication Error: {e}")
+            self.stats['failures'] += 1
+            return None
+
+    def _schedule_refresh(self):
+        """
+        Refresh refresh_margin seconds before expiry, but no sooner than half
+        the remaining lifetime: a token that lives shorter than the margin
+        would otherwise be refreshed again every second
+        """
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+
+        remaining = self.expires_at - time.time()
+        delay = max(remaining - self.refresh_margin, remaining / 2, 5.0)
+        self._refresh_timer = threading.Timer(delay, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        """
+        Replace the token before it expires. The auth call runs without the
+        lock, so get_token keeps returning the current token meanwhile.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            # Another process may already have refreshed the shared token
+            current = self.expires_at
+            if self._load_from_disk() and self.expires_at > current:
+                self._schedule_refresh()
+                return
+            self._refreshing = True
+
+        result = self._request_token()  # Never raises
+
+        with self._lock:
+            self._refreshing = False
+            if result is not None:
+                # A 401 may have fetched an even newer token meanwhile
+                if time.time() + result[1] > self.expires_at:
+                    self._adopt(*result)
+                self.stats['refreshed'] += 1
+            else:
+                # Retry shortly while the old token is still valid
+                self._refresh_timer = threading.Timer(30, self._background_refresh)
+                self._refresh_timer.daemon = True
+                self._refresh_timer.start()
+
+    def _read_cache_file(self) -> dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load_from_disk(self) -> bool:
+        """Adopt a still-valid token written by this or another process"""
+        entry = self._read_cache_file().get(self.cache_key)
+        if not entry or entry.get('expires_at', 0) <= time.time() + 30:
+            return False
+        if entry['access_token'] != self.access_token:
+            self.stats['disk_hits'] += 1
+        self.access_token = entry['access_token']
+        self.expires_at = entry['expires_at']
+        return True
+
+    def _save_to_disk(self):
+        if not self.cache_path:
+            return
+        entries = self._read_cache_file()
+        entries[self.cache_key] = {'access_token': self.access_token, 'expires_at': self.expires_at}
+        self._write_cache_file(entries)
+
+    def _remove_from_disk(self, token: Optional[str]):
+        entries = self._read_cache_file()
+        entry = entries.get(self.cache_key)
+        if entry and (token is None or entry.get('access_token') == token):
+            del entries[self.cache_key]
+            self._write_cache_file(entries)
+
+    def _write_cache_file(self, entries: dict):
+        """Atomic, owner-only write (the file holds bearer tokens)"""
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"  ⚠️ Could not write token cache: {e}")
+
+
+# One manager per (auth_url, client_id)
+_managers: Dict[Tuple[str, str], AmadeusTokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(client_id: str, client_secret: str, auth_url: str) -> AmadeusTokenManager:
+    """Get the shared token manager for a set of credentials"""
+    key = (auth_url, client_id.strip())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            cache_dir = os.getenv('TRAVEL_CACHE_DIR', '.cache')
+            manager = AmadeusTokenManager(
+                client_id, client_secret, auth_url,
+                cache_path=os.path.join(cache_dir, 'amadeus_token.json'),
+                refresh_margin=float(os.getenv('AMADEUS_TOKEN_REFRESH_MARGIN', '300'))
+            )
+            _managers[key] = manager
+    return manager
@@ -0,0 +1,150 @@
+"""
+Async HTTP Module
+Shared event loop and non-blocking HTTP client for the *_async agent methods
+
+Agents await these helpers instead of calling requests.get/requests.post, so
+one process can keep many planning sessions in flight without parking a
+thread per upstream call. Uses aiohttp when installed and falls back to
+running the pooled requests sessions in a worker thread otherwise.
+"""
+
+import asyncio
+import atexit
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import http_session
+from rate_limiter import get_rate_limiter
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency
+    aiohttp = None
+
+
+@dataclass
+class AsyncResponse:
+    """Minimal response object mirroring the parts of requests.Response the agents use"""
+    status_code: int
+    text: str
+    url: str = ""
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+# Shared background event loop (for sync callers such as the orchestrator)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+# One aiohttp session per event loop (sessions cannot be shared across loops)
+_sessions: Dict[int, Any] = {}
+_host_slots: Dict[Tuple[int, str], asyncio.Semaphore] = {}  # (loop id, host) -> connection slots
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the shared background event loop, starting it on first use"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever,
+                                            name="async-http-loop", daemon=True)
+            _loop_thread.start()
+    return _loop
+
+
+def run_async(coro, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the shared event loop from synchronous code"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    return future.result(timeout=timeout)
+
+
+async def _get_session():
+    """Get (or create) the aiohttp session for the running loop"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(id(loop))
+    if session is None or session.closed:
+        # Keep-alive pool sized like the sync sessions (see http_session); the
+        # connector allows the largest per-host size and _host_slot narrows it per host
+        per_host = max([http_session.DEFAULT_POOL_SIZE, *http_session.POOL_SIZES.values()])
+        connector = aiohttp.TCPConnector(limit=http_session.TOTAL_CONNECTION_LIMIT,
+                                         limit_per_host=per_host,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[id(loop)] = session
+    return session
+
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    """Per-host connection slots on the running loop, sized by http_session.pool_size_for"""
+    host = (urlsplit(url).hostname or '').lower()
+    key = (id(asyncio.get_running_loop()), host)
+    slot = _host_slots.get(key)
+    if slot is None:
+        slot = _host_slots[key] = asyncio.Semaphore(http_session.pool_size_for(host))
+    return slot
+
+
+async def request(method: str, url: str, params: Optional[dict] = None,
+                  data: Any = None, headers: Optional[dict] = None,
+                  timeout: float = 10) -> AsyncResponse:
+    """
+    Perform a non-blocking HTTP request
+
+    Raises asyncio.TimeoutError on timeout and aiohttp/requests connection
+    errors on failure, like the sync code paths they replace.
+    """
+    await get_rate_limiter().acquire_async(url)
+
+    if aiohttp is None:
+        def _blocking():
+            response = http_session.get_session(url).request(method, url, params=params, data=data,
+                                                             headers=headers, timeout=timeout)
+            return AsyncResponse(response.status_code, response.text, response.url)
+
+        return await asyncio.to_thread(_blocking)
+
+    session = await _get_session()
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with _host_slot(url):
+        async with session.request(method, url, params=params, data=data,
+                                   headers=headers, timeout=client_timeout) as response:
+            text = await response.text()
+            return AsyncResponse(response.status, text, str(response.url))
+
+
+async def get(url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+              timeout: float = 10) -> AsyncResponse:
+    """Non-blocking GET"""
+    return await request("GET", url, params=params, headers=headers, timeout=timeout)
+
+
+async def post(url: str, data: Any = None, headers: Optional[dict] = None,
+               timeout: float = 10) -> AsyncResponse:
+    """Non-blocking POST"""
+    return await request("POST", url, data=data, headers=headers, timeout=timeout)
+
+
+async def close_sessions():
+    """Close the aiohttp session for the running loop"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [key for key in _host_slots if key[0] == loop_id]:
+        del _host_slots[key]
+    session = _sessions.pop(loop_id, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+@atexit.register
+def _shutdown():
+    """Close the shared loop's session so aiohttp does not warn on exit"""
+    if _loop is not None and _loop.is_running() and id(_loop) in _sessions:
+        try:
+            run_async(close_sessions(), timeout=2)
+        except Exception:
+            pass
@@ -0,0 +1,154 @@
+"""
+Batch Optimizer Module
+Solves many UserProfiles against one shared candidate pool in a process pool
+
+Group bookings and nightly pre-planning run hundreds of profiles against the
+same destination. Instead of repeating the agent searches and a
+single-threaded optimize_itinerary per profile, the candidate pool (flights,
+accommodations, restaurants, activities) is sent to each worker process once,
+when the worker starts. The worker also compiles the model template for the
+pool there (see optimizer.ModelTemplate). After that, each task only ships
+a profile, and results stream back as they finish.
+
+Each solve uses one CP-SAT worker by default, so throughput scales with the
+number of processes (BATCH_OPTIMIZER_PROCESSES, default one per core).
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterator, List, Optional
+
+from optimizer import ItineraryOptimizer, SolverConfig
+
+
+@dataclass
+class BatchResult:
+    """Result of one profile in a batch"""
+    index: int  # Position in the submitted profile list
+    user_id: str
+    result: Dict[str, Any]
+    seconds: float  # Time spent in the worker
+    worker_pid: int
+
+
+# Per-process state, set by _init_worker
+_worker_pool: Optional[Dict[str, Any]] = None
+_worker_options: Dict[str, Any] = {}
+_worker_ready = None  # Barrier shared by every worker, see _warm_up
+
+
+def _init_worker(candidates: Dict[str, Any], num_days: int,
+                 overlap_mode: Optional[str], solver_config: SolverConfig, ready):
+    """Keep the shared candidate pool in the worker and compile its model template"""
+    global _worker_pool, _worker_options, _worker_ready
+    _worker_ready = ready
+    _worker_pool = dict(candidates, num_days=num_days)
+    _worker_options = {'overlap_mode': overlap_mode, 'solver_config': solver_config}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = ItineraryOptimizer(None, **_worker_options)
+        pool = optimizer._prepare_items(candidates['flights'], candidates['accommodations'],
+                                        candidates['restaurants'], candidates['activities'], num_days)
+        if pool.size():
+            optimizer._model_template(pool)
+
+
+def _warm_up(timeout: float) -> int:
+    """
+    Wait until every worker holds a warm-up task. A process runs one task at
+    a time and only after its initializer, so passing the barrier means all
+    of them have compiled the template.
+    """
+    try:
+        _worker_ready.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass  # Reported by start() as fewer ready workers
+    return os.getpid()
+
+
+def _solve_profile(index: int, profile) -> BatchResult:
+    """Solve one profile against the worker's candidate pool"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = ItineraryOptimizer(profile, **_worker_options)
+        try:
+            result = optimizer.optimize_itinerary(**_worker_pool)
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+    return BatchResult(index=index, user_id=profile.user_id, result=result,
+                       seconds=time.perf_counter() - started, worker_pid=os.getpid())
+
+
+class BatchOptimizer:
+    """Pre-warmed process pool that optimizes many profiles over one candidate pool"""
+
+    def __init__(self, flights: List[Any], accommodations: List[Any], restaurants: List[Any],
+                 activities: List[Any], num_days: int, max_workers: Optional[int] = None,
+                 overlap_mode: Optional[str] = None, solver_config: Optional[SolverConfig] = None):
+        self.candidates = {
+            'flights': list(flights),
+            'accommodations': list(accommodations),
+            'restaurants': list(restaurants),
+            'activities': list(activities),
+        }
+        self.num_days = num_days
+        self.max_workers = max_workers or int(os.getenv('BATCH_OPTIMIZER_PROCESSES', '0')) or os.cpu_count() or 1
+        self.overlap_mode = overlap_mode
+        # Parallelism comes from the processes, so each solve runs single-threaded
+        self.solver_config = solver_config or replace(SolverConfig.from_env(), num_workers=1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Start the worker processes and wait until each has loaded the pool"""
+        if self._executor is not None:
+            return
+        started = time.perf_counter()
+        context = multiprocessing.get_context()
+        ready = context.Barrier(self.max_workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.candidates, self.num_days, self.overlap_mode, self.solver_config, ready)
+        )
+        timeout = float(os.getenv('BATCH_OPTIMIZER_WARMUP_TIMEOUT', '300'))
+        pids = {future.result() for future in
+                [self._executor.submit(_warm_up, timeout) for _ in range(self.max_workers)]}
+        if len(pids) < self.max_workers:
+            print(f"  ⚠️ Only {len(pids)} of {self.max_workers} workers warmed up within {timeout:.0f}s")
+        print(f"⚙️  Batch optimizer ready: {len(pids)} worker processes "
+              f"({time.perf_counter() - started:.2f}s)")
+
+    def solve_iter(self, profiles: List[Any]) -> Iterator[BatchResult]:
+        """Yield results as they finish (not in submission order)"""
+        self.start()
+        futures = [self._executor.submit(_solve_profile, i, profile) for i, profile in enumerate(profiles)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def solve(self, profiles: List[Any]) -> List[BatchResult]:
+        """Solve every profile; results in submission order"""
+        results = list(self.solve_iter(profiles))
+        return sorted(results, key=lambda r: r.index)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'BatchOptimizer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
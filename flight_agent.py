@@ -4,13 +4,22 @@ Uses test.api.amadeus.com instead of api.amadeus.com
 """
 
 import os
-import requests
-from typing import List, Dict, Optional, Any
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Awaitable, Callable, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from dotenv import load_dotenv
 import re
 
+import async_http
+import http_session
+from amadeus_auth import get_token_manager
+from scoring import Criterion, ScoringEngine
+
 load_dotenv()
 
 
@@ -33,16 +42,160 @@ class FlightOption:
     item_type: str = "flight"
 
 
+class FlightOfferCache:
+    """
+    Process-wide TTL cache of parsed flight offers with single-flight coalescing
+
+    Keyed by (origin, destination, date, adults, class). Concurrent identical
+    searches (sync or async) share one Amadeus call; only non-empty real
+    results are cached. Entries are evicted least recently used first beyond
+    max_entries.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[float, int, List[FlightOption]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, threading.Event] = {}
+        self._async_inflight: Dict[tuple, "asyncio.Future"] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(origin: str, destination: str, departure_date: str,
+                 adults: int, travel_class: str) -> tuple:
+        return (origin.upper(), destination.upper(), departure_date, int(adults), travel_class.upper())
+
+    def get(self, key: tuple, max_results: int, record: bool = True) -> Optional[List[FlightOption]]:
+        """Cached offers (copies) if fresh and parsed deep enough for max_results"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, parsed_limit, flights = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            if max_results > parsed_limit and len(flights) >= parsed_limit:
+                return None  # Cached entry was truncated below what is asked for
+            self._entries.move_to_end(key)
+            if record:
+                self.stats['hits'] += 1
+        return [copy.copy(f) for f in flights[:max_results]]
+
+    def put(self, key: tuple, parsed_limit: int, flights: List[FlightOption]):
+        if not flights:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), parsed_limit, [copy.copy(f) for f in flights])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_fetch(self, key: tuple, max_results: int, fetch_limit: int,
+                     fetch: Callable[[int], List[FlightOption]]) -> List[FlightOption]:
+        """Serve from cache, or run fetch(fetch_limit) once for all concurrent callers"""
+        cached = self.get(key, max_results)
+        if cached is not None:
+            print(f"  ⚡ Flight offers served from cache")
+            return cached
+
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._inflight[key] = event
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            event.wait(timeout=30)
+            cached = self.get(key, max_results, record=False)
+            return cached if cached is not None else []
+
+        try:
+            flights = fetch(fetch_limit)
+            self.put(key, fetch_limit, flights)
+            return [copy.copy(f) for f in flights[:max_results]]
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    async def get_or_fetch_async(self, key: tuple, max_results: int, fetch_limit: int,
+                                 fetch: Callable[[int], Awaitable[List[FlightOption]]]) -> List[FlightOption]:
+        """Async variant of get_or_fetch"""
+        cached = self.get(key, max_results)
+        if cached is not None:
+            print(f"  ⚡ Flight offers served from cache")
+            return cached
+
+        pending = self._async_inflight.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            self.stats['coalesced'] += 1
+            flights = await asyncio.shield(pending)
+            return [copy.copy(f) for f in flights[:max_results]]
+
+        self.stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[key] = future
+        flights: List[FlightOption] = []
+        try:
+            flights = await fetch(fetch_limit)
+            self.put(key, fetch_limit, flights)
+            return [copy.copy(f) for f in flights[:max_results]]
+        finally:
+            future.set_result(flights)
+            self._async_inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries)}
+
+
+_offer_cache = None
+_offer_cache_lock = threading.Lock()
+
+
+def get_offer_cache() -> FlightOfferCache:
+    """Get global flight offer cache instance"""
+    global _offer_cache
+    with _offer_cache_lock:
+        if _offer_cache is None:
+            _offer_cache = FlightOfferCache(
+                ttl_seconds=float(os.getenv('FLIGHT_CACHE_TTL', '900')),
+                max_entries=int(os.getenv('FLIGHT_CACHE_MAX_ENTRIES', '512'))
+            )
+    return _offer_cache
+
+
 class FlightAgent:
     """Flight Agent - CORRECTED for Amadeus TEST API"""
 
+    # Offers parsed per Amadeus call, so later searches asking for more still hit the cache
+    CACHE_FETCH_SIZE = 10
+
+    # rank_flights score: cheaper, shorter and more reliable is better
+    RANKING = ScoringEngine(
+        Criterion('price', 0.4, lower_is_better=True),
+        Criterion('duration_minutes', 0.3, lower_is_better=True),
+        Criterion('reliability_score', 0.3),
+    )
+
     def __init__(self, use_real_api: bool = True):
         """Initialize with CORRECTED TEST API endpoints"""
         self.client_id = os.getenv('AMADEUS_CLIENT_ID')
         self.client_secret = os.getenv('AMADEUS_CLIENT_SECRET')
         self.use_real_api = use_real_api
-        self.access_token = None
-        self.token_expires = None
+        self.token_manager = None
+        self.offer_cache = get_offer_cache()
 
         # FIXED: Use TEST API endpoint!
         self.auth_url = "https://test.api.amadeus.com/v1/security/oauth2/token"
@@ -52,53 +205,23 @@ class FlightAgent:
         print(f"  Client ID: {self.client_id[:15]}..." if self.client_id else "  No Client ID")
 
         if self.use_real_api and self.client_id and self.client_secret:
-            self._authenticate()
+            # Token shared across agents/processes; fetched in the background, not here
+            self.token_manager = get_token_manager(self.client_id, self.client_secret, self.auth_url)
+            self.token_manager.warm_up()
         else:
             print("⚠️  Using mock data (credentials not configured)")
             self.use_real_api = False
 
-    def _authenticate(self) -> bool:
-        """CORRECTED: Authenticate using TEST API"""
-        try:
-            print(f"\n  🔐 Authenticating with TEST API...")
-            print(f"  URL: {self.auth_url}")
-
-            # EXACT FORMAT from user's example
-            payload = {
-                "grant_type": "client_credentials",
-                "client_id": self.client_id.strip(),
-                "client_secret": self.client_secret.strip()
-            }
-
-            response = requests.post(self.auth_url, data=payload, timeout=10)
-
-            print(f"  Status: {response.status_code}")
+    @property
+    def access_token(self) -> Optional[str]:
+        """Current Amadeus token (authenticates on first use if not cached)"""
+        if self.token_manager is None:
+            return None
+        return self.token_manager.get_token()
 
-            if response.status_code != 200:
-                print(f"  ❌ Error {response.status_code}")
-                if response.text:
-                    print(f"  Response: {response.text[:200]}")
-                return False
-
-            data = response.json()
-
-            if 'access_token' not in data:
-                print(f"  ❌ No access token in response")
-                print(f"  Response: {data}")
-                return False
-
-            self.access_token = data['access_token']
-            expires_in = data.get('expires_in', 1800)
-            self.token_expires = datetime.now() + timedelta(seconds=expires_in)
-
-            print(f"  ✅ Authentication successful!")
-            print(f"  Token: {self.access_token[:20]}...")
-            print(f"  Valid for: {expires_in} seconds")
-            return True
-
-        except Exception as e:
-            print(f"  ❌ Authentication Error: {e}")
-            return False
+    def _authenticate(self) -> bool:
+        """Make sure a valid token is available (see amadeus_auth)"""
+        return self.access_token is not None
 
     def search_flights(self, origin: str, destination: str, departure_date: str,
                       adults: int = 1, travel_class: str = "ECONOMY",
@@ -110,18 +233,21 @@ class FlightAgent:
             return self._mock_flight_search(origin, destination, departure_date,
                                           travel_class, max_results)
 
-        return self._real_flight_search(origin, destination, departure_date,
-                                       adults, travel_class, max_results)
+        key = self.offer_cache.make_key(origin, destination, departure_date, adults, travel_class)
+        return self.offer_cache.get_or_fetch(
+            key, max_results, max(max_results, self.CACHE_FETCH_SIZE),
+            lambda limit: self._real_flight_search(origin, destination, departure_date,
+                                                   adults, travel_class, limit)
+        )
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Flight offer cache hit/miss/coalescing counters"""
+        return self.offer_cache.get_stats()
 
     def _real_flight_search(self, origin, destination, departure_date,
                            adults, travel_class, max_results) -> List[FlightOption]:
         """CORRECTED: Real flight search using TEST API endpoint"""
         try:
-            # EXACT FORMAT from user's example
-            headers = {
-                "Authorization": f"Bearer {self.access_token}"
-            }
-
             params = {
                 "originLocationCode": origin.upper(),
                 "destinationLocationCode": destination.upper(),
@@ -134,15 +260,10 @@ class FlightAgent:
             print(f"  From: {origin} → To: {destination}")
             print(f"  Date: {departure_date}")
 
-            response = requests.get(self.base_url, headers=headers, params=params, timeout=15)
+            response = self._get_offers(params)
 
             print(f"  Status: {response.status_code}")
 
-            if response.status_code == 401:
-                print(f"  ❌ Token expired - re-authenticating...")
-                self._authenticate()
-                return []
-
             if response.status_code != 200:
                 print(f"  ⚠️  API Error {response.status_code}")
                 try:
@@ -151,47 +272,8 @@ class FlightAgent:
                     print(f"  Response: {response.text[:200]}")
                 return []
 
-            data = response.json()
-            flights = []
-
-            if 'data' in data and data['data']:
-                print(f"  Found {len(data['data'])} flights in response")
-
-                for i, offer in enumerate(data['data'][:max_results]):
-                    try:
-                        itinerary = offer['itineraries'][0]
-                        segment = itinerary['segments'][0]
-
-                        price = float(offer['price']['total'])
-                        currency = offer['price'].get('currency', 'USD')
-
-                        flight = FlightOption(
-                            flight_id=f"FL{i+1}",
-                            origin=origin.upper(),
-                            destination=destination.upper(),
-                            departure_time=segment['departure']['at'],
-                            arrival_time=segment['arrival']['at'],
-                            duration_minutes=self._parse_duration(itinerary['duration']),
-                            price=price,
-                            currency=currency,
-                            carrier=segment.get('carrierCode', 'XX'),
-                            segments=len(itinerary['segments']),
-                            class_type=travel_class.lower()
-                        )
-                        flights.append(flight)
-
-                        print(f"    ✓ Flight {i+1}: {flight.carrier} {flight.currency} {flight.price}")
-
-                    except Exception as e:
-                        print(f"    ⚠️  Error parsing flight: {e}")
-                        continue
-
-                print(f"  ✅ Successfully parsed {len(flights)} flights")
-            else:
-                print(f"  ⚠️  No flights found in response")
-                print(f"  Raw response: {data}")
-
-            return flights
+            return self._parse_flight_offers(response.json(), origin, destination,
+                                             travel_class, max_results)
 
         except Exception as e:
             print(f"  ❌ Flight search error: {type(e).__name__}: {e}")
@@ -199,6 +281,123 @@ class FlightAgent:
             traceback.print_exc()
             return []
 
+    def _get_offers(self, params: dict):
+        """GET flight offers, retrying once with a fresh token if the API returns 401"""
+        token = self.token_manager.get_token()
+        response = http_session.get(self.base_url, headers={"Authorization": f"Bearer {token}"},
+                                    params=params, timeout=15)
+
+        if response.status_code == 401:
+            print(f"  🔄 Token rejected - re-authenticating and retrying...")
+            token = self.token_manager.invalidate(token)
+            if token:
+                response = http_session.get(self.base_url, headers={"Authorization": f"Bearer {token}"},
+                                            params=params, timeout=15)
+        return response
+
+    async def _get_offers_async(self, params: dict):
+        """Async variant of _get_offers"""
+        token = await asyncio.to_thread(self.token_manager.get_token)
+        response = await async_http.get(self.base_url, params=params,
+                                        headers={"Authorization": f"Bearer {token}"}, timeout=15)
+
+        if response.status_code == 401:
+            print(f"  🔄 Token rejected - re-authenticating and retrying...")
+            token = await asyncio.to_thread(self.token_manager.invalidate, token)
+            if token:
+                response = await async_http.get(self.base_url, params=params,
+                                                headers={"Authorization": f"Bearer {token}"}, timeout=15)
+        return response
+
+    def _parse_flight_offers(self, data: dict, origin: str, destination: str,
+                             travel_class: str, max_results: int) -> List[FlightOption]:
+        """Parse an Amadeus flight-offers response into FlightOption objects"""
+        flights = []
+
+        if 'data' in data and data['data']:
+            print(f"  Found {len(data['data'])} flights in response")
+
+            for i, offer in enumerate(data['data'][:max_results]):
+                try:
+                    itinerary = offer['itineraries'][0]
+                    segment = itinerary['segments'][0]
+
+                    price = float(offer['price']['total'])
+                    currency = offer['price'].get('currency', 'USD')
+
+                    flight = FlightOption(
+                        flight_id=f"FL{i+1}",
+                        origin=origin.upper(),
+                        destination=destination.upper(),
+                        departure_time=segment['departure']['at'],
+                        arrival_time=segment['arrival']['at'],
+                        duration_minutes=self._parse_duration(itinerary['duration']),
+                        price=price,
+                        currency=currency,
+                        carrier=segment.get('carrierCode', 'XX'),
+                        segments=len(itinerary['segments']),
+                        class_type=travel_class.lower()
+                    )
+                    flights.append(flight)
+
+                    print(f"    ✓ Flight {i+1}: {flight.carrier} {flight.currency} {flight.price}")
+
+                except Exception as e:
+                    print(f"    ⚠️  Error parsing flight: {e}")
+                    continue
+
+            print(f"  ✅ Successfully parsed {len(flights)} flights")
+        else:
+            print(f"  ⚠️  No flights found in response")
+            print(f"  Raw response: {data}")
+
+        return flights
+
+    async def search_flights_async(self, origin: str, destination: str, departure_date: str,
+                                   adults: int = 1, travel_class: str = "ECONOMY",
+                                   max_results: int = 5) -> List[FlightOption]:
+        """Async variant of search_flights using the shared non-blocking HTTP client"""
+
+        token = await asyncio.to_thread(lambda: self.access_token) if self.use_real_api else None
+        if not token:
+            print(f"  ⚠️  Real API not available. Using mock data.")
+            return self._mock_flight_search(origin, destination, departure_date,
+                                          travel_class, max_results)
+
+        key = self.offer_cache.make_key(origin, destination, departure_date, adults, travel_class)
+        return await self.offer_cache.get_or_fetch_async(
+            key, max_results, max(max_results, self.CACHE_FETCH_SIZE),
+            lambda limit: self._real_flight_search_async(origin, destination, departure_date,
+                                                         adults, travel_class, limit)
+        )
+
+    async def _real_flight_search_async(self, origin, destination, departure_date,
+                                        adults, travel_class, max_results) -> List[FlightOption]:
+        """Async variant of _real_flight_search"""
+        try:
+            params = {
+                "originLocationCode": origin.upper(),
+                "destinationLocationCode": destination.upper(),
+                "departureDate": departure_date,
+                "adults": adults
+            }
+
+            print(f"\n  🔍 Searching flights async (TEST API): {origin} → {destination} on {departure_date}")
+
+            response = await self._get_offers_async(params)
+
+            if response.status_code != 200:
+                print(f"  ⚠️  API Error {response.status_code}")
+                print(f"  Response: {response.text[:200]}")
+                return []
+
+            return self._parse_flight_offers(response.json(), origin, destination,
+                                             travel_class, max_results)
+
+        except Exception as e:
+            print(f"  ❌ Flight search error: {type(e).__name__}: {e}")
+            return []
+
     def _mock_flight_search(self, origin, destination, departure_date,
                            travel_class, max_results) -> List[FlightOption]:
         """Generate mock flights for fallback"""
@@ -280,23 +479,9 @@ class FlightAgent:
         except:
             return False
 
-    def rank_flights(self, flights):
-        """Rank flights by value"""
-        if not flights:
-            return []
-
-        max_price = max(f.price for f in flights)
-        max_duration = max(f.duration_minutes for f in flights)
-
-        scored = []
-        for flight in flights:
-            price_score = 1 - (flight.price / max_price) if max_price > 0 else 0
-            duration_score = 1 - (flight.duration_minutes / max_duration) if max_duration > 0 else 0
-            score = 0.4 * price_score + 0.3 * duration_score + 0.3 * flight.reliability_score
-            scored.append((score, flight))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [f for _, f in scored]
+    def rank_flights(self, flights, top_k: Optional[int] = None):
+        """Rank flights by value (only the best top_k when given)"""
+        return self.RANKING.rank(flights, top_k)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,622 @@
+"""
+Gazetteer Module
+Offline city/airport lookup backed by a compact memory-mapped file
+
+City→IATA and city→coordinate tables used to be copied into the planner,
+the orchestrator and several agents, each resolved by a linear scan. They
+are now one gazetteer, compiled into a binary file:
+
+    header | places | keys | hash table | sorted key order | strings
+
+Places are fixed-size records (name, country, lat/lon, IATA code,
+population). Keys are normalized names, aliases and IATA codes pointing at a
+place. The open-addressing hash table gives O(1) exact lookup straight from
+the mmap. The sorted key order answers prefix queries by binary search, and
+a trigram index (built on first use) handles misspellings.
+
+coordinates() and airport_code() feed flight searches and distances, so they
+only accept an exact name, alias or IATA code, and a ", Country" qualifier
+must name the place's country ("London, Ontario" is not London, GB).
+Substring and fuzzy matching are opt-in (resolve(..., loose=True), used by
+the lookup command).
+
+The file is built on first use from the curated SEED_PLACES below. For full
+coverage, build it from GeoNames and OurAirports dumps:
+
+    python gazetteer.py build --geonames cities15000.txt --airports airports.csv
+    python gazetteer.py lookup "bengaluru" "Kyoto, Japan" "pari"
+"""
+
+import argparse
+import csv
+import math
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Place:
+    """A city or airport"""
+    name: str
+    country: str  # ISO 3166-1 alpha-2
+    latitude: float
+    longitude: float
+    iata: Optional[str] = None  # Main airport serving the place
+    population: int = 0
+    kind: str = 'city'  # city / airport
+
+
+# name, country, lat, lon, IATA, aliases
+SEED_PLACES = [
+    # India
+    ('Bangalore', 'IN', 12.9716, 77.5946, 'BLR', ('bengaluru',)),
+    ('Mumbai', 'IN', 19.0760, 72.8777, 'BOM', ('bombay',)),
+    ('Delhi', 'IN', 28.6139, 77.2090, 'DEL', ('new delhi',)),
+    ('Kolkata', 'IN', 22.5726, 88.3639, 'CCU', ('calcutta',)),
+    ('Chennai', 'IN', 13.0827, 80.2707, 'MAA', ('madras',)),
+    ('Hyderabad', 'IN', 17.3850, 78.4867, 'HYD', ()),
+    ('Pune', 'IN', 18.5204, 73.8567, 'PNQ', ()),
+    ('Ahmedabad', 'IN', 23.0225, 72.5714, 'AMD', ()),
+    ('Jaipur', 'IN', 26.9124, 75.7873, 'JAI', ()),
+    ('Kochi', 'IN', 9.9312, 76.2673, 'COK', ('cochin',)),
+    ('Goa', 'IN', 15.2993, 74.1240, 'GOI', ()),
+    ('Thiruvananthapuram', 'IN', 8.5241, 76.9366, 'TRV', ('trivandrum',)),
+    ('Lucknow', 'IN', 26.8467, 80.9462, 'LKO', ()),
+    ('Chandigarh', 'IN', 30.7333, 76.7794, 'IXC', ()),
+    ('Coimbatore', 'IN', 11.0168, 76.9558, 'CJB', ()),
+    ('Mangalore', 'IN', 12.8698, 74.8430, 'IXE', ('mangaluru',)),
+    ('Visakhapatnam', 'IN', 17.6868, 83.2185, 'VTZ', ('vizag',)),
+    ('Indore', 'IN', 22.7196, 75.8577, 'IDR', ()),
+    ('Bhubaneswar', 'IN', 20.2961, 85.8245, 'BBI', ()),
+    ('Nagpur', 'IN', 21.1458, 79.0882, 'NAG', ()),
+    ('Vadodara', 'IN', 22.3072, 73.1812, 'BDQ', ()),
+    ('Raipur', 'IN', 21.2514, 81.6296, 'RPR', ()),
+    ('Surat', 'IN', 21.1702, 72.8311, 'STV', ()),
+    ('Amritsar', 'IN', 31.6340, 74.8723, 'ATQ', ()),
+    ('Varanasi', 'IN', 25.3176, 82.9739, 'VNS', ()),
+    ('Patna', 'IN', 25.5941, 85.1376, 'PAT', ()),
+    ('Ranchi', 'IN', 23.3441, 85.3096, 'IXR', ()),
+    ('Guwahati', 'IN', 26.1445, 91.7362, 'GAU', ()),
+    ('Imphal', 'IN', 24.8170, 93.9368, 'IMF', ()),
+    ('Agartala', 'IN', 23.8315, 91.2868, 'IXA', ()),
+    ('Agra', 'IN', 27.1767, 78.0081, 'AGR', ()),
+    ('Udaipur', 'IN', 24.5854, 73.7125, 'UDR', ()),
+    ('Mysore', 'IN', 12.2958, 76.6394, 'MYQ', ('mysuru',)),
+    # Asia / Middle East
+    ('Tokyo', 'JP', 35.6762, 139.6503, 'NRT', ()),
+    ('Osaka', 'JP', 34.6937, 135.5023, 'KIX', ()),
+    ('Kyoto', 'JP', 35.0116, 135.7681, None, ()),
+    ('Seoul', 'KR', 37.5665, 126.9780, 'ICN', ()),
+    ('Beijing', 'CN', 39.9042, 116.4074, 'PEK', ()),
+    ('Shanghai', 'CN', 31.2304, 121.4737, 'PVG', ()),
+    ('Hong Kong', 'HK', 22.3193, 114.1694, 'HKG', ()),
+    ('Taipei', 'TW', 25.0330, 121.5654, 'TPE', ()),
+    ('Singapore', 'SG', 1.3521, 103.8198, 'SIN', ()),
+    ('Bangkok', 'TH', 13.7563, 100.5018, 'BKK', ()),
+    ('Phuket', 'TH', 7.8804, 98.3923, 'HKT', ()),
+    ('Kuala Lumpur', 'MY', 3.1390, 101.6869, 'KUL', ()),
+    ('Jakarta', 'ID', -6.2088, 106.8456, 'CGK', ()),
+    ('Denpasar', 'ID', -8.6705, 115.2126, 'DPS', ('bali',)),
+    ('Manila', 'PH', 14.5995, 120.9842, 'MNL', ()),
+    ('Hanoi', 'VN', 21.0278, 105.8342, 'HAN', ()),
+    ('Ho Chi Minh City', 'VN', 10.8231, 106.6297, 'SGN', ('saigon',)),
+    ('Colombo', 'LK', 6.9271, 79.8612, 'CMB', ()),
+    ('Kathmandu', 'NP', 27.7172, 85.3240, 'KTM', ()),
+    ('Dhaka', 'BD', 23.8103, 90.4125, 'DAC', ()),
+    ('Male', 'MV', 4.1755, 73.5093, 'MLE', ()),
+    ('Dubai', 'AE', 25.2048, 55.2708, 'DXB', ()),
+    ('Abu Dhabi', 'AE', 24.4539, 54.3773, 'AUH', ()),
+    ('Doha', 'QA', 25.2854, 51.5310, 'DOH', ()),
+    ('Muscat', 'OM', 23.5880, 58.3829, 'MCT', ()),
+    ('Riyadh', 'SA', 24.7136, 46.6753, 'RUH', ()),
+    ('Tel Aviv', 'IL', 32.0853, 34.7818, 'TLV', ()),
+    ('Istanbul', 'TR', 41.0082, 28.9784, 'IST', ()),
+    # Europe
+    ('London', 'GB', 51.5074, -0.1278, 'LHR', ()),
+    ('Manchester', 'GB', 53.4808, -2.2426, 'MAN', ()),
+    ('Edinburgh', 'GB', 55.9533, -3.1883, 'EDI', ()),
+    ('Dublin', 'IE', 53.3498, -6.2603, 'DUB', ()),
+    ('Paris', 'FR', 48.8566, 2.3522, 'CDG', ()),
+    ('Amsterdam', 'NL', 52.3676, 4.9041, 'AMS', ()),
+    ('Brussels', 'BE', 50.8503, 4.3517, 'BRU', ()),
+    ('Frankfurt', 'DE', 50.1109, 8.6821, 'FRA', ()),
+    ('Berlin', 'DE', 52.5200, 13.4050, 'BER', ()),
+    ('Munich', 'DE', 48.1351, 11.5820, 'MUC', ()),
+    ('Zurich', 'CH', 47.3769, 8.5417, 'ZRH', ()),
+    ('Geneva', 'CH', 46.2044, 6.1432, 'GVA', ()),
+    ('Vienna', 'AT', 48.2082, 16.3738, 'VIE', ()),
+    ('Prague', 'CZ', 50.0755, 14.4378, 'PRG', ()),
+    ('Budapest', 'HU', 47.4979, 19.0402, 'BUD', ()),
+    ('Warsaw', 'PL', 52.2297, 21.0122, 'WAW', ()),
+    ('Copenhagen', 'DK', 55.6761, 12.5683, 'CPH', ()),
+    ('Stockholm', 'SE', 59.3293, 18.0686, 'ARN', ()),
+    ('Oslo', 'NO', 59.9139, 10.7522, 'OSL', ()),
+    ('Helsinki', 'FI', 60.1699, 24.9384, 'HEL', ()),
+    ('Rome', 'IT', 41.9028, 12.4964, 'FCO', ()),
+    ('Milan', 'IT', 45.4642, 9.1900, 'MXP', ()),
+    ('Venice', 'IT', 45.4408, 12.3155, 'VCE', ()),
+    ('Florence', 'IT', 43.7696, 11.2558, 'FLR', ()),
+    ('Barcelona', 'ES', 41.3851, 2.1734, 'BCN', ()),
+    ('Madrid', 'ES', 40.4168, -3.7038, 'MAD', ()),
+    ('Lisbon', 'PT', 38.7223, -9.1393, 'LIS', ()),
+    ('Athens', 'GR', 37.9838, 23.7275, 'ATH', ()),
+    ('Moscow', 'RU', 55.7558, 37.6173, 'SVO', ()),
+    # Africa
+    ('Cairo', 'EG', 30.0444, 31.2357, 'CAI', ()),
+    ('Nairobi', 'KE', -1.2921, 36.8219, 'NBO', ()),
+    ('Johannesburg', 'ZA', -26.2041, 28.0473, 'JNB', ()),
+    ('Cape Town', 'ZA', -33.9249, 18.4241, 'CPT', ()),
+    # Americas
+    ('New York', 'US', 40.7128, -74.0060, 'JFK', ('nyc', 'new york city')),
+    ('Washington', 'US', 38.9072, -77.0369, 'IAD', ('washington dc',)),
+    ('Boston', 'US', 42.3601, -71.0589, 'BOS', ()),
+    ('Chicago', 'US', 41.8781, -87.6298, 'ORD', ()),
+    ('Miami', 'US', 25.7617, -80.1918, 'MIA', ()),
+    ('Las Vegas', 'US', 36.1699, -115.1398, 'LAS', ()),
+    ('Los Angeles', 'US', 34.0522, -118.2437, 'LAX', ()),
+    ('San Francisco', 'US', 37.7749, -122.4194, 'SFO', ()),
+    ('Seattle', 'US', 47.6062, -122.3321, 'SEA', ()),
+    ('Toronto', 'CA', 43.6532, -79.3832, 'YYZ', ()),
+    ('Vancouver', 'CA', 49.2827, -123.1207, 'YVR', ()),
+    ('Mexico City', 'MX', 19.4326, -99.1332, 'MEX', ()),
+    ('Sao Paulo', 'BR', -23.5505, -46.6333, 'GRU', ()),
+    ('Rio de Janeiro', 'BR', -22.9068, -43.1729, 'GIG', ()),
+    ('Buenos Aires', 'AR', -34.6037, -58.3816, 'EZE', ()),
+    # Oceania
+    ('Sydney', 'AU', -33.8688, 151.2093, 'SYD', ()),
+    ('Melbourne', 'AU', -37.8136, 144.9631, 'MEL', ()),
+    ('Auckland', 'NZ', -36.8485, 174.7633, 'AKL', ()),
+]
+
+# Country names for the seed's ISO codes, so "Kyoto, Japan" can be checked against a place
+COUNTRY_NAMES = {
+    'AE': ('united arab emirates', 'uae'), 'AR': ('argentina',), 'AT': ('austria',),
+    'AU': ('australia',), 'BD': ('bangladesh',), 'BE': ('belgium',), 'BR': ('brazil',),
+    'CA': ('canada',), 'CH': ('switzerland',), 'CN': ('china',), 'CZ': ('czech republic', 'czechia'),
+    'DE': ('germany',), 'DK': ('denmark',), 'EG': ('egypt',), 'ES': ('spain',), 'FI': ('finland',),
+    'FR': ('france',), 'GB': ('united kingdom', 'uk', 'england', 'scotland', 'great britain'),
+    'GR': ('greece',), 'HK': ('hong kong',), 'HU': ('hungary',), 'ID': ('indonesia',),
+    'IE': ('ireland',), 'IL': ('israel',), 'IN': ('india',), 'IT': ('italy',), 'JP': ('japan',),
+    'KE': ('kenya',), 'KR': ('south korea', 'korea'), 'LK': ('sri lanka',), 'MV': ('maldives',),
+    'MX': ('mexico',), 'MY': ('malaysia',), 'NL': ('netherlands', 'the netherlands', 'holland'),
+    'NO': ('norway',), 'NP': ('nepal',), 'NZ': ('new zealand',), 'OM': ('oman',),
+    'PH': ('philippines',), 'PL': ('poland',), 'PT': ('portugal',), 'QA': ('qatar',),
+    'RU': ('russia',), 'SA': ('saudi arabia',), 'SE': ('sweden',), 'SG': ('singapore',),
+    'TH': ('thailand',), 'TR': ('turkey', 'turkiye'), 'TW': ('taiwan',),
+    'US': ('united states', 'united states of america', 'usa', 'us'), 'VN': ('vietnam', 'viet nam'),
+    'ZA': ('south africa',),
+}
+_COUNTRY_CODES = {name: code for code, names in COUNTRY_NAMES.items() for name in names}
+
+
+def country_code(name: str) -> Optional[str]:
+    """ISO code for a country name or code ("Japan", "jp"), or None if unknown"""
+    key = ' '.join(name.lower().split())
+    if key.upper() in COUNTRY_NAMES:
+        return key.upper()
+    return _COUNTRY_CODES.get(key)
+
+MAGIC = b'GAZ1'
+VERSION = 1
+# magic, version, seed_only, seed_crc, places, keys, table slots
+_HEADER = struct.Struct('<4sIIIIII')
+# lat, lon, population, name offset, name length, IATA, country, kind
+_PLACE = struct.Struct('<ddIIH3s2sB')
+# key offset, key length, place index
+_KEY = struct.Struct('<IHI')
+_KINDS = ('city', 'airport')
+
+
+def normalize_key(name: str) -> str:
+    """Lowercase, collapse whitespace; "Tokyo, Japan" keeps only "tokyo" """
+    if not name:
+        return ""
+    return ' '.join(name.split(',')[0].lower().split())
+
+
+def _seed_crc() -> int:
+    return zlib.crc32(repr(SEED_PLACES).encode())
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ----------------------------------------------------------------------
+# Building
+# ----------------------------------------------------------------------
+
+def seed_entries() -> List[Tuple[Place, Tuple[str, ...]]]:
+    """SEED_PLACES as (place, aliases)"""
+    return [(Place(name, country, lat, lon, iata), aliases)
+            for name, country, lat, lon, iata, aliases in SEED_PLACES]
+
+
+def read_geonames(path: str) -> Iterable[Tuple[Place, Tuple[str, ...]]]:
+    """Cities from a GeoNames dump (cities15000.txt etc., tab separated)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) < 15:
+                continue
+            name, ascii_name = cols[1], cols[2]
+            aliases = (ascii_name,) if ascii_name and ascii_name != name else ()
+            yield Place(name, cols[8], float(cols[4]), float(cols[5]),
+                        population=int(cols[14] or 0)), aliases
+
+
+def read_ourairports(path: str) -> Iterable[Tuple[Place, str, int]]:
+    """(airport, municipality, rank) for scheduled airports with an IATA code in an OurAirports airports.csv"""
+    ranks = {'large_airport': 2, 'medium_airport': 1}
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            iata = (row.get('iata_code') or '').strip().upper()
+            if len(iata) != 3 or row.get('type') not in ranks or row.get('scheduled_service') != 'yes':
+                continue
+            place = Place(row['name'], row.get('iso_country', ''), float(row['latitude_deg']),
+                          float(row['longitude_deg']), iata=iata, kind='airport')
+            yield place, row.get('municipality', ''), ranks[row['type']]
+
+
+def build(entries: Iterable[Tuple[Place, Tuple[str, ...]]], seed_only: bool = False) -> bytes:
+    """Compile (place, aliases) entries into the binary format; the first place to claim a key keeps it"""
+    places: List[Place] = []
+    keys: Dict[str, int] = {}
+    for place, aliases in entries:
+        index = len(places)
+        places.append(place)
+        names = [place.name, *aliases]
+        if place.iata:
+            names.append(place.iata)
+        for name in names:
+            key = normalize_key(name)
+            if key:
+                keys.setdefault(key, index)
+
+    strings = bytearray()
+
+    def intern(text: str) -> Tuple[int, int]:
+        data = text.encode('utf-8')[:0xFFFF]
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    place_bytes = bytearray()
+    for place in places:
+        offset, length = intern(place.name)
+        place_bytes += _PLACE.pack(place.latitude, place.longitude, min(place.population, 0xFFFFFFFF),
+                                   offset, length, (place.iata or '').encode('ascii')[:3],
+                                   place.country.encode('ascii', 'ignore')[:2], _KINDS.index(place.kind))
+
+    key_list = sorted(keys)
+    key_bytes = bytearray()
+    for key in key_list:
+        offset, length = intern(key)
+        key_bytes += _KEY.pack(offset, length, keys[key])
+
+    # Open addressing, load factor <= 0.5
+    slots = 1 << max(4, (2 * len(key_list)).bit_length())
+    table = np.full(slots, -1, dtype='<i4')
+    for k, key in enumerate(key_list):
+        slot = zlib.crc32(key.encode('utf-8')) & (slots - 1)
+        while table[slot] >= 0:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = k
+    # Keys are already sorted, so the prefix order is the identity
+    order = np.arange(len(key_list), dtype='<u4')
+
+    header = _HEADER.pack(MAGIC, VERSION, int(seed_only), _seed_crc() if seed_only else 0,
+                          len(places), len(key_list), slots)
+    return b''.join([header, bytes(place_bytes), bytes(key_bytes), table.tobytes(), order.tobytes(),
+                     bytes(strings)])
+
+
+def build_from_sources(geonames: Optional[str] = None, airports: Optional[str] = None) -> bytes:
+    """Seed places first, then GeoNames cities and OurAirports airports"""
+    entries = seed_entries()
+    seeded = {normalize_key(place.name) for place, _ in entries}
+
+    airport_rows = list(read_ourairports(airports)) if airports else []
+    # Best airport per (municipality, country) gives each city its IATA code
+    city_airport: Dict[Tuple[str, str], Tuple[int, str]] = {}
+    for place, municipality, rank in airport_rows:
+        key = (normalize_key(municipality), place.country)
+        if key[0] and rank > city_airport.get(key, (0, ''))[0]:
+            city_airport[key] = (rank, place.iata)
+
+    if geonames:
+        cities = sorted(read_geonames(geonames), key=lambda entry: -entry[0].population)
+        for place, aliases in cities:
+            key = normalize_key(place.name)
+            if key in seeded:
+                continue
+            iata = city_airport.get((key, place.country), (0, None))[1]
+            entries.append((Place(place.name, place.country, place.latitude, place.longitude,
+                                  iata, place.population), aliases))
+
+    for place, _, _ in sorted(airport_rows, key=lambda row: -row[2]):
+        entries.append((place, ()))
+    return build(entries, seed_only=not (geonames or airports))
+
+
+# ----------------------------------------------------------------------
+# Lookup
+# ----------------------------------------------------------------------
+
+class Gazetteer:
+    """Read-only view of a compiled gazetteer (mmap'd file or in-memory bytes)"""
+
+    def __init__(self, data):
+        self._data = memoryview(data)
+        magic, version, seed_only, seed_crc, n_places, n_keys, slots = _HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a gazetteer file (or an incompatible version)")
+        self.seed_only = bool(seed_only)
+        self.seed_crc = seed_crc
+        self.num_places = n_places
+        self.num_keys = n_keys
+        self._slots = slots
+
+        self._places_at = _HEADER.size
+        self._keys_at = self._places_at + n_places * _PLACE.size
+        table_at = self._keys_at + n_keys * _KEY.size
+        self._table = np.frombuffer(self._data, dtype='<i4', count=slots, offset=table_at)
+        order_at = table_at + slots * 4
+        self._order = np.frombuffer(self._data, dtype='<u4', count=n_keys, offset=order_at)
+        self._strings_at = order_at + n_keys * 4
+
+        self._lock = threading.Lock()
+        self._trigram_index: Optional[Dict[str, List[int]]] = None
+        self._airports: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def open(cls, path: str) -> 'Gazetteer':
+        """Memory-map a compiled file"""
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    # Records --------------------------------------------------------------
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_at + offset
+        return bytes(self._data[start:start + length]).decode('utf-8')
+
+    def _key(self, k: int) -> Tuple[str, int]:
+        offset, length, place = _KEY.unpack_from(self._data, self._keys_at + k * _KEY.size)
+        return self._string(offset, length), place
+
+    def place(self, index: int) -> Place:
+        lat, lon, population, offset, length, iata, country, kind = _PLACE.unpack_from(
+            self._data, self._places_at + index * _PLACE.size)
+        return Place(self._string(offset, length), country.decode('ascii').rstrip('\x00'), lat, lon,
+                     iata.decode('ascii').rstrip('\x00') or None, population, _KINDS[kind])
+
+    # Queries --------------------------------------------------------------
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """Exact match on a normalized name, alias or IATA code (O(1))"""
+        key = normalize_key(name)
+        if not key:
+            return None
+        mask = self._slots - 1
+        slot = zlib.crc32(key.encode('utf-8')) & mask
+        while True:
+            k = int(self._table[slot])
+            if k < 0:
+                return None
+            candidate, place = self._key(k)
+            if candidate == key:
+                return self.place(place)
+            slot = (slot + 1) & mask
+
+    def prefix(self, text: str, limit: int = 10) -> List[Place]:
+        """Places whose name or alias starts with text, in key order"""
+        key = normalize_key(text)
+        if not key:
+            return []
+        # Bisect over the mmap'd sorted order
+        lo = bisect_left(range(self.num_keys), key, key=lambda position: self._key(int(self._order[position]))[0])
+        results, seen = [], set()
+        for position in range(lo, self.num_keys):
+            candidate, place = self._key(int(self._order[position]))
+            if not candidate.startswith(key) or len(results) >= limit:
+                break
+            if place not in seen:
+                seen.add(place)
+                results.append(self.place(place))
+        return results
+
+    def fuzzy(self, text: str, limit: int = 5, min_similarity: float = 0.45) -> List[Tuple[Place, float]]:
+        """Closest names by trigram (Jaccard) similarity, best first"""
+        key = normalize_key(text)
+        if not key:
+            return []
+        index = self._get_trigram_index()
+        grams = _trigrams(key)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for k in index.get(gram, ()):
+                shared[k] += 1
+
+        scored = []
+        for k, common in shared.items():
+            candidate, place = self._key(k)
+            similarity = common / len(grams | _trigrams(candidate))
+            if similarity >= min_similarity:
+                scored.append((similarity, place))
+        scored.sort(key=lambda item: -item[0])
+
+        results, seen = [], set()
+        for similarity, place in scored:
+            if place not in seen:
+                seen.add(place)
+                results.append((self.place(place), similarity))
+            if len(results) >= limit:
+                break
+        return results
+
+    def resolve(self, text: str, loose: bool = False) -> Optional[Place]:
+        """
+        Place for "name" or "name, ..., country": an exact name, alias or IATA
+        code whose country the qualifier (if any) names. With loose, also a
+        known name inside the text ("trip to new delhi") and then the closest
+        spelling; only meant for interactive lookup.
+        """
+        name, _, qualifier = text.partition(',')
+        qualifier = qualifier.rsplit(',', 1)[-1].strip()
+
+        place = self.lookup(name)
+        if place is None and loose:
+            words = normalize_key(name).split()
+            for size in range(min(len(words), 4), 0, -1):  # Longest phrase first
+                for start in range(len(words) - size + 1):
+                    place = self.lookup(' '.join(words[start:start + size]))
+                    if place:
+                        break
+                if place:
+                    break
+            if place is None:
+                matches = self.fuzzy(name, limit=1)
+                place = matches[0][0] if matches else None
+
+        if place and qualifier and country_code(qualifier) != place.country:
+            return None
+        return place
+
+    def coordinates(self, text: str) -> Optional[Tuple[float, float]]:
+        place = self.resolve(text)
+        return (place.latitude, place.longitude) if place else None
+
+    def airport_code(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """IATA code serving a place (its own, else the nearest airport's)"""
+        place = self.resolve(text)
+        return self.airport_of(place, default) if place else default
+
+    def airport_of(self, place: Place, default: Optional[str] = None) -> Optional[str]:
+        """IATA code of a place, else of the airport nearest to it"""
+        if place.iata:
+            return place.iata
+        nearest = self.nearest_airport(place.latitude, place.longitude)
+        return nearest.iata if nearest else default
+
+    def nearest_airport(self, lat: float, lon: float) -> Optional[Place]:
+        """Closest place with an IATA code (vectorized haversine over all of them)"""
+        indices, lats, lons = self._get_airports()
+        if not len(indices):
+            return None
+        dlat = lats - math.radians(lat)
+        dlon = lons - math.radians(lon)
+        a = np.sin(dlat / 2) ** 2 + math.cos(math.radians(lat)) * np.cos(lats) * np.sin(dlon / 2) ** 2
+        return self.place(int(indices[np.argmin(a)]))
+
+    def names(self, kind: str = 'city') -> List[str]:
+        """Names of every place of a kind"""
+        return [p.name for p in (self.place(i) for i in range(self.num_places)) if p.kind == kind]
+
+    # Lazy indexes ---------------------------------------------------------
+
+    def _get_trigram_index(self) -> Dict[str, List[int]]:
+        with self._lock:
+            if self._trigram_index is None:
+                index = defaultdict(list)
+                for k in range(self.num_keys):
+                    key, _ = self._key(k)
+                    if len(key) > 3:  # IATA codes only match exactly
+                        for gram in _trigrams(key):
+                            index[gram].append(k)
+                self._trigram_index = dict(index)
+            return self._trigram_index
+
+    def _get_airports(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._airports is None:
+                served = [(i, p) for i, p in ((i, self.place(i)) for i in range(self.num_places)) if p.iata]
+                self._airports = (np.array([i for i, _ in served], dtype=np.int64),
+                                  np.radians([p.latitude for _, p in served]),
+                                  np.radians([p.longitude for _, p in served]))
+            return self._airports
+
+
+# Global instance
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def default_path() -> str:
+    return os.getenv('GAZETTEER_PATH') or os.path.join(os.getenv('TRAVEL_CACHE_DIR', '.cache'), 'gazetteer.bin')
+
+
+def get_gazetteer() -> Gazetteer:
+    """Get global gazetteer instance (compiled from the seed on first use if no file exists)"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            path = default_path()
+            try:
+                gazetteer = Gazetteer.open(path)
+                # A seed-only file is rebuilt whenever SEED_PLACES changes
+                if gazetteer.seed_only and gazetteer.seed_crc != _seed_crc():
+                    raise ValueError("stale seed build")
+                _gazetteer = gazetteer
+            except (OSError, ValueError):
+                data = build_from_sources()
+                try:
+                    directory = os.path.dirname(path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    with open(path + '.tmp', 'wb') as f:
+                        f.write(data)
+                    os.replace(path + '.tmp', path)
+                    _gazetteer = Gazetteer.open(path)
+                except OSError as e:
+                    print(f"  ⚠️ Gazetteer file unavailable ({e}), using memory only")
+                    _gazetteer = Gazetteer(data)
+    return _gazetteer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline gazetteer")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_cmd = commands.add_parser('build', help="Compile the gazetteer file")
+    build_cmd.add_argument('--geonames', help="GeoNames cities dump (e.g. cities15000.txt)")
+    build_cmd.add_argument('--airports', help="OurAirports airports.csv")
+    build_cmd.add_argument('--output', default=default_path())
+    lookup_cmd = commands.add_parser('lookup', help="Resolve names")
+    lookup_cmd.add_argument('names', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        data = build_from_sources(args.geonames, args.airports)
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'wb') as f:
+            f.write(data)
+        gazetteer = Gazetteer(data)
+        print(f"✅ Wrote {args.output}: {gazetteer.num_places} places, {gazetteer.num_keys} keys, "
+              f"{len(data) / 1024:.0f} KB")
+        return
+
+    gazetteer = get_gazetteer()
+    for name in args.names:
+        place = gazetteer.resolve(name, loose=True)
+        if place is None:
+            print(f"❌ {name}: not found")
+            continue
+        exact = '' if gazetteer.resolve(name) else ' (approximate match)'
+        print(f"📍 {name}: {place.name}, {place.country} ({place.latitude:.4f}, {place.longitude:.4f}) "
+              f"✈️  {gazetteer.airport_of(place)}{exact}")
+
+
+if __name__ == "__main__":
+    main()
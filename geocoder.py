@@ -0,0 +1,378 @@
+"""
+Geocoder Module
+Shared Nominatim geocoding with an in-process LRU and an on-disk TTL cache
+
+Every agent used to geocode the destination separately on each plan. They now
+share one Geocoder, so a city is resolved once and repeat plans need no
+geocoding round-trips at all. Lookup order:
+1. In-process LRU
+2. On-disk SQLite store (entries expire after GEOCODER_TTL_DAYS)
+3. Nominatim (one request per key even under concurrent lookups); a failed
+   lookup is not retried for GEOCODER_NEGATIVE_TTL seconds
+4. Extra seeded cities (add_seed), then the offline gazetteer, as a fallback
+
+Keys keep the qualifier ("paris|texas" vs "paris|france"). A qualified query
+shares the bare city's entry only when the city is a gazetteer place and the
+qualifier names its country ("Tokyo, Japan" → "tokyo"); otherwise it has an
+entry of its own and its result is never stored under the bare city.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import async_http
+import http_session
+from gazetteer import country_code, get_gazetteer
+
+
+def normalize_key(location: str) -> str:
+    """
+    Normalize a location string into a cache key
+
+    "Tokyo" and " tokyo " map to "tokyo"; "Paris, Texas" maps to
+    "paris|texas" (the qualifier is kept, see Geocoder._alias).
+    """
+    if not location:
+        return ""
+    parts = [' '.join(part.lower().split()) for part in location.split(',')]
+    city, qualifier = parts[0], ', '.join(part for part in parts[1:] if part)
+    return f"{city}|{qualifier}" if city and qualifier else city
+
+
+class Geocoder:
+    """Shared geocoder with LRU + persistent cache and seeded fallback"""
+
+    def __init__(self, cache_path: Optional[str] = None, lru_size: int = 1024,
+                 ttl_seconds: float = 30 * 86400, seed: Optional[Dict[str, Tuple[float, float]]] = None,
+                 negative_ttl_seconds: float = 300):
+        self.nominatim_url = "https://nominatim.openstreetmap.org/search"
+        self.headers = {'User-Agent': 'TravelPlannerApp/1.0 (student project)'}
+
+        self.lru_size = lru_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.seed: Dict[str, Tuple[float, float]] = {}
+        if seed:
+            self.add_seed(seed)
+
+        self._lru: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._failed: Dict[str, float] = {}  # key -> time Nominatim last found nothing
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._async_inflight: Dict[str, "asyncio.Future"] = {}
+
+        self.cache_path = cache_path
+        self._db = None
+        if cache_path:
+            self._open_db(cache_path)
+
+        self.stats = {'lru_hits': 0, 'disk_hits': 0, 'network': 0, 'seed_fallbacks': 0, 'misses': 0,
+                      'negative_hits': 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add_seed(self, coordinates: Dict[str, Tuple[float, float]]):
+        """Merge a city → (lat, lon) table into the fallback seed"""
+        for city, coords in coordinates.items():
+            self.seed.setdefault(normalize_key(city), tuple(coords))
+
+    def prime(self, location: str, coords: Tuple[float, float]):
+        """Put a known result (e.g. from a warm-up bundle) into the in-process LRU"""
+        key = normalize_key(location)
+        if key:
+            with self._lock:
+                self._remember(key, tuple(coords))
+
+    def geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        """Resolve a location to (lat, lon), or None if it cannot be found"""
+        key = normalize_key(location)
+        if not key:
+            return None
+
+        cached = self._lookup_cached(key)
+        if cached:
+            return cached
+
+        alias = self._alias(key)
+        if alias:
+            return self._remember_alias(key, self.geocode(alias))
+        if self._recently_failed(key):
+            return self._seed_fallback(key)
+
+        # Single-flight: concurrent lookups for the same key wait for the first
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._inflight[key] = event
+
+        if not owner:
+            event.wait(timeout=15)
+            cached = self._lookup_cached(key)
+            return cached or self._seed_fallback(key)
+
+        try:
+            coords = self._fetch_nominatim(location)
+            if coords:
+                self._store(key, coords)
+                return coords
+            self._remember_failure(key)
+            return self._seed_fallback(key)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    async def geocode_async(self, location: str) -> Optional[Tuple[float, float]]:
+        """Async variant of geocode using the shared non-blocking HTTP client"""
+        key = normalize_key(location)
+        if not key:
+            return None
+
+        cached = self._lookup_cached(key)
+        if cached:
+            return cached
+
+        alias = self._alias(key)
+        if alias:
+            return self._remember_alias(key, await self.geocode_async(alias))
+        if self._recently_failed(key):
+            return self._seed_fallback(key)
+
+        pending = self._async_inflight.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[key] = future
+        try:
+            coords = await self._fetch_nominatim_async(location)
+            if coords:
+                self._store(key, coords)
+            else:
+                self._remember_failure(key)
+                coords = self._seed_fallback(key)
+            future.set_result(coords)
+            return coords
+        except Exception as e:
+            self._remember_failure(key)
+            future.set_result(None)
+            print(f"  ⚠️ Geocoding error: {str(e)[:50]}")
+            return self._seed_fallback(key)
+        finally:
+            self._async_inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache hit/miss counters"""
+        return dict(self.stats)
+
+    # ------------------------------------------------------------------
+    # Cache layers
+    # ------------------------------------------------------------------
+
+    def _open_db(self, path: str):
+        """Open (or create) the on-disk store"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            # Version 1 stored "Paris, Texas" under "paris"; those entries can't be trusted
+            if self._db.execute("PRAGMA user_version").fetchone()[0] < 2:
+                self._db.execute("DROP TABLE IF EXISTS geocodes")
+                self._db.execute("PRAGMA user_version = 2")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes ("
+                "key TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"  ⚠️ Geocode cache unavailable ({e}), using memory only")
+            self._db = None
+
+    def _lookup_cached(self, key: str) -> Optional[Tuple[float, float]]:
+        """Check the LRU, then the disk store"""
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.stats['lru_hits'] += 1
+                return self._lru[key]
+
+            if self._db is None:
+                return None
+
+            row = self._db.execute(
+                "SELECT lat, lon, fetched_at FROM geocodes WHERE key = ?", (key,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        lat, lon, fetched_at = row
+        if time.time() - fetched_at > self.ttl_seconds:
+            return None
+
+        coords = (lat, lon)
+        with self._lock:
+            self._remember(key, coords)
+            self.stats['disk_hits'] += 1
+        return coords
+
+    def _store(self, key: str, coords: Tuple[float, float]):
+        """Write a fresh result to both cache layers"""
+        with self._lock:
+            self._remember(key, coords)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO geocodes (key, lat, lon, fetched_at) VALUES (?, ?, ?, ?)",
+                        (key, coords[0], coords[1], time.time())
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"  ⚠️ Geocode cache write failed: {e}")
+
+    def _remember(self, key: str, coords: Tuple[float, float]):
+        """Insert into the LRU (caller holds the lock)"""
+        self._lru[key] = coords
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _alias(self, key: str) -> Optional[str]:
+        """Bare city key a qualified key may share: the city is a gazetteer place in the named country"""
+        city, _, qualifier = key.partition('|')
+        if not qualifier:
+            return None
+        place = get_gazetteer().lookup(city)
+        if place and country_code(qualifier.rsplit(',', 1)[-1]) == place.country:
+            return city
+        return None
+
+    def _remember_alias(self, key: str, coords: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+        if coords:
+            with self._lock:
+                self._remember(key, coords)
+        return coords
+
+    def _recently_failed(self, key: str) -> bool:
+        with self._lock:
+            failed_at = self._failed.get(key)
+            if failed_at is None:
+                return False
+            if time.time() - failed_at > self.negative_ttl_seconds:
+                del self._failed[key]
+                return False
+            self.stats['negative_hits'] += 1
+            return True
+
+    def _remember_failure(self, key: str):
+        if self.negative_ttl_seconds > 0:
+            with self._lock:
+                self._failed[key] = time.time()
+                while len(self._failed) > self.lru_size:
+                    del self._failed[next(iter(self._failed))]
+
+    def _seed_fallback(self, key: str) -> Optional[Tuple[float, float]]:
+        """
+        Fall back to seeded cities (exact, then substring match for bare
+        cities), then the gazetteer. A qualified key only falls back to a
+        gazetteer place in the country the qualifier names, so "Paris, Texas"
+        is a miss rather than Paris, France.
+        """
+        city, _, qualifier = key.partition('|')
+        coords = self.seed.get(key)
+        if coords is None and not qualifier:
+            for seeded, seeded_coords in self.seed.items():
+                if '|' not in seeded and seeded in key:
+                    coords = seeded_coords
+                    break
+        if coords is None:
+            place = get_gazetteer().resolve(city)
+            if place and (not qualifier or country_code(qualifier.rsplit(',', 1)[-1]) == place.country):
+                coords = (place.latitude, place.longitude)
+
+        if coords is None:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['seed_fallbacks'] += 1
+        return coords
+
+    # ------------------------------------------------------------------
+    # Nominatim
+    # ------------------------------------------------------------------
+
+    def _fetch_nominatim(self, location: str) -> Optional[Tuple[float, float]]:
+        """Query Nominatim (its 1 request/second policy is enforced by rate_limiter)"""
+        try:
+            params = {'q': location, 'format': 'json', 'limit': 1}
+            self.stats['network'] += 1
+            response = http_session.get(self.nominatim_url, params=params,
+                                        headers=self.headers, timeout=10)
+
+            if response.status_code == 200:
+                data = response.json()
+                if data:
+                    return (float(data[0]['lat']), float(data[0]['lon']))
+            return None
+        except Exception as e:
+            print(f"  ⚠️ Geocoding error: {str(e)[:50]}")
+            return None
+
+    async def _fetch_nominatim_async(self, location: str) -> Optional[Tuple[float, float]]:
+        """Async variant of _fetch_nominatim"""
+        params = {'q': location, 'format': 'json', 'limit': 1}
+        self.stats['network'] += 1
+        response = await async_http.get(self.nominatim_url, params=params,
+                                        headers=self.headers, timeout=10)
+
+        if response.status_code == 200:
+            data = response.json()
+            if data:
+                return (float(data[0]['lat']), float(data[0]['lon']))
+        return None
+
+
+def locate(location: str) -> Optional[Tuple[float, float]]:
+    """Coordinates of a place: the offline gazetteer first, then a (cached) geocode"""
+    return get_gazetteer().coordinates(location) or get_geocoder().geocode(location)
+
+
+def airport_code_for(location: str, default: Optional[str] = None) -> Optional[str]:
+    """IATA code serving a place; places the gazetteer lacks get the airport nearest their geocode"""
+    gazetteer = get_gazetteer()
+    code = gazetteer.airport_code(location)
+    if code:
+        return code
+    coords = get_geocoder().geocode(location)
+    nearest = gazetteer.nearest_airport(*coords) if coords else None
+    return nearest.iata if nearest else default
+
+
+# Global instance
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """Get global geocoder instance"""
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            cache_dir = os.getenv('TRAVEL_CACHE_DIR', '.cache')
+            _geocoder = Geocoder(
+                cache_path=os.path.join(cache_dir, 'geocode.sqlite'),
+                lru_size=int(os.getenv('GEOCODER_LRU_SIZE', '1024')),
+                ttl_seconds=float(os.getenv('GEOCODER_TTL_DAYS', '30')) * 86400,
+                negative_ttl_seconds=float(os.getenv('GEOCODER_NEGATIVE_TTL', '300'))
+            )
+    return _geocoder
@@ -428,12 +428,15 @@ Compatible with itinerary orchestrator.
 
 from typing import List, Optional
 from dataclasses import dataclass
-import math
-import requests
 from bs4 import BeautifulSoup
 import re
 import logging
 
+import async_http
+import http_session
+from geocoder import locate
+from spatial_index import haversine_km
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -447,43 +450,99 @@ def extract_price(text):
     return float(match.group(1).replace(",", "")) if match else None
 
 
+def _numbeo_request(city: str):
+    """Build the Numbeo cost-of-living URL and headers for a city"""
+    city_url = city.replace(" ", "-")
+    url = f"https://www.numbeo.com/cost-of-living/in/{city_url}"
+
+    headers = {
+        "User-Agent": "Mozilla/5.0",
+        "Accept-Language": "en-US,en;q=0.9"
+    }
+    return url, headers
+
+
+def _parse_transport_rates(html: str):
+    """Extract taxi start fare, taxi per km and local ticket price from a Numbeo page"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    rates = {
+        "taxi_start": None,
+        "taxi_per_km": None,
+        "local_ticket": None
+    }
+
+    for row in soup.select("table tr"):
+        text = row.get_text(" ", strip=True).lower()
+
+        if "taxi start" in text:
+            rates["taxi_start"] = extract_price(text)
+
+        elif "taxi 1km" in text:
+            rates["taxi_per_km"] = extract_price(text)
+
+        elif "one-way ticket" in text:
+            rates["local_ticket"] = extract_price(text)
+
+    return rates
+
+
+# Rates by normalized city: scraped earlier in this process or primed from a warm-up bundle
+_rates_cache = {}
+
+
+def _rates_key(city: str) -> str:
+    return ' '.join(city.lower().split())
+
+
+def prime_transport_rates(city: str, rates: dict):
+    """Use known rates for a city instead of scraping Numbeo"""
+    _rates_cache[_rates_key(city)] = rates
+
+
 def get_transport_rates(city: str):
     """Scrape taxi start fare, taxi per km, local transport ticket."""
 
-    try:
-        city_url = city.replace(" ", "-")
-        url = f"https://www.numbeo.com/cost-of-living/in/{city_url}"
+    cached = _rates_cache.get(_rates_key(city))
+    if cached is not None:
+        return cached
 
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept-Language": "en-US,en;q=0.9"
-        }
+    try:
+        url, headers = _numbeo_request(city)
 
-        r = requests.get(url, headers=headers, timeout=12)
+        r = http_session.get(url, headers=headers, timeout=12)
         if r.status_code != 200:
             return None
 
-        soup = BeautifulSoup(r.text, "html.parser")
+        rates = _parse_transport_rates(r.text)
 
-        rates = {
-            "taxi_start": None,
-            "taxi_per_km": None,
-            "local_ticket": None
-        }
+        logger.info(f"Numbeo rates for {city}: {rates}")
+        _rates_cache[_rates_key(city)] = rates
+        return rates
 
-        for row in soup.select("table tr"):
-            text = row.get_text(" ", strip=True).lower()
+    except Exception as e:
+        logger.warning(f"Numbeo scraping failed: {e}")
+        return None
 
-            if "taxi start" in text:
-                rates["taxi_start"] = extract_price(text)
 
-            elif "taxi 1km" in text:
-                rates["taxi_per_km"] = extract_price(text)
+async def get_transport_rates_async(city: str):
+    """Async variant of get_transport_rates using the shared non-blocking HTTP client"""
 
-            elif "one-way ticket" in text:
-                rates["local_ticket"] = extract_price(text)
+    cached = _rates_cache.get(_rates_key(city))
+    if cached is not None:
+        return cached
+
+    try:
+        url, headers = _numbeo_request(city)
+
+        r = await async_http.get(url, headers=headers, timeout=12)
+        if r.status_code != 200:
+            return None
+
+        rates = _parse_transport_rates(r.text)
 
         logger.info(f"Numbeo rates for {city}: {rates}")
+        _rates_cache[_rates_key(city)] = rates
         return rates
 
     except Exception as e:
@@ -519,14 +578,6 @@ class TransportOption:
 class GroundTransportAgent:
 
     def __init__(self):
-        self.city_coords = {
-            'bangalore': (12.9716, 77.5946),
-            'mumbai': (19.0760, 72.8777),
-            'delhi': (28.7041, 77.1025),
-            'singapore': (1.3521, 103.8198),
-            'tokyo': (35.6762, 139.6503),
-            'paris': (48.8566, 2.3522),
-        }
 
         self.avg_speed = {
             'taxi': 60,
@@ -541,24 +592,16 @@ class GroundTransportAgent:
 
     def calculate_distance(self, origin, dest):
 
-        if origin.lower() not in self.city_coords or dest.lower() not in self.city_coords:
+        # Gazetteer first, then a geocode; 500 km only if a place can't be found at all
+        origin_coords = locate(origin)
+        dest_coords = locate(dest)
+        if origin_coords is None or dest_coords is None:
             return 500
 
-        lat1, lon1 = self.city_coords[origin.lower()]
-        lat2, lon2 = self.city_coords[dest.lower()]
-
-        R = 6371
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
+        lat1, lon1 = origin_coords
+        lat2, lon2 = dest_coords
 
-        a = (
-            math.sin(dlat/2)**2
-            + math.cos(math.radians(lat1))
-            * math.cos(math.radians(lat2))
-            * math.sin(dlon/2)**2
-        )
-
-        return round(R * 2 * math.asin(math.sqrt(a)), 2)
+        return round(float(haversine_km(lat1, lon1, lat2, lon2)), 2)
 
     # ============================================================
     # SEARCH TRANSPORT
@@ -569,11 +612,27 @@ class GroundTransportAgent:
                          max_price=None,
                          max_results=10):
 
+        rates = get_transport_rates(origin)
+        return self._build_options(origin, destination, transport_types,
+                                   max_price, max_results, rates)
+
+    async def search_transport_async(self, origin, destination,
+                                     transport_types=None,
+                                     max_price=None,
+                                     max_results=10):
+        """Async variant of search_transport (Numbeo lookup is non-blocking)"""
+
+        rates = await get_transport_rates_async(origin)
+        return self._build_options(origin, destination, transport_types,
+                                   max_price, max_results, rates)
+
+    def _build_options(self, origin, destination, transport_types,
+                       max_price, max_results, rates):
+
         if transport_types is None:
             transport_types = ['taxi', 'bus']
 
         distance = self.calculate_distance(origin, destination)
-        rates = get_transport_rates(origin)
 
         options = []
 
@@ -0,0 +1,264 @@
+"""
+Heuristic Planner Module
+Greedy itinerary construction for latency-sensitive requests
+
+Builds a feasible itinerary in a few milliseconds by walking the agents'
+ranked candidate lists (rank_flights, rank_accommodations, rank_activities,
+rank_restaurants) in order. It enforces the same rules as the CP-SAT model:
+budget, exactly one transport, one hotel per day, one to
+max_activities_per_day activities per day, each activity at most once, each
+restaurant at most once per day, no overlaps within a day, and (when the
+optimizer is travel-aware) at most max_daily_travel_minutes of travel a day.
+
+plan_and_refine() can pass the greedy plan to CP-SAT as a hint and improve
+it within a short time budget. If CP-SAT finds nothing in time, the greedy
+plan is returned instead. The result reports the greedy objective and its
+gap to the refined (and optionally the exact) solve.
+"""
+
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from optimizer import CandidatePool, ItineraryOptimizer, SolverConfig
+
+
+class HeuristicPlanner:
+    """Greedy planner over the optimizer's candidate pool"""
+
+    def __init__(self, user_profile, optimizer: Optional[ItineraryOptimizer] = None):
+        self.user_profile = user_profile
+        self.optimizer = optimizer or ItineraryOptimizer(user_profile)
+
+    def plan(self, flights: List[Any], accommodations: List[Any], restaurants: List[Any],
+             activities: List[Any], num_days: int) -> Dict[str, Any]:
+        """Greedy itinerary; same result format as ItineraryOptimizer.optimize_itinerary"""
+        started = time.perf_counter()
+        pool = self.optimizer._prepare_items(flights, accommodations, restaurants, activities, num_days)
+
+        if not pool.size():
+            return {"error": "No items to optimize"}
+        if self.optimizer.travel_aware and pool.plan_days and pool.locations():
+            pool.travel_minutes = self.optimizer._travel_matrix(pool)
+
+        values = self._greedy(pool)
+        if values is None:
+            return {"error": "No feasible heuristic plan found", "status": "INFEASIBLE"}
+
+        objective = self._objective(pool, values)
+        selected_items = self.optimizer._items_from_values(pool, values)
+        elapsed = time.perf_counter() - started
+        print(f"⚡ Heuristic plan: objective {objective} in {elapsed * 1000:.1f}ms")
+
+        return self.optimizer._build_result(pool, selected_items, {
+            'status': 'HEURISTIC',
+            'objective_value': float(objective),
+            'solve_time': elapsed,
+            'total_items': len(selected_items)
+        })
+
+    def plan_and_refine(self, flights: List[Any], accommodations: List[Any], restaurants: List[Any],
+                        activities: List[Any], num_days: int, time_limit_seconds: float = 1.0,
+                        compare_exact: bool = False,
+                        exact_config: Optional[SolverConfig] = None) -> Dict[str, Any]:
+        """
+        Greedy plan, improved by CP-SAT within time_limit_seconds
+
+        Returns the better of the two plans with a 'heuristic' report. With
+        compare_exact, also runs an unrestricted solve (exact_config, or the
+        optimizer's own config) and reports the greedy plan's gap to it.
+        """
+        candidates = dict(flights=flights, accommodations=accommodations, restaurants=restaurants,
+                          activities=activities, num_days=num_days)
+        heuristic = self.plan(**candidates)
+        heuristic_objective = heuristic.get('solver_stats', {}).get('objective_value')
+
+        config = replace(self.optimizer.solver_config, time_limit_seconds=time_limit_seconds)
+        refined = self.optimizer.optimize_itinerary(**candidates, solver_config=config,
+                                                    hint=heuristic.get('solution'))
+        refined_objective = refined.get('solver_stats', {}).get('objective_value')
+
+        if 'error' in refined:
+            # CP-SAT found nothing in time; fall back to the greedy plan
+            result = heuristic
+            print(f"⚠️  CP-SAT returned {refined.get('status', 'no solution')}, using heuristic plan")
+        elif heuristic_objective is not None and heuristic_objective > refined_objective:
+            result = heuristic
+        else:
+            result = refined
+
+        report = {
+            'objective': heuristic_objective,
+            'plan_time': heuristic.get('solver_stats', {}).get('solve_time'),
+            'refined_status': refined.get('solver_stats', {}).get('status', refined.get('status')),
+            'refined_objective': refined_objective,
+            'gap_to_refined': self._gap(heuristic_objective, refined_objective),
+            'used': result.get('solver_stats', {}).get('status'),
+        }
+
+        if compare_exact:
+            exact = self.optimizer.optimize_itinerary(**candidates, solver_config=exact_config)
+            exact_stats = exact.get('solver_stats', {})
+            report.update({
+                'exact_status': exact_stats.get('status', exact.get('status')),
+                'exact_objective': exact_stats.get('objective_value'),
+                'exact_solve_time': exact_stats.get('solve_time'),
+                'gap_to_exact': self._gap(heuristic_objective, exact_stats.get('objective_value')),
+                'gap_to_bound': self._gap(heuristic_objective, exact_stats.get('best_bound')),
+            })
+
+        if report['gap_to_refined'] is not None:
+            print(f"  📉 Heuristic gap to refined plan: {report['gap_to_refined']:.1%}")
+        if report.get('gap_to_exact') is not None:
+            print(f"  📉 Heuristic gap to exact plan: {report['gap_to_exact']:.1%}")
+
+        result['heuristic'] = report
+        return result
+
+    @staticmethod
+    def _gap(objective: Optional[float], reference: Optional[float]) -> Optional[float]:
+        """Relative shortfall of objective against reference"""
+        if objective is None or not reference:
+            return None
+        return (reference - objective) / abs(reference)
+
+    def _limits(self) -> Tuple[float, int, Optional[int]]:
+        """(budget, max activities per day, max daily travel minutes) with the optimizer's defaults"""
+        prefs = self.user_profile.travel_preferences if self.user_profile else None
+        if not prefs:
+            return float('inf'), 4, None
+        return prefs.budget_total, prefs.max_activities_per_day, prefs.max_daily_travel_minutes
+
+    def _greedy(self, pool: CandidatePool) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Decision values per kind (same shapes as DecisionVars), or None if the
+        greedy pass cannot satisfy every rule
+        """
+        budget, max_activities, max_travel = self._limits()
+        plan_days = pool.plan_days
+        num_plan_days = len(plan_days)
+        values = {
+            'transport': np.zeros(len(pool.transport), dtype=bool),
+            'accommodation': np.zeros((len(pool.accommodations), pool.num_days), dtype=bool),
+            'restaurant': np.zeros((len(pool.restaurants), num_plan_days, len(pool.MEAL_SLOTS)), dtype=bool),
+            'activity': np.zeros((len(pool.activities), num_plan_days, len(pool.ACTIVITY_SLOTS)), dtype=bool),
+        }
+
+        # Mandatory candidates first, otherwise keep the agents' ranking
+        def ranked(items) -> List[int]:
+            return sorted(range(len(items)), key=lambda c: not items[c].mandatory)
+
+        activity_costs = sorted(item.cost for item in pool.activities)
+        need_activities = num_plan_days if pool.activities else 0
+        if need_activities > len(pool.activities) or (pool.activities and max_activities < 1):
+            return None
+
+        # Cheapest way to cover what is still required (hotel nights, one activity per day)
+        hotel_reserve = min((item.cost for item in pool.accommodations), default=0) * pool.num_days
+        activity_reserve = sum(activity_costs[:need_activities])
+        spent = 0.0
+
+        # Exactly one transport for the trip
+        if pool.transport:
+            for c in ranked(pool.transport):
+                if spent + pool.transport[c].cost + hotel_reserve + activity_reserve <= budget:
+                    values['transport'][c] = True
+                    spent += pool.transport[c].cost
+                    break
+            else:
+                return None
+
+        # One hotel for the whole stay
+        if pool.accommodations and pool.num_days:
+            for c in ranked(pool.accommodations):
+                if spent + pool.accommodations[c].cost * pool.num_days + activity_reserve <= budget:
+                    values['accommodation'][c, :] = True
+                    spent += pool.accommodations[c].cost * pool.num_days
+                    break
+            else:
+                return None
+
+        # Booked (start, end) windows and activity count per plan day
+        booked: List[List[Tuple[int, int]]] = [[] for _ in plan_days]
+        day_activities = [0] * num_plan_days
+        used = set()
+
+        def fits(day_index: int, start: int, duration: int) -> bool:
+            end = start + duration
+            return all(end <= s or e <= start for s, e in booked[day_index])
+
+        def place(kind: str, c: int, day_index: int, slot: int, start: int) -> bool:
+            """Book the slot unless it pushes the day over the travel cap"""
+            nonlocal spent
+            item = pool.activities[c] if kind == 'activity' else pool.restaurants[c]
+            values[kind][c, day_index, slot] = True
+            if max_travel is not None and sum(self.optimizer._travel_hops(pool, values, day_index)) > max_travel:
+                values[kind][c, day_index, slot] = False
+                return False
+            booked[day_index].append((start, start + item.duration))
+            spent += item.cost
+            return True
+
+        # At least one activity per day, keeping enough budget for the remaining days
+        for d in range(num_plan_days):
+            remaining_days = num_plan_days - d - 1
+            for c in ranked(pool.activities):
+                if c in used:
+                    continue
+                spare = sorted(pool.activities[o].cost for o in range(len(pool.activities))
+                               if o not in used and o != c)[:remaining_days]
+                if (spent + pool.activities[c].cost + sum(spare) <= budget
+                        and place('activity', c, d, 0, pool.ACTIVITY_SLOTS[0])):
+                    used.add(c)
+                    day_activities[d] += 1
+                    break
+            else:
+                return None
+
+        # Meals around the day's first activity; a restaurant at most once per day
+        for d in range(num_plan_days):
+            for slot, start in enumerate(pool.MEAL_SLOTS):
+                for c in ranked(pool.restaurants):
+                    item = pool.restaurants[c]
+                    if (values['restaurant'][c, d].any() or spent + item.cost > budget
+                            or not fits(d, start, item.duration)):
+                        continue
+                    if place('restaurant', c, d, slot, start):
+                        break
+
+        # Further activities in the remaining gaps, ranked order, lightest days first
+        for c in ranked(pool.activities):
+            if c in used or spent + pool.activities[c].cost > budget:
+                continue
+            for d in sorted(range(num_plan_days), key=lambda d: day_activities[d]):
+                if day_activities[d] >= max_activities:
+                    continue
+                slot = next((s for s, start in enumerate(pool.ACTIVITY_SLOTS)
+                             if fits(d, start, pool.activities[c].duration)), None)
+                if slot is not None and place('activity', c, d, slot, pool.ACTIVITY_SLOTS[slot]):
+                    used.add(c)
+                    day_activities[d] += 1
+                    break
+
+        # Mandatory candidates the greedy pass could not fit
+        for kind, items in (('transport', pool.transport), ('accommodation', pool.accommodations),
+                            ('restaurant', pool.restaurants), ('activity', pool.activities)):
+            for c, item in enumerate(items):
+                if item.mandatory and values[kind].size and not values[kind][c].any():
+                    return None
+
+        return values
+
+    def _objective(self, pool: CandidatePool, values: Dict[str, np.ndarray]) -> int:
+        """CP-SAT objective value of a greedy plan (scores less the long-hop penalty)"""
+        scores = self.optimizer._candidate_scores(pool)
+        total = 0
+        for kind, kind_values in values.items():
+            if kind_values.size:
+                counts = kind_values.reshape(len(kind_values), -1).sum(axis=1)
+                total += int(np.dot(scores[kind], counts))
+        for d in range(len(pool.plan_days)):
+            total -= self.optimizer._travel_penalty(self.optimizer._travel_hops(pool, values, d))
+        return total
@@ -0,0 +1,98 @@
+"""
+HTTP Session Module
+Pooled keep-alive HTTP sessions shared by every upstream client
+
+Module-level requests.get/requests.post open a fresh TCP (+TLS) connection on
+every call. Agents call get/post/request from here instead: each upstream host
+gets one requests.Session whose HTTPAdapter keeps up to N idle connections
+alive, so repeat calls to Amadeus, Nominatim, Overpass, Google Places,
+Ticketmaster, PredictHQ, OpenWeather, SerpAPI and Numbeo skip the handshake.
+
+Pool size per host defaults to HTTP_POOL_MAXSIZE and can be overridden with
+HTTP_POOL_SIZES, e.g. "overpass-api.de=8,nominatim.openstreetmap.org=2".
+async_http applies the same per-host limits (a semaphore per host on top of
+its aiohttp connector). Every request
+first takes a slot from the host's rate limiter (see rate_limiter).
+"""
+
+import os
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_rate_limiter
+
+
+def _parse_pool_sizes(spec: str) -> Dict[str, int]:
+    """Parse "host=size,host=size" into a dict"""
+    sizes = {}
+    for part in spec.split(','):
+        if '=' not in part:
+            continue
+        host, size = part.split('=', 1)
+        try:
+            sizes[host.strip().lower()] = int(size)
+        except ValueError:
+            print(f"⚠️  Ignoring invalid HTTP_POOL_SIZES entry: {part.strip()}")
+    return sizes
+
+
+DEFAULT_POOL_SIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+TOTAL_CONNECTION_LIMIT = int(os.getenv('HTTP_POOL_TOTAL', '100'))
+POOL_SIZES = _parse_pool_sizes(os.getenv('HTTP_POOL_SIZES', ''))
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def pool_size_for(host: str) -> int:
+    """Connection pool size for a host"""
+    return POOL_SIZES.get(host.lower(), DEFAULT_POOL_SIZE)
+
+
+def get_session(url: str) -> requests.Session:
+    """Get the pooled session for a URL's host (created on first use)"""
+    host = (urlsplit(url).hostname or '').lower()
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            size = pool_size_for(host)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+    return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Drop-in for requests.request over the host's pooled session (rate limited per host)"""
+    get_rate_limiter().acquire(url)
+    return get_session(url).request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Drop-in for requests.get over the host's pooled session"""
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Drop-in for requests.post over the host's pooled session"""
+    return request('POST', url, **kwargs)
+
+
+def close_all():
+    """Close every pooled session"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """Configured pool size per host with an open session"""
+    with _sessions_lock:
+        return {host: pool_size_for(host) for host in _sessions}
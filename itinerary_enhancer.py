@@ -3,7 +3,7 @@ Itinerary Enhancer - FIXED VERSION with Proper Flight Attribute Handling
 Correctly reads flight data from both optimizer and return flights
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from local_transport_agent import LocalTransportAgent, TransportOption
@@ -59,10 +59,14 @@ class ItineraryEnhancer:
         enhanced_items = []
         previous_location = None
         
+        # Distances between all of the day's located items in one pass
+        distances = self._distance_matrix(day_schedule.items)
+        
         for item in day_schedule.items:
             # Check if we need transport to this location
-            if previous_location and self._needs_transport(previous_location, item):
-                transport = self._add_transport(previous_location, item)
+            distance = distances.get((id(previous_location), id(item))) if previous_location else None
+            if previous_location and self._needs_transport(previous_location, item, distance):
+                transport = self._add_transport(previous_location, item, distance)
                 if transport:
                     enhanced_items.append(transport)
             
@@ -94,7 +98,22 @@ class ItineraryEnhancer:
         else:
             return 'unknown'
     
-    def _needs_transport(self, from_item: Any, to_item: Any) -> bool:
+    def _distance_matrix(self, items: List[Any]) -> Dict[Tuple[int, int], float]:
+        """Distance (km) between every pair of located items, keyed by (id(from), id(to))"""
+        located = [item for item in items if self._has_location(item)]
+        if len(located) < 2:
+            return {}
+        try:
+            matrices = self.transport_agent.transport_matrices(
+                [item.latitude for item in located], [item.longitude for item in located]
+            )
+        except Exception:
+            return {}
+        ids = [id(item) for item in located]
+        return {(a, b): float(matrices.distance_km[i, j])
+                for i, a in enumerate(ids) for j, b in enumerate(ids)}
+    
+    def _needs_transport(self, from_item: Any, to_item: Any, distance: Optional[float] = None) -> bool:
         """Check if transport is needed between two items"""
         
         to_type = self._get_item_type(to_item)
@@ -112,14 +131,15 @@ class ItineraryEnhancer:
         if not (self._has_location(from_item) and self._has_location(to_item)):
             return False
         
-        # Calculate distance
-        try:
-            distance = self.transport_agent.calculate_distance(
-                from_item.latitude, from_item.longitude,
-                to_item.latitude, to_item.longitude
-            )
-        except Exception as e:
-            return False
+        # Calculate distance (unless precomputed)
+        if distance is None:
+            try:
+                distance = self.transport_agent.calculate_distance(
+                    from_item.latitude, from_item.longitude,
+                    to_item.latitude, to_item.longitude
+                )
+            except Exception as e:
+                return False
         
         # Need transport if distance > 0.3 km
         return distance > 0.3
@@ -133,11 +153,12 @@ class ItineraryEnhancer:
         except:
             return False
     
-    def _add_transport(self, from_item: Any, to_item: Any) -> Optional[ItineraryItem]:
+    def _add_transport(self, from_item: Any, to_item: Any,
+                       distance: Optional[float] = None) -> Optional[ItineraryItem]:
         """Add transport option between two items"""
         try:
             transport = self.transport_agent.suggest_transport(
-                from_item, to_item, self.budget_conscious
+                from_item, to_item, self.budget_conscious, distance
             )
             
             cost_inr = self.converter.convert(transport.cost, transport.currency, 'INR')
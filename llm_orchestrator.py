@@ -5,6 +5,7 @@ Uses direct tool calls (no parsing errors) + OR-Tools optimizer
 """
 
 import os
+import asyncio
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -21,8 +22,11 @@ from optimizer import ItineraryOptimizer
 from trend_analyzer import TrendAnalyzer
 from user_profile import create_sample_profile, UserProfile, TripDates
 from currency_converter import CurrencyConverter, convert_to_inr
+from geocoder import airport_code_for
+from warmup import warm_start
 # Add to imports at top of file
 from itinerary_enhancer import ItineraryEnhancer, display_enhanced_itinerary
+from async_http import run_async
 
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -63,15 +67,11 @@ class TravelItineraryOrchestrator:
         print(f"   💱 Currency converter ready ({len(self.currency_converter.rates)} currencies)")
         print(f"   🚕 Ground transport agent ready")
         
-        # Airport code mapping
-        self.airport_codes = {
-            'bangalore': 'BLR', 'mumbai': 'BOM', 'delhi': 'DEL',
-            'tokyo': 'NRT', 'paris': 'CDG', 'london': 'LHR',
-            'singapore': 'SIN', 'dubai': 'DXB', 'new york': 'JFK',
-            'rome': 'FCO', 'barcelona': 'BCN', 'amsterdam': 'AMS',
-            'blr': 'BLR', 'bom': 'BOM', 'del': 'DEL',
-            'nrt': 'NRT', 'cdg': 'CDG', 'lhr': 'LHR'
-        }
+        # Destination bundles (geocodes, POIs, transport rates) from the warm-up job
+        warm_start()
+        
+        # Await all upstream searches at once on the shared event loop
+        self.use_async = os.getenv("ORCHESTRATOR_ASYNC", "false").lower() in ("1", "true", "yes")
         
         self.conversation_history = []
         print("✅ Orchestrator ready!")
@@ -103,8 +103,7 @@ class TravelItineraryOrchestrator:
         """Get airport code from city name"""
         if not city:
             return None
-        city_lower = city.lower().strip()
-        return self.airport_codes.get(city_lower, city.upper()[:3])
+        return airport_code_for(city, city.upper()[:3])
     
     def extract_trip_details(self, query: str) -> dict:
         """Extract trip details from natural language query"""
@@ -169,6 +168,60 @@ Examples:
             print(f"   ⚠️ Extraction error: {e}")
             return {}
     
+    async def fetch_upstreams_async(self, origin: str, destination: str,
+                                    origin_code: str, dest_code: str,
+                                    departure_date: str, return_date: str,
+                                    interests: list, dietary: list,
+                                    include_ground_transport: bool = True) -> dict:
+        """
+        Await every upstream search concurrently with the agents' async APIs
+        
+        Returns a dict keyed by stage ('trends', 'flights', 'ground_transport',
+        'hotels', 'restaurants', 'activities'); a stage that raised maps to [].
+        """
+        stages = {
+            'trends': self.trend_analyzer.get_seasonal_suggestions_async(destination, departure_date),
+            'flights': self.flight_agent.search_flights_async(
+                origin=origin_code,
+                destination=dest_code,
+                departure_date=departure_date,
+                max_results=10
+            ),
+            'hotels': self.hotel_agent.search_accommodations_async(
+                destination=destination,
+                check_in=departure_date,
+                check_out=return_date,
+                max_results=10
+            ),
+            'restaurants': self.restaurant_agent.search_restaurants_async(
+                location=destination,
+                dietary_restrictions=dietary if dietary else None,
+                max_results=20
+            ),
+            'activities': self.activity_agent.search_activities_async(
+                location=destination,
+                interests=interests if interests else None,
+                max_results=25
+            ),
+        }
+        if include_ground_transport:
+            stages['ground_transport'] = self.ground_transport_agent.search_transport_async(
+                origin=origin,
+                destination=destination,
+                transport_types=['taxi', 'train', 'bus'],
+                max_results=6
+            )
+        
+        results = await asyncio.gather(*stages.values(), return_exceptions=True)
+        
+        upstreams = {}
+        for name, result in zip(stages.keys(), results):
+            if isinstance(result, Exception):
+                print(f"   ⚠️ {name} search failed: {str(result)[:50]}")
+                result = []
+            upstreams[name] = result or []
+        return upstreams
+
     def generate_itinerary(self, trip_details: dict = None, user_profile: UserProfile = None):
         """Generate complete optimized day-by-day itinerary"""
         
@@ -225,13 +278,28 @@ Examples:
         dep_date = datetime.strptime(departure_date, '%Y-%m-%d')
         return_date = (dep_date + timedelta(days=num_days)).strftime('%Y-%m-%d')
         
+        # Calculate distance to determine if ground transport is viable
+        distance_km = self.ground_transport_agent.calculate_distance(origin, destination)
+        
+        upstreams = {}
+        if self.use_async:
+            print("\n⚡ Fetching all upstream data concurrently...")
+            upstreams = run_async(self.fetch_upstreams_async(
+                origin, destination, origin_code, dest_code,
+                departure_date, return_date, interests, dietary,
+                include_ground_transport=distance_km <= 1000
+            ))
+        
         # [1/6] Analyze trends
         print(f"\n{'='*80}")
         print("[1/6] 🔍 ANALYZING SEASONAL TRENDS")
         print("="*80)
         
         try:
-            trends = self.trend_analyzer.get_seasonal_suggestions(destination, departure_date)
+            if 'trends' in upstreams:
+                trends = upstreams['trends']
+            else:
+                trends = self.trend_analyzer.get_seasonal_suggestions(destination, departure_date)
             if trends:
                 print(f"✅ Found {len(trends)} seasonal attractions")
                 for trend in trends[:3]:
@@ -249,17 +317,17 @@ Examples:
         print(f"   Route: {origin_code} → {dest_code}")
         print(f"   Outbound: {departure_date}")
         
-        # Calculate distance to determine if ground transport is viable
-        distance_km = self.ground_transport_agent.calculate_distance(origin, destination)
-        
         # Search for flights
         print(f"\n   ✈️ Searching flights...")
-        flights = self.flight_agent.search_flights(
-            origin=origin_code,
-            destination=dest_code,
-            departure_date=departure_date,
-            max_results=10
-        )
+        if 'flights' in upstreams:
+            flights = upstreams['flights']
+        else:
+            flights = self.flight_agent.search_flights(
+                origin=origin_code,
+                destination=dest_code,
+                departure_date=departure_date,
+                max_results=10
+            )
         
         if flights:
             print(f"   ✅ Found {len(flights)} flights")
@@ -275,12 +343,15 @@ Examples:
         ground_transport_options = []
         if distance_km <= 1000:  # Only search ground transport for <= 1000km
             print(f"\n   🚕 Searching ground transport (distance: {distance_km:.0f}km)...")
-            ground_transport_options = self.ground_transport_agent.search_transport(
-                origin=origin,
-                destination=destination,
-                transport_types=['taxi', 'train', 'bus'],
-                max_results=6
-            )
+            if 'ground_transport' in upstreams:
+                ground_transport_options = upstreams['ground_transport']
+            else:
+                ground_transport_options = self.ground_transport_agent.search_transport(
+                    origin=origin,
+                    destination=destination,
+                    transport_types=['taxi', 'train', 'bus'],
+                    max_results=6
+                )
             
             if ground_transport_options:
                 print(f"   ✅ Found {len(ground_transport_options)} ground transport options")
@@ -377,12 +448,15 @@ Examples:
         print(f"   Location: {destination}")
         print(f"   Check-in: {departure_date}, Check-out: {return_date}")
         
-        hotels = self.hotel_agent.search_accommodations(
-            destination=destination,
-            check_in=departure_date,
-            check_out=return_date,
-            max_results=10
-        )
+        if 'hotels' in upstreams:
+            hotels = upstreams['hotels']
+        else:
+            hotels = self.hotel_agent.search_accommodations(
+                destination=destination,
+                check_in=departure_date,
+                check_out=return_date,
+                max_results=10
+            )
         
         if hotels:
             print(f"✅ Found {len(hotels)} accommodations")
@@ -402,11 +476,14 @@ Examples:
         if dietary:
             print(f"   Dietary: {', '.join(dietary)}")
         
-        restaurants = self.restaurant_agent.search_restaurants(
-            location=destination,
-            dietary_restrictions=dietary if dietary else None,
-            max_results=20
-        )
+        if 'restaurants' in upstreams:
+            restaurants = upstreams['restaurants']
+        else:
+            restaurants = self.restaurant_agent.search_restaurants(
+                location=destination,
+                dietary_restrictions=dietary if dietary else None,
+                max_results=20
+            )
         
         if restaurants:
             print(f"✅ Found {len(restaurants)} restaurants")
@@ -424,11 +501,14 @@ Examples:
         print(f"   Location: {destination}")
         print(f"   Interests: {', '.join(interests)}")
         
-        activities = self.activity_agent.search_activities(
-            location=destination,
-            interests=interests if interests else None,
-            max_results=25
-        )
+        if 'activities' in upstreams:
+            activities = upstreams['activities']
+        else:
+            activities = self.activity_agent.search_activities(
+                location=destination,
+                interests=interests if interests else None,
+                max_results=25
+            )
         
         if activities:
             print(f"✅ Found {len(activities)} activities")
@@ -673,84 +753,6 @@ Examples:
         print("🔄 ADDING RETURN JOURNEY")
         print("="*80)
         
-        # City to airport code mapping
-        CITY_TO_AIRPORT = {
-            # Major Indian Cities
-            'bangalore': 'BLR',
-            'bengaluru': 'BLR',
-            'mumbai': 'BOM',
-            'delhi': 'DEL',
-            'new delhi': 'DEL',
-            'kolkata': 'CCU',
-            'chennai': 'MAA',
-            'hyderabad': 'HYD',
-            'pune': 'PNQ',
-            'ahmedabad': 'AMD',
-            'jaipur': 'JAI',
-            'kochi': 'COK',
-            'cochin': 'COK',
-            'goa': 'GOI',
-            'thiruvananthapuram': 'TRV',
-            'trivandrum': 'TRV',
-            'lucknow': 'LKO',
-            'chandigarh': 'IXC',
-            'coimbatore': 'CJB',
-            'mangalore': 'IXE',
-            'mangaluru': 'IXE',
-            'visakhapatnam': 'VTZ',
-            'vizag': 'VTZ',
-            'indore': 'IDR',
-            'bhubaneswar': 'BBI',
-            'nagpur': 'NAG',
-            'vadodara': 'BDQ',
-            'raipur': 'RPR',
-            'surat': 'STV',
-            'amritsar': 'ATQ',
-            'varanasi': 'VNS',
-            'patna': 'PAT',
-            'ranchi': 'IXR',
-            'guwahati': 'GAU',
-            'imphal': 'IMF',
-            'agartala': 'IXA',
-            
-            # International Cities
-            'paris': 'CDG',
-            'london': 'LHR',
-            'new york': 'JFK',
-            'dubai': 'DXB',
-            'singapore': 'SIN',
-            'bangkok': 'BKK',
-            'kuala lumpur': 'KUL',
-            'hong kong': 'HKG',
-            'tokyo': 'NRT',
-            'sydney': 'SYD',
-            'melbourne': 'MEL',
-            'los angeles': 'LAX',
-            'san francisco': 'SFO',
-            'toronto': 'YYZ',
-            'vancouver': 'YVR',
-            'amsterdam': 'AMS',
-            'frankfurt': 'FRA',
-            'zurich': 'ZRH',
-            'rome': 'FCO',
-            'barcelona': 'BCN',
-            'madrid': 'MAD',
-            'istanbul': 'IST',
-            'doha': 'DOH',
-            'abu dhabi': 'AUH',
-            'muscat': 'MCT',
-            'colombo': 'CMB',
-            'kathmandu': 'KTM',
-            'dhaka': 'DAC',
-            'male': 'MLE',
-            'phuket': 'HKT',
-            'denpasar': 'DPS',
-            'bali': 'DPS',
-            'beijing': 'PEK',
-            'shanghai': 'PVG',
-            'seoul': 'ICN',
-            'osaka': 'KIX',
-        }
         
         # DEBUG: Show what trip_details contains
         print(f"   🔍 trip_details keys: {list(trip_details.keys())}")
@@ -775,20 +777,18 @@ Examples:
         
         # If no airport codes, convert from city names
         if not origin_code and origin:
-            origin_lower = origin.lower().strip()
-            origin_code = CITY_TO_AIRPORT.get(origin_lower)
+            origin_code = airport_code_for(origin)
             if origin_code:
                 print(f"   ✓ Mapped '{origin}' → {origin_code}")
             else:
-                print(f"   ⚠️ Unknown city: '{origin}' (add to mapping)")
+                print(f"   ⚠️ Unknown city: '{origin}' (no airport found)")
         
         if not destination_code and destination:
-            destination_lower = destination.lower().strip()
-            destination_code = CITY_TO_AIRPORT.get(destination_lower)
+            destination_code = airport_code_for(destination)
             if destination_code:
                 print(f"   ✓ Mapped '{destination}' → {destination_code}")
             else:
-                print(f"   ⚠️ Unknown city: '{destination}' (add to mapping)")
+                print(f"   ⚠️ Unknown city: '{destination}' (no airport found)")
         
         # Show what we extracted
         print(f"   📍 Origin: {origin} ({origin_code or 'Unknown'})")
@@ -805,9 +805,9 @@ Examples:
             print(f"      Destination code: {destination_code}")
             
             if not origin_code and origin:
-                print(f"\n   💡 Please add '{origin.lower()}' to the CITY_TO_AIRPORT mapping")
+                print(f"\n   💡 Please add '{origin.lower()}' to the gazetteer (python gazetteer.py build)")
             if not destination_code and destination:
-                print(f"   💡 Please add '{destination.lower()}' to the CITY_TO_AIRPORT mapping")
+                print(f"   💡 Please add '{destination.lower()}' to the gazetteer (python gazetteer.py build)")
             
             print(f"\n   ⚠️ Cannot add return journey without airport codes")
             return itinerary
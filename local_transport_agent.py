@@ -1,13 +1,27 @@
 """
 Local Transport Agent Module
 Calculates distances and suggests transport modes between locations
+
+transport_matrices() returns distance, duration and cost between every pair
+of a set of points for every mode in TRANSPORT_MODES in one NumPy pass, and
+keeps recent results in an LRU keyed by the point set
+(LOCAL_TRANSPORT_MATRIX_CACHE_SIZE entries, default 64). Distances of point
+sets covered by a registered precomputed matrix (warm-up bundles) are sliced
+from it instead of recomputed.
 """
 
-import math
-from typing import List, Dict, Optional, Tuple
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import random
 
+import numpy as np
+
+from spatial_index import haversine_km, haversine_matrix
+
 
 @dataclass
 class TransportOption:
@@ -28,6 +42,131 @@ class TransportOption:
         return self.__dict__
 
 
+@dataclass
+class TransportMatrices:
+    """Pairwise distance, duration and cost for every transport mode"""
+    modes: Tuple[str, ...]
+    distance_km: np.ndarray  # (points, points)
+    duration_minutes: np.ndarray  # (modes, points, points), int64, at least 5 between distinct points
+    cost: np.ndarray  # (modes, points, points), fare for each hop
+    viable: np.ndarray  # (modes, points, points), distance within the mode's max_distance
+
+    def mode_index(self, mode: str) -> int:
+        return self.modes.index(mode)
+
+    def best_mode(self, budget_conscious: bool = True) -> np.ndarray:
+        """
+        Index (into modes) of the mode _choose_best_mode picks for each pair
+        (bus for the 5-10 km budget band, where it picks metro or bus at random)
+        """
+        if budget_conscious:
+            bands = ['walk', 'walk', 'auto', 'bus', 'metro', 'taxi']
+        else:
+            bands = ['walk', 'auto', 'taxi', 'taxi', 'taxi', 'taxi']
+        band = np.searchsorted([0.5, 2.0, 5.0, 10.0, 25.0], self.distance_km, side='left')
+        return np.array([self.modes.index(mode) for mode in bands])[band]
+
+    def for_best_mode(self, values: np.ndarray, budget_conscious: bool = True) -> np.ndarray:
+        """(points, points) slice of a per-mode matrix (duration_minutes, cost) along best_mode"""
+        best = self.best_mode(budget_conscious)
+        rows, cols = np.indices(best.shape)
+        return values[best, rows, cols]
+
+
+class TransportMatrixCache:
+    """LRU cache of TransportMatrices keyed by the point set"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._matrices: "OrderedDict[str, TransportMatrices]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'computed': 0, 'evictions': 0, 'precomputed_hits': 0}
+
+        # Registered precomputed distance matrices (e.g. warm-up bundles): point → (set, row)
+        self._point_sets: Dict[Tuple[float, float], List[Tuple[int, int]]] = {}
+        self._loaders: List[Callable[[], np.ndarray]] = []
+        self._loaded: Dict[int, np.ndarray] = {}
+
+    @staticmethod
+    def key_for(latitudes: np.ndarray, longitudes: np.ndarray) -> str:
+        """Digest of the coordinates (rounded to ~1 cm), in order"""
+        coordinates = np.round(np.stack([latitudes, longitudes]), 7)
+        return hashlib.blake2b(coordinates.tobytes(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _point(lat: float, lon: float) -> Tuple[float, float]:
+        return (round(float(lat), 7), round(float(lon), 7))
+
+    def register(self, latitudes, longitudes, load_distance: Callable[[], np.ndarray]):
+        """
+        Register a precomputed distance matrix over a point set; load_distance
+        is called on first use. Any request whose points all belong to the
+        set is then answered by slicing it.
+        """
+        with self._lock:
+            set_id = len(self._loaders)
+            self._loaders.append(load_distance)
+            for row, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+                self._point_sets.setdefault(self._point(lat, lon), []).append((set_id, row))
+
+    def precomputed_distance(self, latitudes: np.ndarray, longitudes: np.ndarray) -> Optional[np.ndarray]:
+        """Distance matrix sliced from a registered set holding every point, or None"""
+        points = [self._point(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+        if not points:
+            return None
+        with self._lock:
+            for set_id, _ in self._point_sets.get(points[0], ()):
+                rows = []
+                for point in points:
+                    row = next((r for s, r in self._point_sets.get(point, ()) if s == set_id), None)
+                    if row is None:
+                        break
+                    rows.append(row)
+                else:
+                    if set_id not in self._loaded:
+                        self._loaded[set_id] = self._loaders[set_id]()
+                    self.stats['precomputed_hits'] += 1
+                    return self._loaded[set_id][np.ix_(rows, rows)]
+        return None
+
+    def get(self, key: str) -> Optional[TransportMatrices]:
+        with self._lock:
+            matrices = self._matrices.get(key)
+            if matrices is not None:
+                self._matrices.move_to_end(key)
+                self.stats['hits'] += 1
+            return matrices
+
+    def put(self, key: str, matrices: TransportMatrices):
+        with self._lock:
+            self._matrices[key] = matrices
+            self.stats['computed'] += 1
+            while len(self._matrices) > self.max_entries:
+                self._matrices.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._matrices.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, 'entries': len(self._matrices)}
+
+
+_matrix_cache = None
+_matrix_cache_lock = threading.Lock()
+
+
+def get_matrix_cache() -> TransportMatrixCache:
+    """Get global transport matrix cache instance"""
+    global _matrix_cache
+    with _matrix_cache_lock:
+        if _matrix_cache is None:
+            _matrix_cache = TransportMatrixCache(int(os.getenv('LOCAL_TRANSPORT_MATRIX_CACHE_SIZE', '64')))
+    return _matrix_cache
+
+
 class LocalTransportAgent:
     """Calculate distances and suggest local transport modes"""
     
@@ -84,27 +223,11 @@ class LocalTransportAgent:
         Calculate distance between two coordinates using Haversine formula
         Returns distance in kilometers
         """
-        # Radius of Earth in kilometers
-        R = 6371.0
-        
-        # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # Haversine formula
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        distance = R * c
-        return round(distance, 2)
+        return round(float(haversine_km(lat1, lon1, lat2, lon2)), 2)
     
     def suggest_transport(self, from_item: any, to_item: any,
-                         budget_conscious: bool = True) -> TransportOption:
+                         budget_conscious: bool = True,
+                         distance: Optional[float] = None) -> TransportOption:
         """
         Suggest best transport mode between two locations
         
@@ -112,12 +235,16 @@ class LocalTransportAgent:
             from_item: Item with latitude, longitude, name
             to_item: Item with latitude, longitude, name
             budget_conscious: If True, prefer cheaper options
+            distance: Precomputed distance in km (e.g. from transport_matrices)
         """
         # Calculate distance
-        distance = self.calculate_distance(
-            from_item.latitude, from_item.longitude,
-            to_item.latitude, to_item.longitude
-        )
+        if distance is None:
+            distance = self.calculate_distance(
+                from_item.latitude, from_item.longitude,
+                to_item.latitude, to_item.longitude
+            )
+        else:
+            distance = round(float(distance), 2)
         
         # Get from/to names
         from_name = getattr(from_item, 'name', 'Location')
@@ -192,6 +319,60 @@ class LocalTransportAgent:
         # Very long distance
         return 'taxi'
     
+    def transport_matrices(self, latitudes, longitudes, use_cache: bool = True) -> TransportMatrices:
+        """
+        Distance, duration and cost between every pair of points for every
+        mode in TRANSPORT_MODES
+
+        Durations use the mode's average speed (rounded up, 5 minute minimum
+        as in suggest_transport) and costs its base fare plus per-km rate,
+        without suggest_transport's random variation. Results are cached by
+        the point set unless use_cache is False.
+        """
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        cache = get_matrix_cache() if use_cache else None
+        key = TransportMatrixCache.key_for(latitudes, longitudes) if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        distance = cache.precomputed_distance(latitudes, longitudes) if cache else None
+        if distance is None:
+            distance = haversine_matrix(latitudes, longitudes)
+        modes = tuple(self.TRANSPORT_MODES)
+        info = [self.TRANSPORT_MODES[mode] for mode in modes]
+        speed = np.array([mode['speed_kmph'] for mode in info], dtype=float)[:, None, None]
+        per_km = np.array([mode['cost_per_km'] for mode in info], dtype=float)[:, None, None]
+        base = np.array([mode.get('base_fare', 0) for mode in info], dtype=float)[:, None, None]
+        reach = np.array([mode['max_distance'] for mode in info], dtype=float)[:, None, None]
+
+        moving = distance > 0
+        minutes = np.where(moving, np.maximum(distance / speed * 60, 5), 0)
+        matrices = TransportMatrices(
+            modes=modes,
+            distance_km=distance,
+            duration_minutes=np.ceil(minutes).astype(np.int64),
+            cost=np.where(moving, base + distance * per_km, 0.0),
+            viable=distance <= reach,
+        )
+        if cache:
+            # Shared between callers, so read-only
+            for array in (matrices.distance_km, matrices.duration_minutes, matrices.cost, matrices.viable):
+                array.flags.writeable = False
+            cache.put(key, matrices)
+        return matrices
+
+    def travel_time_matrix(self, latitudes, longitudes,
+                           budget_conscious: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distance (km) and travel time (minutes) between every pair of points,
+        using the mode _choose_best_mode would pick for each distance
+        """
+        matrices = self.transport_matrices(latitudes, longitudes)
+        return matrices.distance_km, matrices.for_best_mode(matrices.duration_minutes, budget_conscious)
+
     def get_all_transport_modes(self, distance: float) -> List[TransportOption]:
         """Get all viable transport options for a given distance"""
         options = []
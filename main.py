@@ -10,8 +10,10 @@ Modes:
 
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -25,8 +27,12 @@ from accommodation_agent import AccommodationAgent
 from restaurant_agent import RestaurantAgent
 from activity_agent import ActivityAgent
 from optimizer import ItineraryOptimizer
+from heuristic_planner import HeuristicPlanner
 from history_manager import HistoryManager
 from trend_analyzer import TrendAnalyzer
+from geocoder import airport_code_for, get_geocoder
+from poi_fetcher import POIBundle, get_poi_fetcher
+from warmup import warm_start
 
 
 class TravelItineraryGenerator:
@@ -39,6 +45,18 @@ class TravelItineraryGenerator:
         print("="*70)
 
         self.mode = os.getenv("ITINERARY_MODE", "traditional").lower()
+
+        # Concurrent search stages (set ITINERARY_CONCURRENT=false for sequential runs)
+        self.concurrent = os.getenv("ITINERARY_CONCURRENT", "true").lower() in ("1", "true", "yes")
+        self.max_workers = int(os.getenv("ITINERARY_MAX_WORKERS", "6"))
+        self.stage_timeout = float(os.getenv("ITINERARY_STAGE_TIMEOUT", "60"))
+
+        # Planner: exact (CP-SAT), heuristic (greedy only) or hybrid (greedy + time-boxed CP-SAT)
+        self.planner_mode = os.getenv("PLANNER_MODE", "exact").lower()
+        self.refine_time_limit = float(os.getenv("PLANNER_REFINE_TIME_LIMIT", "1.0"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                           thread_name_prefix="agent-stage")
+
         self._init_traditional()
 
     def _init_traditional(self):
@@ -51,6 +69,7 @@ class TravelItineraryGenerator:
         self.activity_agent = ActivityAgent(use_mock=True)
         self.history_manager = HistoryManager(use_mongodb=False)
         self.trend_analyzer = TrendAnalyzer()
+        warm_start()
 
         print("  ✅ All agents initialized!")
 
@@ -106,7 +125,168 @@ class TravelItineraryGenerator:
         print(f"  💰 Budget: {user_profile.default_currency} {user_profile.travel_preferences.budget_total:,.2f}")
         print(f"  🎨 Interests: {', '.join(user_profile.travel_preferences.activity_interests[:3])}")
 
-        # Step 1: Trends
+        # Steps 1-5: agent searches (independent of each other)
+        stage_results, stage_timings = self._run_search_stages(user_profile, destination,
+                                                               start_date, end_date)
+        seasonal_suggestions, popular_events = stage_results['trends']
+        flights = stage_results['flights']
+        accommodations = stage_results['accommodations']
+        restaurants = stage_results['restaurants']
+        activities = stage_results['activities']
+
+        # Step 6: Optimize
+        print("\n[6/6] 🎯 Optimizing your itinerary...")
+        print("       (This may take a few seconds...)")
+        
+        candidates = dict(flights=flights, accommodations=accommodations,
+                          restaurants=restaurants, activities=activities, num_days=num_days)
+        if self.planner_mode == "heuristic":
+            optimized_itinerary = HeuristicPlanner(user_profile).plan(**candidates)
+        elif self.planner_mode == "hybrid":
+            optimized_itinerary = HeuristicPlanner(user_profile).plan_and_refine(
+                time_limit_seconds=self.refine_time_limit, **candidates)
+        else:
+            optimizer = ItineraryOptimizer(user_profile)
+            optimized_itinerary = optimizer.optimize_itinerary(**candidates)
+
+        if 'error' not in optimized_itinerary:
+            print("  ✅ Optimization complete!")
+            print(f"  💰 Total Cost: {optimized_itinerary['currency']} {optimized_itinerary['total_cost']:,.2f}")
+            print(f"  🎯 Activities: {optimized_itinerary['num_activities']}")
+            print(f"  💵 Budget Remaining: {optimized_itinerary['currency']} {optimized_itinerary.get('budget_remaining', 0):,.2f}")
+        else:
+            print(f"  ❌ Optimization failed: {optimized_itinerary['error']}")
+
+        # Add metadata
+        optimized_itinerary['seasonal_suggestions'] = seasonal_suggestions
+        optimized_itinerary['popular_events'] = popular_events
+        optimized_itinerary['user_profile'] = user_profile.to_dict()
+        optimized_itinerary['stage_timings'] = stage_timings
+
+        # Store in history if consent given
+        if user_profile.consent.get('store_history'):
+            print("\n💾 Saving trip to your history...")
+            self.history_manager.store_user_profile(user_profile)
+
+        return optimized_itinerary
+
+    def _run_search_stages(self, user_profile: UserProfile, destination: str,
+                           start_date: str, end_date: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Run the trend, flight, hotel, restaurant and activity searches.
+
+        The 'pois' stage runs the combined Overpass query once; the hotel,
+        restaurant and activity stages share its result instead of each
+        querying Overpass.
+
+        In concurrent mode the stages share a bounded worker pool and are joined
+        before optimization; a stage that exceeds its timeout (or raises) falls
+        back to an empty result so the plan can still be optimized. Each stage
+        gets ITINERARY_STAGE_TIMEOUT from the moment a worker picks it up (a
+        stage still queued after that long is cancelled). A stage that is
+        already running can't be interrupted: it keeps running in the
+        background, holding its worker and HTTP connection, and its result is
+        discarded.
+
+        Returns:
+            (results by stage name, timings by stage name)
+        """
+        stages = [
+            ('pois', lambda: self._fetch_pois(destination), None),
+            ('trends', lambda: self._search_trends(destination, start_date), ([], [])),
+            ('flights', lambda: self._search_flights(user_profile, destination, start_date), []),
+            ('accommodations', lambda: self._search_accommodations(user_profile, destination,
+                                                                   start_date, end_date), []),
+            ('restaurants', lambda: self._search_restaurants(user_profile, destination), []),
+            ('activities', lambda: self._search_activities(user_profile, destination), []),
+        ]
+
+        results = {}
+        timings = {}
+        wall_start = time.perf_counter()
+
+        if not self.concurrent:
+            for name, func, fallback in stages:
+                started = time.perf_counter()
+                try:
+                    results[name] = func()
+                    status = 'ok'
+                except Exception as e:
+                    print(f"  ❌ Stage '{name}' failed: {e}")
+                    results[name] = fallback
+                    status = 'error'
+                timings[name] = {'seconds': round(time.perf_counter() - started, 3), 'status': status}
+            timings['total_wall'] = {'seconds': round(time.perf_counter() - wall_start, 3), 'status': 'ok'}
+            return results, timings
+
+        print(f"\n⚡ Running {len(stages)} search stages concurrently "
+              f"({self.max_workers} workers, {self.stage_timeout:.0f}s timeout per stage)...")
+
+        futures = {}
+        began: Dict[str, float] = {}  # Stage name -> when a worker picked it up
+        for name, func, fallback in stages:
+            futures[name] = self.executor.submit(self._timed_stage, func, began, name)
+
+        for name, func, fallback in stages:
+            future = futures[name]
+            timed_out = False
+            while True:
+                started = began.get(name)
+                remaining = (started or wall_start) + self.stage_timeout - time.perf_counter()
+                try:
+                    result, elapsed, error = future.result(timeout=max(remaining, 0))
+                    break
+                except FuturesTimeoutError:
+                    if started is None and name in began:
+                        continue  # Left the queue while we waited; its own clock applies now
+                    timed_out = True
+                    break
+
+            if timed_out:
+                if future.cancel():
+                    print(f"  ⏱️ Stage '{name}' still queued after {self.stage_timeout:.0f}s, using fallback")
+                else:
+                    print(f"  ⏱️ Stage '{name}' timed out after {self.stage_timeout:.0f}s, using fallback "
+                          f"(it keeps running in the background)")
+                results[name] = fallback
+                elapsed = time.perf_counter() - began.get(name, wall_start)
+                timings[name] = {'seconds': round(elapsed, 3), 'status': 'timeout'}
+                continue
+
+            if error is not None:
+                print(f"  ❌ Stage '{name}' failed: {error}")
+                results[name] = fallback
+                timings[name] = {'seconds': round(elapsed, 3), 'status': 'error'}
+            else:
+                results[name] = result
+                timings[name] = {'seconds': round(elapsed, 3), 'status': 'ok'}
+
+        timings['total_wall'] = {'seconds': round(time.perf_counter() - wall_start, 3), 'status': 'ok'}
+        print(f"  ✅ Search stages finished in {timings['total_wall']['seconds']:.2f}s")
+        return results, timings
+
+    @staticmethod
+    def _timed_stage(func, began: Dict[str, float], name: str) -> Tuple[Any, float, Optional[Exception]]:
+        """Run a stage and return (result, elapsed seconds, error); records its start in began"""
+        started = time.perf_counter()
+        began[name] = started
+        try:
+            result = func()
+        except Exception as e:
+            return None, time.perf_counter() - started, e
+        return result, time.perf_counter() - started, None
+
+    def _fetch_pois(self, destination: str) -> Optional[POIBundle]:
+        """Step 0: one combined Overpass query for hotels, restaurants and attractions"""
+        print("\n[0/6] 🗺️ Fetching points of interest with OpenStreetMap API...")
+        coords = get_geocoder().geocode(destination)
+        if not coords:
+            print("  ⚠️ Could not geocode destination, agents will use fallbacks")
+            return None
+        return get_poi_fetcher().fetch(*coords)
+
+    def _search_trends(self, destination: str, start_date: str) -> Tuple[List, List]:
+        """Step 1: seasonal trends and popular events"""
         print("\n[1/6] 🔍 Analyzing seasonal trends and attractions...")
         seasonal_suggestions = self.trend_analyzer.get_seasonal_suggestions(destination, start_date)
         popular_events = self.trend_analyzer.get_popular_events(destination, start_date)
@@ -116,7 +296,10 @@ class TravelItineraryGenerator:
         if popular_events:
             print(f"  ✅ Found {len(popular_events)} popular events")
 
-        # Step 2: Flights
+        return seasonal_suggestions, popular_events
+
+    def _search_flights(self, user_profile: UserProfile, destination: str, start_date: str) -> List[Any]:
+        """Step 2: flights"""
         print("\n[2/6] ✈️ Searching flights with Amadeus TEST API...")
         origin_code = "BOM"
         dest_code = self._get_airport_code(destination)
@@ -136,7 +319,11 @@ class TravelItineraryGenerator:
         else:
             print("  ⚠️ No flights found, using alternatives")
 
-        # Step 3: Accommodations
+        return flights
+
+    def _search_accommodations(self, user_profile: UserProfile, destination: str,
+                               start_date: str, end_date: str) -> List[Any]:
+        """Step 3: accommodations"""
         print("\n[3/6] 🏨 Searching accommodations with OpenStreetMap API...")
         accommodations = self.accommodation_agent.search_accommodations(
             destination=destination,
@@ -152,7 +339,10 @@ class TravelItineraryGenerator:
         else:
             print("  ⚠️ No accommodations found")
 
-        # Step 4: Restaurants
+        return accommodations
+
+    def _search_restaurants(self, user_profile: UserProfile, destination: str) -> List[Any]:
+        """Step 4: restaurants"""
         print("\n[4/6] 🍽️ Searching restaurants with OpenStreetMap API...")
         restaurants = self.restaurant_agent.search_restaurants(
             location=destination,
@@ -166,7 +356,10 @@ class TravelItineraryGenerator:
         else:
             print("  ⚠️ No restaurants found")
 
-        # Step 5: Activities
+        return restaurants
+
+    def _search_activities(self, user_profile: UserProfile, destination: str) -> List[Any]:
+        """Step 5: activities"""
         print("\n[5/6] 🎯 Searching activities matching your interests...")
         activities = self.activity_agent.search_activities(
             location=destination,
@@ -181,51 +374,11 @@ class TravelItineraryGenerator:
                 user_profile.travel_preferences.activity_interests
             )
 
-        # Step 6: Optimize
-        print("\n[6/6] 🎯 Optimizing your itinerary...")
-        print("       (This may take a few seconds...)")
-        
-        optimizer = ItineraryOptimizer(user_profile)
-        optimized_itinerary = optimizer.optimize_itinerary(
-            flights=flights,
-            accommodations=accommodations,
-            restaurants=restaurants,
-            activities=activities,
-            num_days=num_days
-        )
-
-        if 'error' not in optimized_itinerary:
-            print("  ✅ Optimization complete!")
-            print(f"  💰 Total Cost: {optimized_itinerary['currency']} {optimized_itinerary['total_cost']:,.2f}")
-            print(f"  🎯 Activities: {optimized_itinerary['num_activities']}")
-            print(f"  💵 Budget Remaining: {optimized_itinerary['currency']} {optimized_itinerary.get('budget_remaining', 0):,.2f}")
-        else:
-            print(f"  ❌ Optimization failed: {optimized_itinerary['error']}")
-
-        # Add metadata
-        optimized_itinerary['seasonal_suggestions'] = seasonal_suggestions
-        optimized_itinerary['popular_events'] = popular_events
-        optimized_itinerary['user_profile'] = user_profile.to_dict()
-
-        # Store in history if consent given
-        if user_profile.consent.get('store_history'):
-            print("\n💾 Saving trip to your history...")
-            self.history_manager.store_user_profile(user_profile)
-
-        return optimized_itinerary
+        return activities
 
     def _get_airport_code(self, destination: str) -> str:
-        """Get airport code"""
-        codes = {
-            'tokyo': 'NRT', 'delhi': 'DEL', 'mumbai': 'BOM',
-            'singapore': 'SIN', 'bangkok': 'BKK', 'dubai': 'DXB',
-            'london': 'LHR', 'paris': 'CDG', 'new york': 'JFK',
-            'rome': 'FCO', 'barcelona': 'BCN', 'amsterdam': 'AMS'
-        }
-        for city, code in codes.items():
-            if city in destination.lower():
-                return code
-        return 'DEL'
+        """Get airport code (gazetteer, else the airport nearest the geocoded destination)"""
+        return airport_code_for(destination, 'DEL')
 
     def display_itinerary(self, itinerary: Dict[str, Any]):
         """Display itinerary in a beautiful format"""
@@ -344,6 +497,14 @@ class TravelItineraryGenerator:
             print(f"  Solve Time: {stats['solve_time']:.4f} seconds")
             print(f"  Items Selected: {stats['total_items']}")
 
+        # Search stage timings
+        if itinerary.get('stage_timings'):
+            print("\n" + "="*70)
+            print("⏱️ SEARCH STAGE TIMINGS")
+            print("="*70)
+            for stage, timing in itinerary['stage_timings'].items():
+                print(f"  {stage:<16} {timing['seconds']:>7.2f}s  ({timing['status']})")
+
         print("\n" + "="*70)
         print("✅ Itinerary Generation Complete!")
         print("="*70)
@@ -2,12 +2,29 @@
 Itinerary Optimizer Module
 Uses OR-Tools CP-SAT solver for constraint-based optimization
 FIXED: Corrected CpSolverStatus enum access
+
+Each candidate (transport option, hotel, restaurant, activity) is prepared
+once; its decisions live in a NumPy tensor of BoolVars indexed by
+(candidate, day[, slot]). Uniqueness and per-day rules are sums over tensor
+axes, and ItineraryItems are only materialized for the selected entries.
 """
 
 from ortools.sat.python import cp_model
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace, asdict
+import contextlib
 import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from local_transport_agent import LocalTransportAgent
+from scoring import Criterion, ScoringEngine
+from spatial_index import CandidateIndex
 
 
 @dataclass
@@ -27,18 +44,270 @@ class ItineraryItem:
     mandatory: bool = False
 
 
+@dataclass
+class CandidatePool:
+    """
+    One ItineraryItem per candidate (its day/start_time are filled in on
+    extraction) plus the day and slot layout shared by every candidate
+    """
+    num_days: int
+    transport: List[ItineraryItem] = field(default_factory=list)
+    transport_ids: List[int] = field(default_factory=list)  # Index in the caller's transport list
+    accommodations: List[ItineraryItem] = field(default_factory=list)
+    restaurants: List[ItineraryItem] = field(default_factory=list)
+    activities: List[ItineraryItem] = field(default_factory=list)
+    # Travel minutes between every pair of locations() (see ItineraryOptimizer._travel_matrix)
+    travel_minutes: Optional[np.ndarray] = None
+
+    # Meals and activities are planned from day 1 (day 0 is arrival)
+    MEAL_SLOTS = (720, 1080)  # Lunch at 12:00, Dinner at 18:00
+    ACTIVITY_SLOTS = (540, 840)  # 09:00, 14:00
+
+    @property
+    def plan_days(self) -> List[int]:
+        return list(range(1, self.num_days))
+
+    def size(self) -> int:
+        return len(self.transport) + len(self.accommodations) + len(self.restaurants) + len(self.activities)
+
+    def locations(self) -> List[ItineraryItem]:
+        """Candidates with a location: hotels, then restaurants, then activities"""
+        return self.accommodations + self.restaurants + self.activities
+
+    def location_offset(self, kind: str) -> int:
+        """Index of a kind's first candidate in locations()"""
+        return {'accommodation': 0,
+                'restaurant': len(self.accommodations),
+                'activity': len(self.accommodations) + len(self.restaurants)}[kind]
+
+    def day_sequence(self) -> List[Tuple[str, int]]:
+        """(kind, slot) of a plan day's positions in time order; the hotel (slot -1) starts and ends the day"""
+        slots = sorted([(start, 'restaurant', s) for s, start in enumerate(self.MEAL_SLOTS)] +
+                       [(start, 'activity', s) for s, start in enumerate(self.ACTIVITY_SLOTS)])
+        return [('accommodation', -1)] + [(kind, s) for _, kind, s in slots] + [('accommodation', -1)]
+
+
+@dataclass
+class DecisionVars:
+    """
+    BoolVar tensors, one per candidate kind:
+      transport       (T,)
+      accommodation   (H, num_days)
+      restaurant      (R, len(plan_days), len(MEAL_SLOTS))
+      activity        (A, len(plan_days), len(ACTIVITY_SLOTS))
+    """
+    transport: np.ndarray
+    accommodation: np.ndarray
+    restaurant: np.ndarray
+    activity: np.ndarray
+
+    def count(self) -> int:
+        return self.transport.size + self.accommodation.size + self.restaurant.size + self.activity.size
+
+
+@dataclass
+class SolverConfig:
+    """
+    CP-SAT search settings
+
+    time_limit_seconds  wall-clock budget (None = unbounded); in deterministic
+                        mode it is applied as a deterministic-time budget instead
+    num_workers         parallel search workers (0 = one per core)
+    deterministic       reproducible runs: interleaved parallel search, fixed
+                        seed and deterministic time limit
+    relative_gap        stop once (bound - objective) / objective <= gap
+    random_seed         seed for the search
+    """
+    time_limit_seconds: Optional[float] = 30.0
+    num_workers: int = 0
+    deterministic: bool = False
+    relative_gap: float = 0.0
+    random_seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> 'SolverConfig':
+        """Defaults overridden by OPTIMIZER_* environment variables"""
+        time_limit = os.getenv('OPTIMIZER_TIME_LIMIT', '30')
+        return cls(
+            time_limit_seconds=float(time_limit) if float(time_limit) > 0 else None,
+            num_workers=int(os.getenv('OPTIMIZER_NUM_WORKERS', '0')),
+            deterministic=os.getenv('OPTIMIZER_DETERMINISTIC', 'false').lower() in ('1', 'true', 'yes'),
+            relative_gap=float(os.getenv('OPTIMIZER_RELATIVE_GAP', '0')),
+            random_seed=int(os.getenv('OPTIMIZER_RANDOM_SEED', '0'))
+        )
+
+    def apply(self, solver: cp_model.CpSolver):
+        """Write the settings into a solver's parameters"""
+        params = solver.parameters
+        params.num_workers = self.num_workers
+        params.random_seed = self.random_seed
+        params.relative_gap_limit = self.relative_gap
+        params.interleave_search = self.deterministic
+
+        # A wall-clock limit makes parallel runs irreproducible, so
+        # deterministic mode budgets deterministic time instead
+        budget = self.time_limit_seconds or math.inf
+        params.max_time_in_seconds = math.inf if self.deterministic else budget
+        params.max_deterministic_time = budget if self.deterministic else math.inf
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class ItinerarySolution:
+    """
+    Compact record of a solved itinerary: one (item_type, name, cost, day,
+    start_time) tuple per selected entry
+
+    Entries identify candidates by content rather than list position, so a
+    solution can be passed back as the hint for a re-plan even after the
+    candidate lists were re-fetched, re-ordered or extended.
+    """
+    selections: Tuple[Tuple[str, str, float, int, int], ...]
+    objective: float = 0.0
+
+    @classmethod
+    def from_items(cls, items: List[ItineraryItem], objective: float = 0.0) -> 'ItinerarySolution':
+        return cls(tuple(sorted((item.item_type, item.name, round(item.cost, 2), item.day, item.start_time)
+                                for item in items)), objective)
+
+    def for_day(self, day: int) -> List[Tuple[str, str, float, int, int]]:
+        return [entry for entry in self.selections if entry[3] == day]
+
+
+@dataclass
+class ModelTemplate:
+    """
+    Compiled structural part of an itinerary model: decision variables,
+    one-hotel-per-day, exactly-one-transport, uniqueness and overlap
+    constraints. It depends only on the pool shape (day count, candidate
+    counts, restaurant/activity durations), never on costs, budget or
+    weights, so every solve with the same shape clones it and adds only
+    those.
+    """
+    model: cp_model.CpModel
+    indices: Dict[str, np.ndarray]  # Proto index of every decision, per kind
+
+    @staticmethod
+    def key_for(pool: 'CandidatePool', overlap_mode: str) -> tuple:
+        return (
+            overlap_mode,
+            pool.num_days,
+            tuple(pool.transport_ids),
+            len(pool.accommodations),
+            tuple(item.duration for item in pool.restaurants),
+            tuple(item.duration for item in pool.activities),
+        )
+
+    def instantiate(self) -> Tuple[cp_model.CpModel, 'DecisionVars']:
+        """Fresh copy of the model plus its decision tensors"""
+        model = self.model.clone()
+
+        def tensor(indices: np.ndarray) -> np.ndarray:
+            result = np.empty(indices.shape, dtype=object)
+            for index in np.ndindex(*indices.shape):
+                result[index] = model.get_bool_var_from_proto_index(int(indices[index]))
+            return result
+
+        return model, DecisionVars(**{kind: tensor(indices) for kind, indices in self.indices.items()})
+
+
+class ModelTemplateCache:
+    """LRU cache of compiled ModelTemplates keyed by pool shape"""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._templates: "OrderedDict[tuple, ModelTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'compiled': 0, 'evictions': 0}
+
+    def get(self, key: tuple) -> Optional[ModelTemplate]:
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.stats['hits'] += 1
+            return template
+
+    def put(self, key: tuple, template: ModelTemplate):
+        with self._lock:
+            self._templates[key] = template
+            self.stats['compiled'] += 1
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, 'entries': len(self._templates)}
+
+
+_template_cache = None
+_template_cache_lock = threading.Lock()
+
+
+def get_template_cache() -> ModelTemplateCache:
+    """Get global model template cache instance"""
+    global _template_cache
+    with _template_cache_lock:
+        if _template_cache is None:
+            _template_cache = ModelTemplateCache(int(os.getenv('OPTIMIZER_TEMPLATE_CACHE_SIZE', '32')))
+    return _template_cache
+
+
+def _bool_tensor(model: cp_model.CpModel, shape: Tuple[int, ...], name) -> np.ndarray:
+    """Object array of BoolVars; name(index) gives each variable's name"""
+    tensor = np.empty(shape, dtype=object)
+    for index in np.ndindex(*shape):
+        tensor[index] = model.new_bool_var(name(index))
+    return tensor
+
+
+def _weighted_sum(tensor: np.ndarray, coefficients) -> cp_model.LinearExpr:
+    """sum(coefficients[c] * tensor[c, ...]) with one coefficient per candidate"""
+    coefficients = np.asarray(coefficients, dtype=np.int64).reshape((-1,) + (1,) * (tensor.ndim - 1))
+    coefficients = np.broadcast_to(coefficients, tensor.shape)
+    return cp_model.LinearExpr.weighted_sum(list(tensor.ravel()), [int(c) for c in coefficients.ravel()])
+
+
 class ItineraryOptimizer:
     """
     Unified Planner Agent with Budget-Aware Optimization
     Uses OR-Tools CP-SAT solver
     """
 
-    def __init__(self, user_profile):
-        """Initialize optimizer with user profile"""
+    # How same-day activity/restaurant overlaps are modelled:
+    #   interval - one optional interval per candidate + one AddNoOverlap per day (linear size)
+    #   pairwise - one x_i + x_j <= 1 clause per overlapping pair (quadratic size)
+    OVERLAP_MODES = ('interval', 'pairwise')
+
+
+    def __init__(self, user_profile, overlap_mode: Optional[str] = None,
+                 solver_config: Optional[SolverConfig] = None):
+        """
+        Initialize optimizer with user profile
+
+        solver_config defaults to SolverConfig.from_env(); optimize_itinerary
+        can override it per request.
+        """
         self.user_profile = user_profile
+        self.overlap_mode = (overlap_mode or os.getenv('OPTIMIZER_OVERLAP_MODE', 'interval')).lower()
+        if self.overlap_mode not in self.OVERLAP_MODES:
+            raise ValueError(f"overlap_mode must be one of {self.OVERLAP_MODES}, got {self.overlap_mode!r}")
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
+        self.solver_config = solver_config or SolverConfig.from_env()
         self.last_solve_status = None  # Store the solve status
+        self.build_times: Dict[str, float] = {}  # Seconds per build step of the last request
+        self.last_solve_log: List[str] = []  # CP-SAT search log of the last solve
+        # Write every solved model here as a text proto (debugging/benchmarking)
+        self.dump_dir = os.getenv('OPTIMIZER_DUMP_MODEL_DIR') or None
+        self.last_model_dump: Optional[str] = None
 
         # Weights for objective function (user-adjustable)
         self.weight_cost = 0.3
@@ -46,51 +315,80 @@ class ItineraryOptimizer:
         self.weight_preference = 0.3
         self.weight_popularity = 0.2
 
+        # Travel between consecutive stops of a day: capped at max_daily_travel_minutes,
+        # and every minute of a hop beyond long_hop_minutes costs weight_long_hop points.
+        # Off by default: the hop variables can double solve time on spread-out pools
+        self.travel_aware = os.getenv('OPTIMIZER_TRAVEL_AWARE', 'false').lower() in ('1', 'true', 'yes')
+        self.long_hop_minutes = int(os.getenv('OPTIMIZER_LONG_HOP_MINUTES', '30'))
+        self.weight_long_hop = int(os.getenv('OPTIMIZER_LONG_HOP_PENALTY', '10'))
+
+        # Drop restaurants/activities farther than this from every hotel candidate (0 = keep all)
+        self.prune_radius_km = float(os.getenv('OPTIMIZER_PRUNE_RADIUS_KM', '0'))
+
     def optimize_itinerary(self,
                           flights: List[Any],
                           accommodations: List[Any],
                           restaurants: List[Any],
                           activities: List[Any],
-                          num_days: int) -> Dict[str, Any]:
+                          num_days: int,
+                          solver_config: Optional[SolverConfig] = None,
+                          hint: Optional[ItinerarySolution] = None,
+                          fix_days: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         Main optimization function
 
+        Args:
+            solver_config: Search settings for this request only (defaults to
+                the optimizer's solver_config)
+            hint: Previous result['solution']; used as the CP-SAT starting point
+            fix_days: Days of the hint to keep exactly as they were (day 0
+                also keeps the hinted transport); only the other days are
+                re-optimized
+
         Returns:
             Optimized itinerary with day-by-day breakdown
         """
         print("Starting itinerary optimization...")
+        self.build_times = {}
 
-        # Prepare items
-        all_items = self._prepare_items(flights, accommodations, restaurants, 
+        # Prepare candidates
+        with self._timed('prepare_items'):
+            pool = self._prepare_items(flights, accommodations, restaurants,
                                        activities, num_days)
 
-        if not all_items:
+        if not pool.size():
             return {"error": "No items to optimize"}
 
-        print(f"Prepared {len(all_items)} items for optimization")
-
-        # Create decision variables using item_id as key
-        item_vars = {}
-        items_by_id = {}  # Map item_id to item object
+        # Structural model (variables, overlap and logical constraints),
+        # compiled once per pool shape; every solve works on a fresh copy
+        template = self._model_template(pool)
+        with self._timed('instantiate_template'):
+            self.model, dvars = template.instantiate()
+        print(f"Prepared {pool.size()} candidates ({dvars.count()} decisions) for optimization")
 
-        for item in all_items:
-            var_name = f"{item.item_type}_{item.item_id}"
-            item_vars[item.item_id] = self.model.NewBoolVar(var_name)
-            items_by_id[item.item_id] = item
-
-        # Add constraints
-        self._add_budget_constraint(all_items, item_vars)
-        self._add_time_constraints(all_items, item_vars, num_days)
-        self._add_activity_limit_constraint(all_items, item_vars, num_days)
-        self._add_mandatory_constraints(all_items, item_vars)
-        self._add_logical_constraints(all_items, item_vars, num_days)
+        # Add request-specific constraints
+        with self._timed('add_budget_constraint'):
+            self._add_budget_constraint(pool, dvars)
+        with self._timed('add_activity_limit_constraint'):
+            self._add_activity_limit_constraint(pool, dvars)
+        with self._timed('add_mandatory_constraints'):
+            self._add_mandatory_constraints(pool, dvars)
+        with self._timed('add_travel_constraints'):
+            travel_penalty = self._add_travel_constraints(pool, dvars)
 
         # Define objective function
-        self._set_objective(all_items, item_vars)
+        with self._timed('set_objective'):
+            self._set_objective(pool, dvars, travel_penalty)
+
+        # Warm start from a previous plan
+        if hint is not None:
+            with self._timed('apply_hint'):
+                self._apply_hint(pool, dvars, hint, fix_days or [])
 
         # Solve
+        config = solver_config or self.solver_config
         print("Solving optimization problem...")
-        self.last_solve_status = self.solver.Solve(self.model)
+        self._solve(config)
 
         # FIXED: Use integer comparison and get status name safely
         status_name = self._get_status_name(self.last_solve_status)
@@ -98,11 +396,80 @@ class ItineraryOptimizer:
         # Check if solution is optimal (4) or feasible (2)
         if self.last_solve_status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
             print(f"Solution found! Status: {status_name}")
-            return self._extract_solution(all_items, item_vars, items_by_id, num_days)
+            return self._extract_solution(pool, dvars, config)
         else:
             print(f"No solution found. Status: {status_name}")
+            if fix_days:
+                return {"error": "No feasible solution found with the fixed days", "status": status_name}
             return {"error": "No feasible solution found", "status": status_name}
 
+    @contextlib.contextmanager
+    def _timed(self, step: str):
+        """Add the time spent in the block to build_times[step]"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.build_times[step] = self.build_times.get(step, 0.0) + time.perf_counter() - started
+
+    def _solve(self, config: SolverConfig):
+        """Solve self.model with config, keeping the search log and dumping the model if asked"""
+        config.apply(self.solver)
+        self.last_solve_log = []
+        self.solver.parameters.log_search_progress = True
+        self.solver.parameters.log_to_stdout = False
+        self.solver.log_callback = self.last_solve_log.append
+
+        if self.dump_dir:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            self.last_model_dump = os.path.join(self.dump_dir, f"itinerary_{os.getpid()}_{time.time_ns()}.pb.txt")
+            self.model.export_to_file(self.last_model_dump)
+            print(f"  📝 Model written to {self.last_model_dump}")
+
+        self.last_solve_status = self.solver.solve(self.model)
+
+    def _search_log_stats(self) -> Dict[str, Any]:
+        """Presolve time and solution count from the last search log"""
+        presolve_time = None
+        num_solutions = 0
+        # e.g. "#Bound   0.27s best:-inf ..." or "#3       0.35s best:26943 ..."
+        progress = re.compile(r'^#(Bound|Model|Done|\d+)\s+([\d.]+)s')
+        for line in self.last_solve_log:
+            match = progress.match(line)
+            if not match:
+                continue
+            if presolve_time is None:
+                presolve_time = float(match.group(2))
+            if match.group(1).isdigit():
+                num_solutions += 1
+        return {'presolve_time': presolve_time, 'num_solutions': num_solutions}
+
+    def _solve_stats(self, config: SolverConfig) -> Dict[str, Any]:
+        """Model size, build timings and search statistics of the last solve"""
+        proto = self.model.proto
+        objective = self.solver.objective_value
+        bound = self.solver.best_objective_bound
+        stats = {
+            'status': self._get_status_name(self.last_solve_status),
+            'objective_value': objective,
+            'solve_time': self.solver.wall_time,
+            'best_bound': bound,
+            'gap': abs(bound - objective) / max(1.0, abs(objective)),
+            **self._search_log_stats(),
+            'num_variables': len(proto.variables),
+            'num_constraints': len(proto.constraints),
+            'num_conflicts': self.solver.num_conflicts,
+            'num_branches': self.solver.num_branches,
+            'deterministic_time': self.solver.deterministic_time,
+            'build_times': dict(self.build_times),
+            'build_time': sum(self.build_times.values()),
+            'template_cached': 'create_variables' not in self.build_times,
+            'config': config.to_dict()
+        }
+        if self.dump_dir:
+            stats['model_dump'] = self.last_model_dump
+        return stats
+
     def _get_status_name(self, status_code: int) -> str:
         """
         Convert solver status code to string name
@@ -124,10 +491,12 @@ class ItineraryOptimizer:
         }
         return status_names.get(status_code, f"UNKNOWN_STATUS_{status_code}")
 
-    def _prepare_items(self, flights, accommodations, restaurants, 
-                      activities, num_days) -> List[ItineraryItem]:
-        """Convert agent proposals to ItineraryItems"""
-        items = []
+    def _prepare_items(self, flights, accommodations, restaurants,
+                      activities, num_days) -> CandidatePool:
+        """Convert agent proposals to one ItineraryItem per candidate"""
+        pool = CandidatePool(num_days=num_days)
+        if self.prune_radius_km > 0:
+            restaurants, activities = self._prune_by_distance(accommodations[:5], restaurants, activities)
 
         # Add transport (flights or ground transport)
         for i, transport in enumerate(flights[:10]):  # Top 10 transport options
@@ -147,8 +516,8 @@ class ItineraryOptimizer:
             else:
                 # Unknown transport type, skip
                 continue
-            
-            item = ItineraryItem(
+
+            pool.transport.append(ItineraryItem(
                 item_id=f"transport_{i}",
                 item_type=item_type,
                 name=name,
@@ -160,72 +529,126 @@ class ItineraryOptimizer:
                 preference_score=0.8,
                 popularity_score=popularity,
                 mandatory=False  # Will be enforced by constraint, not individual flag
-            )
-            items.append(item)
+            ))
+            pool.transport_ids.append(i)
 
         # Add accommodations (one per day)
-        for i, acc in enumerate(accommodations[:5]):
-            for day in range(num_days):
-                item = ItineraryItem(
-                    item_id=f"acc_{i}_day{day}",
-                    item_type="accommodation",
-                    name=acc.name,
-                    day=day,
-                    start_time=0,
-                    duration=1440,  # Full day
-                    cost=acc.price_per_night,
-                    latitude=acc.latitude,
-                    longitude=acc.longitude,
-                    preference_score=acc.rating / 5.0,
-                    popularity_score=min(1.0, acc.review_count / 500),
-                    mandatory=False
-                )
-                items.append(item)
+        for acc in accommodations[:5]:
+            pool.accommodations.append(ItineraryItem(
+                item_id="",
+                item_type="accommodation",
+                name=acc.name,
+                day=0,
+                start_time=0,
+                duration=1440,  # Full day
+                cost=acc.price_per_night,
+                latitude=acc.latitude,
+                longitude=acc.longitude,
+                preference_score=acc.rating / 5.0,
+                popularity_score=min(1.0, acc.review_count / 500),
+                mandatory=False
+            ))
 
         # Add restaurants (multiple per day possible)
-        for i, rest in enumerate(restaurants[:10]):
-            for day in range(1, num_days):  # Skip day 0 (arrival)
-                for meal_time in [720, 1080]:  # Lunch at 12:00, Dinner at 18:00
-                    item = ItineraryItem(
-                        item_id=f"rest_{i}_day{day}_t{meal_time}",
-                        item_type="restaurant",
-                        name=rest.name,
-                        day=day,
-                        start_time=meal_time,
-                        duration=rest.average_meal_time_minutes,
-                        cost=rest.average_meal_cost,
-                        latitude=rest.latitude,
-                        longitude=rest.longitude,
-                        preference_score=rest.rating / 5.0,
-                        popularity_score=min(1.0, rest.review_count / 300),
-                        mandatory=False
-                    )
-                    items.append(item)
+        for rest in restaurants[:10]:
+            pool.restaurants.append(ItineraryItem(
+                item_id="",
+                item_type="restaurant",
+                name=rest.name,
+                day=0,
+                start_time=0,
+                duration=rest.average_meal_time_minutes,
+                cost=rest.average_meal_cost,
+                latitude=rest.latitude,
+                longitude=rest.longitude,
+                preference_score=rest.rating / 5.0,
+                popularity_score=min(1.0, rest.review_count / 300),
+                mandatory=False
+            ))
 
         # Add activities
-        for i, act in enumerate(activities):
-            for day in range(1, num_days):
-                # Morning, afternoon slots
-                for start_time in [540, 840]:  # 09:00, 14:00
-                    item = ItineraryItem(
-                        item_id=f"act_{i}_day{day}_t{start_time}",
-                        item_type="activity",
-                        name=act.name,
-                        day=day,
-                        start_time=start_time,
-                        duration=act.duration_minutes,
-                        cost=act.price,
-                        latitude=act.latitude,
-                        longitude=act.longitude,
-                        preference_score=act.rating / 5.0,
-                        popularity_score=act.popularity_score,
-                        mandatory=False
-                    )
-                    items.append(item)
-
-        return items
-
-    def _add_budget_constraint(self, items, item_vars):
+        for act in activities:
+            pool.activities.append(ItineraryItem(
+                item_id="",
+                item_type="activity",
+                name=act.name,
+                day=0,
+                start_time=0,
+                duration=act.duration_minutes,
+                cost=act.price,
+                latitude=act.latitude,
+                longitude=act.longitude,
+                preference_score=act.rating / 5.0,
+                popularity_score=act.popularity_score,
+                mandatory=False
+            ))
+
+        return pool
+
+    def _prune_by_distance(self, accommodations, restaurants, activities) -> Tuple[List[Any], List[Any]]:
+        """
+        Restaurants and activities within prune_radius_km of at least one hotel
+        candidate, in their ranked order. Candidates with unknown coordinates
+        are kept, and nothing is pruned if a kind would end up empty.
+        """
+        if not any(acc.latitude or acc.longitude for acc in accommodations):
+            return restaurants, activities
+        index = CandidateIndex(restaurants=restaurants, activities=activities)
+
+        kept = []
+        for kind, items in (('restaurant', restaurants), ('activity', activities)):
+            keep = np.zeros(len(items), dtype=bool)
+            keep[index.near_any(kind, accommodations, self.prune_radius_km)] = True
+            keep |= np.array([not (item.latitude or item.longitude) for item in items], dtype=bool)
+            kept.append([item for item, k in zip(items, keep) if k] if keep.any() else list(items))
+
+        print(f"  📍 Pruned to {len(kept[0])}/{len(restaurants)} restaurants and "
+              f"{len(kept[1])}/{len(activities)} activities within {self.prune_radius_km:g} km of the hotels")
+        return kept[0], kept[1]
+
+    def _model_template(self, pool: CandidatePool) -> ModelTemplate:
+        """Cached template for the pool's shape, compiled on first use"""
+        cache = get_template_cache()
+        key = ModelTemplate.key_for(pool, self.overlap_mode)
+        template = cache.get(key)
+        if template is not None:
+            print(f"  ♻️  Reusing compiled model template")
+            return template
+
+        self.model = cp_model.CpModel()
+        with self._timed('create_variables'):
+            dvars = self._create_variables(pool)
+        with self._timed('add_time_constraints'):
+            self._add_time_constraints(pool, dvars)
+        with self._timed('add_logical_constraints'):
+            self._add_logical_constraints(pool, dvars)
+
+        indices = {kind: np.vectorize(lambda var: var.index, otypes=[np.int64])(tensor) if tensor.size
+                   else np.zeros(tensor.shape, dtype=np.int64)
+                   for kind, tensor in vars(dvars).items()}
+        template = ModelTemplate(model=self.model, indices=indices)
+        cache.put(key, template)
+        return template
+
+    def _create_variables(self, pool: CandidatePool) -> DecisionVars:
+        """Decision tensors; variable names match the item ids of the extracted solution"""
+        days = pool.plan_days
+        return DecisionVars(
+            transport=_bool_tensor(
+                self.model, (len(pool.transport),),
+                lambda idx: f"transport_{pool.transport_ids[idx[0]]}"),
+            accommodation=_bool_tensor(
+                self.model, (len(pool.accommodations), pool.num_days),
+                lambda idx: f"acc_{idx[0]}_day{idx[1]}"),
+            restaurant=_bool_tensor(
+                self.model, (len(pool.restaurants), len(days), len(pool.MEAL_SLOTS)),
+                lambda idx: f"rest_{idx[0]}_day{days[idx[1]]}_t{pool.MEAL_SLOTS[idx[2]]}"),
+            activity=_bool_tensor(
+                self.model, (len(pool.activities), len(days), len(pool.ACTIVITY_SLOTS)),
+                lambda idx: f"act_{idx[0]}_day{days[idx[1]]}_t{pool.ACTIVITY_SLOTS[idx[2]]}"),
+        )
+
+    def _add_budget_constraint(self, pool: CandidatePool, dvars: DecisionVars):
         """Budget constraint: total cost <= budget"""
         prefs = self.user_profile.travel_preferences
         if not prefs:
@@ -233,39 +656,96 @@ class ItineraryOptimizer:
 
         total_budget = prefs.budget_total
 
-        # Calculate total cost
-        cost_terms = []
-        for item in items:
-            cost_int = int(item.cost * 100)  # Convert to integer cents
-            cost_terms.append(cost_int * item_vars[item.item_id])
+        # Calculate total cost in integer cents
+        total_cost = sum(
+            _weighted_sum(tensor, [int(item.cost * 100) for item in items])
+            for _, items, tensor in self._kinds(pool, dvars)
+        )
+        self.model.add(total_cost <= int(total_budget * 100))
+        print(f"  ✓ Added budget constraint: <= INR {total_budget:,.2f}")
 
-        if cost_terms:
-            self.model.Add(sum(cost_terms) <= int(total_budget * 100))
-            print(f"  ✓ Added budget constraint: <= INR {total_budget:,.2f}")
-
-    def _add_time_constraints(self, items, item_vars, num_days):
+    def _add_time_constraints(self, pool: CandidatePool, dvars: DecisionVars):
         """Time and sequencing constraints"""
+        if self.overlap_mode == 'interval':
+            self._add_no_overlap_constraints(pool, dvars)
+        else:
+            self._add_pairwise_time_constraints(pool, dvars)
+
+    def _day_pattern(self, pool: CandidatePool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Start and duration of every restaurant/activity entry of a plan day, in
+        the order of _day_vars (every plan day has the same layout)
+        """
+        meal_slots, activity_slots = len(pool.MEAL_SLOTS), len(pool.ACTIVITY_SLOTS)
+        starts = np.concatenate([np.tile(pool.MEAL_SLOTS, len(pool.restaurants)),
+                                 np.tile(pool.ACTIVITY_SLOTS, len(pool.activities))]).astype(np.int64)
+        durations = np.concatenate([np.repeat([item.duration for item in pool.restaurants], meal_slots),
+                                    np.repeat([item.duration for item in pool.activities], activity_slots)])
+        return starts, durations.astype(np.int64)
+
+    def _day_vars(self, dvars: DecisionVars, day_index: int) -> np.ndarray:
+        """Restaurant and activity decisions of one plan day, flattened"""
+        return np.concatenate([dvars.restaurant[:, day_index, :].ravel(),
+                               dvars.activity[:, day_index, :].ravel()])
+
+    def _add_no_overlap_constraints(self, pool: CandidatePool, dvars: DecisionVars):
+        """
+        No overlapping activities/restaurants on the same day, as one
+        AddNoOverlap per day over optional fixed intervals
+
+        Each candidate's interval is present only if the candidate is selected,
+        so the model grows linearly with the pool instead of with every
+        overlapping pair. Because start times are fixed, the items running at
+        any start time form a clique, so a redundant AddAtMostOne per distinct
+        start time is added as well; it gives the LP relaxation the same
+        strength as the pairwise clauses.
+        """
+        starts, durations = self._day_pattern(pool)
+        if len(starts) < 2:
+            return
+
+        # Which entries run at each distinct start time (the same every day)
+        cliques = [mask for mask in ((starts <= point) & (point < starts + durations)
+                                     for point in np.unique(starts))
+                   if mask.sum() > 1]
+
+        interval_count = 0
+        for d in range(len(pool.plan_days)):
+            day_vars = self._day_vars(dvars, d)
+            intervals = [
+                self.model.new_optional_fixed_size_interval_var(int(start), int(duration), var, f"interval_{var.name}")
+                for start, duration, var in zip(starts, durations, day_vars)
+            ]
+            self.model.add_no_overlap(intervals)
+            interval_count += len(intervals)
+
+            for mask in cliques:
+                self.model.add_at_most_one(day_vars[mask])
+
+        if interval_count > 0:
+            print(f"  ✓ Added {len(pool.plan_days)} no-overlap constraints ({interval_count} intervals)")
+
+    def _add_pairwise_time_constraints(self, pool: CandidatePool, dvars: DecisionVars):
+        """No overlapping activities/restaurants on the same day, one clause per overlapping pair"""
+        starts, durations = self._day_pattern(pool)
+        ends = starts + durations
+
+        # Overlapping entry pairs (the same every day)
+        first, second = np.nonzero(np.triu((starts[:, None] < ends[None, :]) &
+                                           (starts[None, :] < ends[:, None]), k=1))
+
         constraint_count = 0
-        for day in range(num_days):
-            day_items = [item for item in items if item.day == day]
-
-            # No overlapping activities on same day
-            for i, item1 in enumerate(day_items):
-                for item2 in day_items[i+1:]:
-                    if item1.item_type in ['activity', 'restaurant'] and \
-                       item2.item_type in ['activity', 'restaurant']:
-                        # Check if they overlap
-                        overlap = not (item1.start_time + item1.duration <= item2.start_time or
-                                     item2.start_time + item2.duration <= item1.start_time)
-                        if overlap:
-                            # At most one can be selected
-                            self.model.Add(item_vars[item1.item_id] + item_vars[item2.item_id] <= 1)
-                            constraint_count += 1
+        for d in range(len(pool.plan_days)):
+            day_vars = self._day_vars(dvars, d)
+            for i, j in zip(first, second):
+                # At most one can be selected
+                self.model.add(day_vars[i] + day_vars[j] <= 1)
+                constraint_count += 1
 
         if constraint_count > 0:
             print(f"  ✓ Added {constraint_count} time constraints (no overlaps)")
 
-    def _add_activity_limit_constraint(self, items, item_vars, num_days):
+    def _add_activity_limit_constraint(self, pool: CandidatePool, dvars: DecisionVars):
         """Limit activities per day"""
         prefs = self.user_profile.travel_preferences
         if not prefs:
@@ -273,170 +753,319 @@ class ItineraryOptimizer:
         else:
             max_activities = prefs.max_activities_per_day
 
-        constraint_count = 0
-        for day in range(num_days):
-            day_activities = [item for item in items 
-                            if item.day == day and item.item_type == 'activity']
-
-            if day_activities:
-                self.model.Add(
-                    sum(item_vars[item.item_id] for item in day_activities) <= max_activities
-                )
-                constraint_count += 1
+        if not pool.activities or not pool.plan_days:
+            return
 
-        if constraint_count > 0:
-            print(f"  ✓ Added activity limit: max {max_activities} per day")
-        
         min_activities = 1  # At least 1 activity per day
-        min_constraint_count = 0
-        
-        for day in range(num_days):
-            day_activities = [item for item in items 
-                            if item.day == day and item.item_type == 'activity']
-
-            if day_activities:
-                # MINIMUM constraint (NEW - this is the critical fix!)
-                self.model.Add(
-                    sum(item_vars[item.item_id] for item in day_activities) >= min_activities
-                )
-                min_constraint_count += 1
-
-        if min_constraint_count > 0:
-            print(f"  ✓ Added MINIMUM activity requirement: >= {min_activities} per day")
-
-    def _add_mandatory_constraints(self, items, item_vars):
-        """Mandatory items must be selected"""
+        for d in range(len(pool.plan_days)):
+            day_activities = cp_model.LinearExpr.sum(list(dvars.activity[:, d, :].ravel()))
+            self.model.add(day_activities <= max_activities)
+            # MINIMUM constraint (NEW - this is the critical fix!)
+            self.model.add(day_activities >= min_activities)
+
+        print(f"  ✓ Added activity limit: max {max_activities} per day")
+        print(f"  ✓ Added MINIMUM activity requirement: >= {min_activities} per day")
+
+    def _travel_matrix(self, pool: CandidatePool) -> np.ndarray:
+        """Travel minutes between every pair of pool.locations() (0 for unknown coordinates)"""
+        locations = pool.locations()
+        latitudes = np.array([item.latitude for item in locations], dtype=float)
+        longitudes = np.array([item.longitude for item in locations], dtype=float)
+
+        prefs = self.user_profile.travel_preferences if self.user_profile else None
+        budget_conscious = not prefs or prefs.comfort_level == 'economy'
+        _, minutes = LocalTransportAgent().travel_time_matrix(latitudes, longitudes, budget_conscious)
+
+        unknown = (latitudes == 0) & (longitudes == 0)
+        minutes[unknown, :] = 0
+        minutes[:, unknown] = 0
+        return minutes
+
+    def _day_positions(self, pool: CandidatePool, dvars: DecisionVars,
+                       day_index: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(location indices, decision vars) of each position of a plan day, in time order"""
+        day = pool.plan_days[day_index]
+        tensors = {'accommodation': dvars.accommodation[:, day],
+                   'restaurant': dvars.restaurant[:, day_index, :],
+                   'activity': dvars.activity[:, day_index, :]}
+        positions = []
+        for kind, slot in pool.day_sequence():
+            variables = tensors[kind] if slot < 0 else tensors[kind][:, slot]
+            positions.append((pool.location_offset(kind) + np.arange(len(variables)), variables))
+        return positions
+
+    def _add_travel_constraints(self, pool: CandidatePool, dvars: DecisionVars):
+        """
+        Travel time between consecutive stops of each plan day (hotel, meals,
+        activities, hotel): capped at max_daily_travel_minutes, and the
+        minutes of long hops are returned as an objective penalty
+
+        Only long hops are penalized: a per-minute penalty on every hop
+        weakens the LP bound so much that small models no longer solve to
+        optimality within the time limit.
+        """
+        if not self.travel_aware or not pool.plan_days or not pool.locations():
+            return 0
+
+        pool.travel_minutes = self._travel_matrix(pool)
+        prefs = self.user_profile.travel_preferences if self.user_profile else None
+        max_travel = prefs.max_daily_travel_minutes if prefs else None
+
+        penalty = []
+        hop_count = 0
+        for d, day in enumerate(pool.plan_days):
+            positions = self._day_positions(pool, dvars, d)
+            day_hops = []
+            for p in range(len(positions)):
+                for q in range(p + 1, len(positions)):
+                    if p == 0 and q == len(positions) - 1:
+                        continue  # Every day has an activity between the two hotel ends
+                    (p_index, p_vars), (q_index, q_vars) = positions[p], positions[q]
+                    minutes = pool.travel_minutes[np.ix_(p_index, q_index)]
+                    if not len(p_vars) or not len(q_vars) or not minutes.any():
+                        continue
+                    long_hop = bool(self.weight_long_hop) and minutes.max() > self.long_hop_minutes
+                    if max_travel is None and not long_hop:
+                        continue
+
+                    # hop >= minutes(i, j) when i is at p, j is at q and nothing is in between.
+                    # At most one candidate fills a position, so one constraint per candidate
+                    # on the smaller side covers every pair.
+                    if len(p_vars) > len(q_vars):
+                        p_vars, q_vars, minutes = q_vars, p_vars, minutes.T
+                    between = cp_model.LinearExpr.sum([var for _, variables in positions[p + 1:q]
+                                                       for var in variables])
+                    hop = self.model.new_int_var(0, int(minutes.max()), f"hop_day{day}_{p}_{q}")
+                    for var, row in zip(p_vars, minutes):
+                        big_m = int(row.max())
+                        if big_m:
+                            self.model.add(hop >= _weighted_sum(q_vars, [int(m) for m in row])
+                                           - big_m * (1 - var) - big_m * between)
+                    day_hops.append(hop)
+
+                    if long_hop:
+                        excess = self.model.new_int_var(0, int(minutes.max()) - self.long_hop_minutes,
+                                                        f"long_hop_day{day}_{p}_{q}")
+                        self.model.add(excess >= hop - self.long_hop_minutes)
+                        penalty.append(self.weight_long_hop * excess)
+
+            if max_travel is not None and day_hops:
+                self.model.add(cp_model.LinearExpr.sum(day_hops) <= max_travel)
+            hop_count += len(day_hops)
+
+        if max_travel is not None:
+            print(f"  ✓ Added travel cap: <= {max_travel} min per day ({hop_count} hops)")
+        print(f"  ✓ Added long-hop penalty: {self.weight_long_hop} per minute beyond "
+              f"{self.long_hop_minutes} min ({len(penalty)} hops can exceed it)")
+        return sum(penalty)
+
+    def _travel_hops(self, pool: CandidatePool, values: Dict[str, np.ndarray], day_index: int) -> List[int]:
+        """Minutes of each hop between the selected stops of a plan day"""
+        if pool.travel_minutes is None:
+            return []
+        day = pool.plan_days[day_index]
+        day_values = {'accommodation': values['accommodation'][:, day],
+                      'restaurant': values['restaurant'][:, day_index, :],
+                      'activity': values['activity'][:, day_index, :]}
+        stops = []
+        for kind, slot in pool.day_sequence():
+            chosen = np.flatnonzero(day_values[kind] if slot < 0 else day_values[kind][:, slot])
+            if len(chosen):
+                stops.append(pool.location_offset(kind) + int(chosen[0]))
+        return [int(pool.travel_minutes[a, b]) for a, b in zip(stops, stops[1:])]
+
+    def _travel_penalty(self, hops: List[int]) -> int:
+        """Objective penalty of a day's hops (see _add_travel_constraints)"""
+        return sum(self.weight_long_hop * max(0, hop - self.long_hop_minutes) for hop in hops)
+
+    def _add_mandatory_constraints(self, pool: CandidatePool, dvars: DecisionVars):
+        """Mandatory candidates must be selected (at least once)"""
         mandatory_count = 0
-        for item in items:
-            if item.mandatory:
-                self.model.Add(item_vars[item.item_id] == 1)
-                mandatory_count += 1
+        for _, items, tensor in self._kinds(pool, dvars):
+            for c, item in enumerate(items):
+                if item.mandatory and tensor[c].size:
+                    self.model.add_bool_or(list(np.ravel(tensor[c])))
+                    mandatory_count += 1
 
         if mandatory_count > 0:
             print(f"  ✓ Added {mandatory_count} mandatory item constraints")
 
-    def _add_logical_constraints(self, items, item_vars, num_days):
+    def _add_logical_constraints(self, pool: CandidatePool, dvars: DecisionVars):
         """Logical constraints (e.g., exactly one accommodation per day)"""
-        accommodation_constraints = 0
-        for day in range(num_days):
-            day_accommodations = [item for item in items 
-                                if item.day == day and item.item_type == 'accommodation']
-
-            if day_accommodations:
+        if pool.accommodations:
+            for day in range(pool.num_days):
                 # Exactly one accommodation per day
-                self.model.Add(
-                    sum(item_vars[item.item_id] for item in day_accommodations) == 1
-                )
-                accommodation_constraints += 1
-
-        if accommodation_constraints > 0:
-            print(f"  ✓ Added {accommodation_constraints} accommodation constraints (1 per day)")
-        
+                self.model.add_exactly_one(dvars.accommodation[:, day])
+            print(f"  ✓ Added {pool.num_days} accommodation constraints (1 per day)")
+
         # Exactly one transport (flight OR ground_transport) for entire trip
-        transport_items = [item for item in items 
-                          if item.item_type in ['flight', 'ground_transport']]
-        
-        if transport_items:
-            # Exactly 1 transport for the entire trip
-            self.model.Add(
-                sum(item_vars[item.item_id] for item in transport_items) == 1
-            )
+        if pool.transport:
+            self.model.add_exactly_one(dvars.transport)
             print(f"  ✓ Added transport constraint: exactly 1 transport for trip")
-            print(f"     ({len(transport_items)} transport options available)")
-        
-        # NEW: Each unique activity/restaurant can only be selected once across entire trip
-        # Group items by their base name (without day/time suffix)
-        activity_groups = {}
-        restaurant_groups = {}
-        
-        for item in items:
-            if item.item_type == 'activity':
-                # Extract base ID (e.g., "act_0" from "act_0_day1_t540")
-                base_id = '_'.join(item.item_id.split('_')[:2])  # "act_0"
-                if base_id not in activity_groups:
-                    activity_groups[base_id] = []
-                activity_groups[base_id].append(item)
-            
-            elif item.item_type == 'restaurant':
-                # Extract base ID (e.g., "rest_0" from "rest_0_day1_t720")
-                base_id = '_'.join(item.item_id.split('_')[:2])  # "rest_0"
-                if base_id not in restaurant_groups:
-                    restaurant_groups[base_id] = []
-                restaurant_groups[base_id].append(item)
-        
-        # Add constraint: each activity can be selected at most once
+            print(f"     ({len(pool.transport)} transport options available)")
+
+        # Each activity can be selected at most once across the entire trip
         activity_uniqueness_count = 0
-        for base_id, item_list in activity_groups.items():
-            if len(item_list) > 1:  # Only add constraint if there are multiple instances
-                # At most 1 instance of this activity across all days/times
-                self.model.Add(
-                    sum(item_vars[item.item_id] for item in item_list) <= 1
-                )
+        for c in range(len(pool.activities)):
+            if dvars.activity[c].size > 1:
+                self.model.add_at_most_one(dvars.activity[c].ravel())
                 activity_uniqueness_count += 1
-        
+
         if activity_uniqueness_count > 0:
             print(f"  ✓ Added {activity_uniqueness_count} activity uniqueness constraints")
             print(f"     (each activity max 1x per trip)")
-        
-        # Add constraint: each restaurant can be selected at most once per day
+
+        # Each restaurant can be selected at most once per day
         # (allow same restaurant on different days, but not same day)
         restaurant_uniqueness_count = 0
-        for day in range(num_days):
-            day_restaurant_groups = {}
-            
-            for item in items:
-                if item.item_type == 'restaurant' and item.day == day:
-                    base_id = '_'.join(item.item_id.split('_')[:2])
-                    if base_id not in day_restaurant_groups:
-                        day_restaurant_groups[base_id] = []
-                    day_restaurant_groups[base_id].append(item)
-            
-            # At most 1 instance per restaurant per day
-            for base_id, item_list in day_restaurant_groups.items():
-                if len(item_list) > 1:
-                    self.model.Add(
-                        sum(item_vars[item.item_id] for item in item_list) <= 1
-                    )
-                    restaurant_uniqueness_count += 1
-        
+        for c in range(len(pool.restaurants)):
+            for d in range(len(pool.plan_days)):
+                self.model.add_at_most_one(dvars.restaurant[c, d])
+                restaurant_uniqueness_count += 1
+
         if restaurant_uniqueness_count > 0:
             print(f"  ✓ Added {restaurant_uniqueness_count} restaurant uniqueness constraints")
             print(f"     (each restaurant max 1x per day)")
 
-    def _set_objective(self, items, item_vars):
-        """Set multi-objective optimization function"""
-        # Normalize values
-        max_cost = max(item.cost for item in items) if items else 1
-        max_duration = max(item.duration for item in items) if items else 1
-
-        objective_terms = []
-
-        for item in items:
-            # Normalized scores
-            cost_score = int((1 - item.cost / max_cost) * 1000) if max_cost > 0 else 0
-            time_score = int((1 - item.duration / max_duration) * 1000) if max_duration > 0 else 0
-            pref_score = int(item.preference_score * 1000)
-            pop_score = int(item.popularity_score * 1000)
-
-            # Weighted sum
-            score = int(
-                self.weight_cost * cost_score +
-                self.weight_time * time_score +
-                self.weight_preference * pref_score +
-                self.weight_popularity * pop_score
-            )
-
-            objective_terms.append(score * item_vars[item.item_id])
-
-        # Maximize total score
-        if objective_terms:
-            self.model.Maximize(sum(objective_terms))
-            print(f"  ✓ Objective function set (maximize weighted score)")
-
-    def _extract_solution(self, items, item_vars, items_by_id, num_days) -> Dict[str, Any]:
+    def _scoring_engine(self) -> ScoringEngine:
+        """Objective score of a candidate, from the weight_* attributes"""
+        return ScoringEngine(
+            Criterion('cost', self.weight_cost, lower_is_better=True),
+            Criterion('duration', self.weight_time, lower_is_better=True),
+            Criterion('preference_score', self.weight_preference),
+            Criterion('popularity_score', self.weight_popularity),
+        )
+
+    def _candidate_scores(self, pool: CandidatePool) -> Dict[str, List[int]]:
+        """Objective score of every candidate by kind"""
+        engine = self._scoring_engine()
+        kinds = [('transport', pool.transport, True),
+                 ('accommodation', pool.accommodations, pool.num_days > 0),
+                 ('restaurant', pool.restaurants, bool(pool.plan_days)),
+                 ('activity', pool.activities, bool(pool.plan_days))]
+        columns = {kind: engine.columns(items) for kind, items, _ in kinds}
+
+        # Normalize over every candidate that has decisions
+        normalized = [columns[kind] for kind, items, has_decisions in kinds if has_decisions and items]
+        maxima = {attribute: max((float(column[attribute].max()) for column in normalized), default=1.0)
+                  for attribute in ('cost', 'duration')}
+
+        # Integer scores in thousandths, as the CP-SAT objective needs
+        return {kind: engine.scores(columns[kind], resolution=1000, maxima=maxima).tolist()
+                for kind, _, _ in kinds}
+
+    def _set_objective(self, pool: CandidatePool, dvars: DecisionVars,
+                       travel_penalty=0) -> Dict[str, List[int]]:
+        """Set multi-objective optimization function; returns the score of every candidate by kind"""
+        scores = self._candidate_scores(pool)
+
+        # Maximize total score, less the travel penalty
+        self.model.maximize(sum(_weighted_sum(tensor, scores[kind])
+                                for kind, _, tensor in self._kinds(pool, dvars)) - travel_penalty)
+        print(f"  ✓ Objective function set (maximize weighted score)")
+        return scores
+
+    def _hint_values(self, pool: CandidatePool, dvars: DecisionVars,
+                     hint: ItinerarySolution) -> Tuple[Dict[str, np.ndarray], int]:
+        """Hinted value of every decision, and how many hint entries matched a candidate"""
+        values = {kind: np.zeros(tensor.shape, dtype=bool) for kind, _, tensor in self._kinds(pool, dvars)}
+        index = {}
+        for kind, items, _ in self._kinds(pool, dvars):
+            for c, item in enumerate(items):
+                index.setdefault((item.item_type, item.name, round(item.cost, 2)), (kind, c))
+
+        slots = {'restaurant': pool.MEAL_SLOTS, 'activity': pool.ACTIVITY_SLOTS}
+        matched = 0
+        for item_type, name, cost, day, start in hint.selections:
+            kind, c = index.get((item_type, name, cost), (None, None))
+            if kind == 'transport':
+                values[kind][c] = True
+            elif kind == 'accommodation' and day < pool.num_days:
+                values[kind][c, day] = True
+            elif kind in slots and day in pool.plan_days and start in slots[kind]:
+                values[kind][c, pool.plan_days.index(day), slots[kind].index(start)] = True
+            else:
+                continue
+            matched += 1
+        return values, matched
+
+    def _apply_hint(self, pool: CandidatePool, dvars: DecisionVars,
+                    hint: ItinerarySolution, fix_days: List[int]):
+        """Add every decision's hinted value; pin the decisions of fix_days"""
+        values, matched = self._hint_values(pool, dvars, hint)
+        for kind, _, tensor in self._kinds(pool, dvars):
+            for var, value in zip(tensor.ravel(), values[kind].ravel()):
+                self.model.add_hint(var, bool(value))
+        print(f"  ✓ Hinted previous plan ({matched}/{len(hint.selections)} entries matched)")
+
+        fixed = []
+        for day in sorted(set(fix_days)):
+            if not 0 <= day < pool.num_days:
+                continue
+            pinned = [(dvars.accommodation[:, day], values['accommodation'][:, day])]
+            if day == 0:
+                pinned.append((dvars.transport, values['transport']))
+            if day in pool.plan_days:
+                d = pool.plan_days.index(day)
+                pinned.append((dvars.restaurant[:, d, :], values['restaurant'][:, d, :]))
+                pinned.append((dvars.activity[:, d, :], values['activity'][:, d, :]))
+            for tensor, tensor_values in pinned:
+                for var, value in zip(tensor.ravel(), tensor_values.ravel()):
+                    self.model.add(var == int(value))
+            fixed.append(day)
+
+        if fixed:
+            print(f"  ✓ Fixed {len(fixed)} unchanged days: {fixed}")
+
+    def _kinds(self, pool: CandidatePool, dvars: DecisionVars) -> List[Tuple[str, List[ItineraryItem], np.ndarray]]:
+        """(kind, candidates, decision tensor) for every candidate kind"""
+        return [
+            ('transport', pool.transport, dvars.transport),
+            ('accommodation', pool.accommodations, dvars.accommodation),
+            ('restaurant', pool.restaurants, dvars.restaurant),
+            ('activity', pool.activities, dvars.activity),
+        ]
+
+    def _selected_items(self, pool: CandidatePool, dvars: DecisionVars) -> List[ItineraryItem]:
+        """Materialize an ItineraryItem for every selected (candidate, day, slot)"""
+        return self._items_from_values(pool, {kind: self._values(tensor)
+                                              for kind, _, tensor in self._kinds(pool, dvars)})
+
+    def _items_from_values(self, pool: CandidatePool, values: Dict[str, np.ndarray]) -> List[ItineraryItem]:
+        """ItineraryItems for the true entries of per-kind decision value arrays"""
+        selected = [pool.transport[c] for c in np.flatnonzero(values['transport'])]
+
+        for c, day in zip(*np.nonzero(values['accommodation'])):
+            selected.append(replace(pool.accommodations[c], item_id=f"acc_{c}_day{day}", day=int(day)))
+
+        for items, kind, slots, prefix in ((pool.restaurants, 'restaurant', pool.MEAL_SLOTS, 'rest'),
+                                           (pool.activities, 'activity', pool.ACTIVITY_SLOTS, 'act')):
+            for c, d, s in zip(*np.nonzero(values[kind])):
+                day, start = pool.plan_days[d], slots[s]
+                selected.append(replace(items[c], item_id=f"{prefix}_{c}_day{day}_t{start}",
+                                        day=day, start_time=start))
+        return selected
+
+    def _values(self, tensor: np.ndarray) -> np.ndarray:
+        """Solution values of a decision tensor as a bool array"""
+        values = np.zeros(tensor.shape, dtype=bool)
+        for index in np.ndindex(*tensor.shape):
+            values[index] = self.solver.boolean_value(tensor[index])
+        return values
+
+    def _extract_solution(self, pool: CandidatePool, dvars: DecisionVars,
+                          config: SolverConfig) -> Dict[str, Any]:
         """Extract and format the solution"""
-        selected_items = [item for item in items 
-                         if self.solver.Value(item_vars[item.item_id]) == 1]
+        selected_items = self._selected_items(pool, dvars)
+        return self._build_result(pool, selected_items, {
+            **self._solve_stats(config),
+            'total_items': len(selected_items)
+        })
+
+    def _build_result(self, pool: CandidatePool, selected_items: List[ItineraryItem],
+                      solver_stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Format selected items as the day-by-day result"""
+        num_days = pool.num_days
 
         # Organize by day
         itinerary_by_day = {day: [] for day in range(num_days)}
@@ -451,9 +1080,6 @@ class ItineraryOptimizer:
         # Calculate totals
         total_cost = sum(item.cost for item in selected_items)
 
-        # Get status name safely
-        status_name = self._get_status_name(self.last_solve_status)
-
         # Build result
         result = {
             'itinerary': itinerary_by_day,
@@ -465,12 +1091,8 @@ class ItineraryOptimizer:
             'num_restaurants': sum(1 for item in selected_items if item.item_type == 'restaurant'),
             'num_accommodations': sum(1 for item in selected_items if item.item_type == 'accommodation'),
             'budget_remaining': self.user_profile.travel_preferences.budget_total - total_cost if self.user_profile.travel_preferences else 0,
-            'solver_stats': {
-                'status': status_name,
-                'objective_value': self.solver.ObjectiveValue(),
-                'solve_time': self.solver.WallTime(),
-                'total_items': len(selected_items)
-            }
+            'solution': ItinerarySolution.from_items(selected_items, solver_stats.get('objective_value', 0.0)),
+            'solver_stats': solver_stats
         }
 
         return result
@@ -479,4 +1101,4 @@ class ItineraryOptimizer:
 if __name__ == "__main__":
     print("Itinerary Optimizer Module")
     print("This module requires data from agents to run.")
-    print("Use main.py to run the full system.")
\ No newline at end of file
+    print("Use main.py to run the full system.")
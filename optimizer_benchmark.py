@@ -0,0 +1,269 @@
+"""
+Optimizer Benchmark
+Compares ItineraryOptimizer formulations on identical synthetic inputs
+
+Every run uses the same seeded candidate pool (flights, hotels, restaurants,
+activities built from the agents' own dataclasses), so differences in build
+time, solve time and model size come from the formulation alone.
+
+With --breakdown each run is followed by its per-step build times, presolve
+time and solution count (see ItineraryOptimizer._solve_stats).
+
+With --heuristic it also times HeuristicPlanner's greedy plan and reports
+its objective gap to the exact solve.
+
+With --batch N it instead measures batch throughput: N profiles (varying
+budget and activity limit) solved serially in-process, then through
+BatchOptimizer with each --processes count.
+
+Usage:
+    python optimizer_benchmark.py --days 7 --activities 25 --restaurants 10
+    python optimizer_benchmark.py --days 14 --modes interval pairwise --repeat 3
+    python optimizer_benchmark.py --days 7 --heuristic
+    python optimizer_benchmark.py --days 7 --batch 64 --processes 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+from dataclasses import replace
+from typing import Any, Dict, List
+
+from accommodation_agent import AccommodationOption
+from activity_agent import ActivityOption
+from flight_agent import FlightOption
+from batch_optimizer import BatchOptimizer
+from heuristic_planner import HeuristicPlanner
+from optimizer import ItineraryOptimizer, SolverConfig
+from restaurant_agent import RestaurantOption
+from user_profile import TravelPreferences, UserProfile
+
+
+def build_candidate_pool(num_flights: int = 5, num_hotels: int = 5, num_restaurants: int = 10,
+                         num_activities: int = 25, seed: int = 42) -> Dict[str, List[Any]]:
+    """Seeded synthetic candidates around a fixed city center"""
+    rng = random.Random(seed)
+    lat, lon = 48.8566, 2.3522
+
+    def near():
+        return lat + rng.uniform(-0.08, 0.08), lon + rng.uniform(-0.08, 0.08)
+
+    flights = [
+        FlightOption(
+            flight_id=f"F{i}", origin="DEL", destination="CDG",
+            departure_time="2026-06-01T08:00:00", arrival_time="2026-06-01T16:00:00",
+            duration_minutes=rng.randint(480, 900), price=rng.uniform(25000, 60000),
+            currency="INR", carrier=rng.choice(["AF", "AI", "LH", "EK"]),
+            segments=rng.randint(1, 2), class_type="ECONOMY",
+            reliability_score=rng.uniform(0.7, 0.99)
+        )
+        for i in range(num_flights)
+    ]
+
+    hotels = []
+    for i in range(num_hotels):
+        h_lat, h_lon = near()
+        hotels.append(AccommodationOption(
+            accommodation_id=f"H{i}", name=f"Hotel {i}", type="hotel", address="",
+            latitude=h_lat, longitude=h_lon, price_per_night=rng.uniform(3000, 15000),
+            currency="INR", rating=rng.uniform(3.0, 5.0), review_count=rng.randint(10, 900),
+            amenities=[], check_in_time="14:00", check_out_time="11:00",
+            cancellation_policy="flexible", free_cancellation=True,
+            distance_to_center_km=rng.uniform(0.2, 8.0)
+        ))
+
+    restaurants = []
+    for i in range(num_restaurants):
+        r_lat, r_lon = near()
+        cost = rng.uniform(500, 4000)
+        restaurants.append(RestaurantOption(
+            restaurant_id=f"R{i}", name=f"Restaurant {i}", cuisine="french", address="",
+            latitude=r_lat, longitude=r_lon, average_cost=cost, currency="INR",
+            rating=rng.uniform(3.0, 5.0), review_count=rng.randint(5, 600),
+            dietary_options=[], opening_hours={}, cuisine_type=["french"],
+            average_meal_cost=cost, average_meal_time_minutes=rng.choice([60, 75, 90, 120])
+        ))
+
+    activities = []
+    for i in range(num_activities):
+        a_lat, a_lon = near()
+        activities.append(ActivityOption(
+            activity_id=f"A{i}", name=f"Activity {i}", category="museum", description="",
+            address="", latitude=a_lat, longitude=a_lon,
+            duration_minutes=rng.choice([90, 120, 180, 240, 300]),
+            price=rng.choice([0.0, rng.uniform(500, 5000)]), currency="INR",
+            rating=rng.uniform(3.0, 5.0), review_count=rng.randint(5, 5000),
+            popularity_score=rng.uniform(0.3, 1.0), opening_hours={}, time_slots=[],
+            booking_required=False, suitable_for=[], difficulty_level="easy",
+            indoor_outdoor="indoor"
+        ))
+
+    return {'flights': flights, 'accommodations': hotels,
+            'restaurants': restaurants, 'activities': activities}
+
+
+def build_profile(budget: float = 400000, max_activities_per_day: int = 3) -> UserProfile:
+    """Profile with a budget large enough for every benchmark size"""
+    profile = UserProfile(user_id="benchmark")
+    profile.travel_preferences = TravelPreferences(
+        budget_total=budget, budget_per_day=budget / 7, comfort_level="premium",
+        transport_pref=["flight"], accommodation_pref=["hotel"], dietary_restrictions=[],
+        activity_interests=["museum"], avoid=[], max_activities_per_day=max_activities_per_day
+    )
+    return profile
+
+
+def run_once(overlap_mode: str, pool: Dict[str, List[Any]], num_days: int,
+             profile: UserProfile, config: SolverConfig) -> Dict[str, Any]:
+    """Build and solve one model; returns timing and model-size figures"""
+    optimizer = ItineraryOptimizer(profile, overlap_mode=overlap_mode, solver_config=config)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = optimizer.optimize_itinerary(num_days=num_days, **pool)
+    total = time.perf_counter() - started
+
+    proto = optimizer.model.proto
+    solve_time = optimizer.solver.wall_time
+    return {
+        'mode': overlap_mode,
+        'status': result.get('solver_stats', {}).get('status', result.get('status', 'ERROR')),
+        'objective': result.get('solver_stats', {}).get('objective_value'),
+        'variables': len(proto.variables),
+        'constraints': len(proto.constraints),
+        'build_time': total - solve_time,
+        'solve_time': solve_time,
+        'total_time': total,
+        'stats': result.get('solver_stats', {}),
+    }
+
+
+def heuristic_once(pool: Dict[str, List[Any]], num_days: int, profile: UserProfile,
+                   config: SolverConfig, exact_objective) -> Dict[str, Any]:
+    """Time one greedy plan; gap is against exact_objective when given"""
+    planner = HeuristicPlanner(profile, ItineraryOptimizer(profile, solver_config=config))
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = planner.plan(num_days=num_days, **pool)
+    total = time.perf_counter() - started
+
+    objective = result.get('solver_stats', {}).get('objective_value')
+    return {
+        'status': result.get('solver_stats', {}).get('status', result.get('status', 'ERROR')),
+        'objective': objective,
+        'gap': planner._gap(objective, exact_objective),
+        'total_time': total,
+    }
+
+
+def print_breakdown(stats: Dict[str, Any]):
+    """Indented per-step build times and search statistics of one run"""
+    for step, seconds in sorted(stats['build_times'].items(), key=lambda item: -item[1]):
+        print(f"    {step:<32} {seconds * 1000:>9.2f} ms")
+    presolve = f"{stats['presolve_time']:.2f}s" if stats['presolve_time'] is not None else '-'
+    print(f"    presolve {presolve}, {stats['num_solutions']} solutions, gap {stats['gap']:.2%}, "
+          f"{stats['num_branches']} branches, template {'cached' if stats['template_cached'] else 'compiled'}")
+
+
+def build_profiles(count: int, seed: int = 42) -> List[UserProfile]:
+    """Seeded profiles with different budgets and activity limits"""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        profile = build_profile(budget=rng.uniform(150000, 400000),
+                                max_activities_per_day=rng.randint(1, 3))
+        profile.user_id = f"batch-{i}"
+        profiles.append(profile)
+    return profiles
+
+
+def batch_throughput(pool: Dict[str, List[Any]], num_days: int, num_profiles: int,
+                     process_counts: List[int], config: SolverConfig, seed: int = 42):
+    """Print profiles/second for a serial loop and for each process count"""
+    profiles = build_profiles(num_profiles, seed)
+    single = replace(config, num_workers=1)
+
+    started = time.perf_counter()
+    for profile in profiles:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ItineraryOptimizer(profile, solver_config=single).optimize_itinerary(num_days=num_days, **pool)
+    serial = time.perf_counter() - started
+    print(f"{'serial':<12} {serial:>8.2f}s  {num_profiles / serial:>8.1f} profiles/s")
+
+    for processes in process_counts:
+        with BatchOptimizer(num_days=num_days, max_workers=processes, solver_config=single, **pool) as batch:
+            started = time.perf_counter()
+            solved = sum(1 for result in batch.solve_iter(profiles) if 'error' not in result.result)
+            elapsed = time.perf_counter() - started
+        print(f"{f'{processes} procs':<12} {elapsed:>8.2f}s  {num_profiles / elapsed:>8.1f} profiles/s  "
+              f"({solved}/{num_profiles} solved, {serial / elapsed:.1f}x serial)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ItineraryOptimizer formulations")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--flights', type=int, default=5)
+    parser.add_argument('--hotels', type=int, default=5)
+    parser.add_argument('--restaurants', type=int, default=10)
+    parser.add_argument('--activities', type=int, default=25)
+    parser.add_argument('--modes', nargs='+', default=list(ItineraryOptimizer.OVERLAP_MODES),
+                        choices=ItineraryOptimizer.OVERLAP_MODES)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--time-limit', type=float, default=60.0,
+                        help="Per-solve time limit in seconds")
+    parser.add_argument('--workers', type=int, default=0, help="CP-SAT workers (0 = one per core)")
+    parser.add_argument('--gap', type=float, default=0.0, help="Relative gap to stop at")
+    parser.add_argument('--deterministic', action='store_true')
+    parser.add_argument('--breakdown', action='store_true',
+                        help="Print per-step build times and search statistics")
+    parser.add_argument('--heuristic', action='store_true',
+                        help="Also time the greedy heuristic planner")
+    parser.add_argument('--batch', type=int, default=0, help="Measure batch throughput over N profiles")
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4],
+                        help="Process counts for --batch")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    config = SolverConfig(time_limit_seconds=args.time_limit, num_workers=args.workers,
+                          deterministic=args.deterministic, relative_gap=args.gap)
+
+    pool = build_candidate_pool(args.flights, args.hotels, args.restaurants,
+                                args.activities, seed=args.seed)
+    profile = build_profile()
+
+    if args.batch:
+        print(f"📊 Batch of {args.batch} profiles, {args.days} days, {args.activities} activities")
+        batch_throughput(pool, args.days, args.batch, args.processes, config, seed=args.seed)
+        return
+
+    print(f"📊 {args.days} days, {args.flights} flights, {args.hotels} hotels, "
+          f"{args.restaurants} restaurants, {args.activities} activities (seed {args.seed})")
+    print(f"{'mode':<10} {'status':<10} {'objective':>10} {'vars':>7} {'cons':>7} "
+          f"{'build s':>8} {'solve s':>8} {'total s':>8}")
+
+    exact_objective = None
+    for mode in args.modes:
+        for _ in range(args.repeat):
+            row = run_once(mode, pool, args.days, profile, config)
+            objective = f"{row['objective']:.0f}" if row['objective'] is not None else '-'
+            if row['status'] == 'OPTIMAL':
+                exact_objective = row['objective']
+            print(f"{row['mode']:<10} {row['status']:<10} {objective:>10} {row['variables']:>7} "
+                  f"{row['constraints']:>7} {row['build_time']:>8.3f} {row['solve_time']:>8.3f} "
+                  f"{row['total_time']:>8.3f}")
+            if args.breakdown and row['stats']:
+                print_breakdown(row['stats'])
+
+    if args.heuristic:
+        for _ in range(args.repeat):
+            row = heuristic_once(pool, args.days, profile, config, exact_objective)
+            objective = f"{row['objective']:.0f}" if row['objective'] is not None else '-'
+            gap = f"gap {row['gap']:.1%} to optimal" if row['gap'] is not None else 'no optimal reference'
+            print(f"{'heuristic':<10} {row['status']:<10} {objective:>10} {'-':>7} {'-':>7} "
+                  f"{'-':>8} {'-':>8} {row['total_time']:>8.3f}  ({gap})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Overpass Cache Module
+Persistent tile cache for Overpass results
+
+Results are stored per (tag set, tile) where tiles are cells of a fixed
+lat/lon grid, instead of per raw float bbox. A bbox request is answered from
+the union of its cached tiles, and only the missing tiles go to Overpass, so
+popular destinations are served from disk after the first user.
+
+Tiles are gzip-compressed JSON in SQLite, with a TTL and a total size cap
+(least recently used tiles are evicted first).
+"""
+
+import gzip
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+Tile = Tuple[int, int]
+
+
+class OverpassTileCache:
+    """Disk-backed Overpass element cache keyed on snapped tiles + tag set"""
+
+    def __init__(self, path: str, tile_deg: float = 0.05,
+                 max_bytes: int = 200 * 1024 * 1024, ttl_seconds: float = 7 * 86400):
+        self.path = path
+        self.tile_deg = tile_deg
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tiles ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS tiles_last_access ON tiles (last_access)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"  ⚠️ Overpass tile cache unavailable ({e}), caching disabled")
+            self._db = None
+
+    # ------------------------------------------------------------------
+    # Tile geometry
+    # ------------------------------------------------------------------
+
+    def tile_for_point(self, lat: float, lon: float) -> Tile:
+        """Grid cell containing a point"""
+        return (math.floor(lat / self.tile_deg), math.floor(lon / self.tile_deg))
+
+    def tiles_for_bbox(self, south: float, west: float, north: float, east: float) -> List[Tile]:
+        """All grid cells intersecting a bbox"""
+        y0, x0 = self.tile_for_point(south, west)
+        y1, x1 = self.tile_for_point(north, east)
+        return [(y, x) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+    def tile_bbox(self, tile: Tile) -> Tuple[float, float, float, float]:
+        """(south, west, north, east) of a grid cell"""
+        y, x = tile
+        return (round(y * self.tile_deg, 6), round(x * self.tile_deg, 6),
+                round((y + 1) * self.tile_deg, 6), round((x + 1) * self.tile_deg, 6))
+
+    def _key(self, tag_set: str, tile: Tile) -> str:
+        return f"{tag_set}@{self.tile_deg}:{tile[0]}:{tile[1]}"
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def get(self, tag_set: str, tile: Tile) -> Optional[List[dict]]:
+        """Cached elements for a tile, or None if missing/expired"""
+        if self._db is None:
+            return None
+
+        key = self._key(tag_set, tile)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, created_at FROM tiles WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+
+            data, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._db.execute("DELETE FROM tiles WHERE key = ?", (key,))
+                self._db.commit()
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._db.execute("UPDATE tiles SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.stats['hits'] += 1
+
+        return json.loads(gzip.decompress(data))
+
+    def get_many(self, tag_set: str, tiles: List[Tile]) -> Tuple[Dict[Tile, List[dict]], List[Tile]]:
+        """Split tiles into (cached elements by tile, missing tiles)"""
+        cached = {}
+        missing = []
+        for tile in tiles:
+            elements = self.get(tag_set, tile)
+            if elements is None:
+                missing.append(tile)
+            else:
+                cached[tile] = elements
+        return cached, missing
+
+    def put(self, tag_set: str, tile: Tile, elements: List[dict]):
+        """Store a tile's elements (an empty list is cached too)"""
+        if self._db is None:
+            return
+
+        data = gzip.compress(json.dumps(elements, separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tiles (key, data, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self._key(tag_set, tile), data, len(data), now, now)
+                )
+                self._evict(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"  ⚠️ Overpass tile cache write failed: {e}")
+
+    def _evict(self, now: float):
+        """Drop expired tiles, then least recently used ones over the size cap (caller holds the lock)"""
+        cursor = self._db.execute("DELETE FROM tiles WHERE created_at < ?", (now - self.ttl_seconds,))
+        self.stats['evicted'] += max(cursor.rowcount, 0)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._db.execute(
+                "SELECT key, size FROM tiles ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM tiles WHERE key = ?", (key,))
+            total -= size
+            self.stats['evicted'] += 1
+
+    def size_bytes(self) -> int:
+        """Total compressed size of cached tiles"""
+        if self._db is None:
+            return 0
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    def clear(self):
+        """Remove every cached tile"""
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM tiles")
+            self._db.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters"""
+        return dict(self.stats)
+
+
+# Global instance
+_tile_cache = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> OverpassTileCache:
+    """Get global Overpass tile cache instance"""
+    global _tile_cache
+    with _tile_cache_lock:
+        if _tile_cache is None:
+            cache_dir = os.getenv('TRAVEL_CACHE_DIR', '.cache')
+            _tile_cache = OverpassTileCache(
+                path=os.path.join(cache_dir, 'overpass_tiles.sqlite'),
+                tile_deg=float(os.getenv('OVERPASS_TILE_DEG', '0.05')),
+                max_bytes=int(float(os.getenv('OVERPASS_CACHE_MAX_MB', '200')) * 1024 * 1024),
+                ttl_seconds=float(os.getenv('OVERPASS_CACHE_TTL_DAYS', '7')) * 86400
+            )
+    return _tile_cache
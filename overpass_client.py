@@ -0,0 +1,314 @@
+"""
+Overpass Client Module
+Hedged requests across the public Overpass mirrors
+
+Walking the mirror list one at a time means a slow or overloaded primary
+costs a full 15-30 s timeout before the next mirror is even tried. In hedged
+mode the client starts on the fastest known mirror and, if no answer has
+arrived after OVERPASS_HEDGE_DELAY seconds (or at once, when that mirror's
+recent latency is already above OVERPASS_HEDGE_SLOW_LATENCY), launches a
+backup request to the next mirror. The first good response wins and the
+remaining requests are cancelled (async) or ignored (sync). A failed
+response launches the next mirror immediately. A 200 whose body is not
+JSON, or that carries a `remark` (the server ran out of time or memory and
+returned an empty or partial result), counts as a failure too.
+
+Per-mirror latency is tracked as an exponentially weighted moving average so
+the fastest mirror is tried first on the next query.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+
+import requests
+
+import async_http
+import http_session
+
+
+DEFAULT_OVERPASS_URLS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+    "https://lz4.overpass-api.de/api/interpreter",
+    "https://overpass.openstreetmap.ru/api/interpreter",
+]
+
+
+class OverpassClient:
+    """Overpass client with mirror latency tracking and hedged requests"""
+
+    def __init__(self, urls: Optional[List[str]] = None, hedge: bool = True,
+                 hedge_delay: float = 2.0, slow_latency: float = 8.0, timeout: float = 30.0):
+        self.urls = list(urls or DEFAULT_OVERPASS_URLS)
+        self.headers = {'User-Agent': 'TravelPlannerApp/1.0 (student project)'}
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.slow_latency = slow_latency
+        self.timeout = timeout
+
+        # EWMA latency per mirror (seconds); failures count as a full timeout
+        self.alpha = 0.3
+        self._latency: Dict[str, float] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, len(self.urls) * 2),
+                                            thread_name_prefix="overpass-hedge")
+
+    # ------------------------------------------------------------------
+    # Mirror ranking
+    # ------------------------------------------------------------------
+
+    def ranked_urls(self) -> List[str]:
+        """
+        Mirrors ordered fastest first. Untried mirrors are ranked as if they
+        answered in hedge_delay (ahead of known-slow mirrors, behind fast ones)
+        and keep their configured order among themselves.
+        """
+        with self._lock:
+            order = {url: i for i, url in enumerate(self.urls)}
+            return sorted(self.urls, key=lambda url: (self._latency.get(url, self.hedge_delay), order[url]))
+
+    def record(self, url: str, latency: float, ok: Optional[bool]):
+        """
+        Update a mirror's latency estimate and counters
+
+        ok=None marks a request cancelled after losing a hedge; its elapsed
+        time is only a lower bound, but still pushes the mirror down the ranking.
+        """
+        if ok is None:
+            sample, outcome = latency, 'cancelled'
+        elif ok:
+            sample, outcome = latency, 'ok'
+        else:
+            sample, outcome = max(latency, self.timeout), 'failed'
+
+        with self._lock:
+            previous = self._latency.get(url)
+            self._latency[url] = sample if previous is None else (
+                self.alpha * sample + (1 - self.alpha) * previous
+            )
+            counts = self._counts.setdefault(url, {'ok': 0, 'failed': 0, 'cancelled': 0})
+            counts[outcome] += 1
+
+    def get_mirror_stats(self) -> Dict[str, Dict[str, float]]:
+        """Latency estimate and counters per mirror"""
+        with self._lock:
+            return {
+                url: {
+                    'latency': round(self._latency[url], 3) if url in self._latency else None,
+                    **self._counts.get(url, {'ok': 0, 'failed': 0, 'cancelled': 0}),
+                }
+                for url in self.urls
+            }
+
+    def _next_delay(self, url: str) -> float:
+        """Seconds to wait on a mirror before hedging to the next one"""
+        with self._lock:
+            latency = self._latency.get(url)
+        if latency is not None and latency >= self.slow_latency:
+            return 0.0
+        return self.hedge_delay
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def post(self, query: str) -> Optional[dict]:
+        """POST a query and return the parsed JSON, or None if every mirror failed"""
+        urls = self.ranked_urls()
+        if not self.hedge:
+            for url in urls:
+                data = self._attempt(url, query)
+                if data is not None:
+                    return data
+            print(f"  ❌ All {len(urls)} Overpass servers failed")
+            return None
+
+        pending = {}
+        remaining = list(urls)
+        failed = False
+
+        while remaining or pending:
+            if remaining and (not pending or failed or self._hedge_due(pending)):
+                failed = False
+                url = remaining.pop(0)
+                if pending:
+                    print(f"  🔀 Hedging Overpass query to {self._label(url)}...")
+                pending[self._executor.submit(self._attempt, url, query)] = (url, time.time())
+
+            delay = self._next_delay(self._newest(pending)) if remaining else None
+            done, _ = wait(list(pending), timeout=self._wait_time(pending, delay),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.pop(future)
+                data = future.result()
+                if data is not None:
+                    # Requests already in flight finish in the background
+                    # (their latency is still recorded); queued ones are dropped
+                    for other in pending:
+                        other.cancel()
+                    return data
+                failed = True
+
+        print(f"  ❌ All {len(urls)} Overpass servers failed")
+        return None
+
+    def _attempt(self, url: str, query: str) -> Optional[dict]:
+        """One request to one mirror; records its latency"""
+        started = time.time()
+        try:
+            response = http_session.post(url, data=query, headers=self.headers, timeout=self.timeout)
+            if response.status_code == 200:
+                data = self._parse(url, response)
+                if data is not None:
+                    self.record(url, time.time() - started, ok=True)
+                    print(f"  ✅ {self._label(url)} answered in {time.time() - started:.1f}s")
+                    return data
+                self.record(url, time.time() - started, ok=False)
+                return None
+
+            print(f"  ⚠️  {self._label(url)} error {response.status_code}")
+        except requests.exceptions.Timeout:
+            print(f"  ⚠️  {self._label(url)} timeout")
+        except Exception as e:
+            print(f"  ⚠️  {self._label(url)} error: {str(e)[:50]}")
+
+        self.record(url, time.time() - started, ok=False)
+        return None
+
+    # ------------------------------------------------------------------
+    # Async
+    # ------------------------------------------------------------------
+
+    async def post_async(self, query: str) -> Optional[dict]:
+        """Async variant of post; losing requests are cancelled"""
+        urls = self.ranked_urls()
+        if not self.hedge:
+            for url in urls:
+                data = await self._attempt_async(url, query)
+                if data is not None:
+                    return data
+            print(f"  ❌ All {len(urls)} Overpass servers failed")
+            return None
+
+        pending = {}
+        remaining = list(urls)
+
+        failed = False
+
+        try:
+            while remaining or pending:
+                if remaining and (not pending or failed or self._hedge_due(pending)):
+                    failed = False
+                    url = remaining.pop(0)
+                    if pending:
+                        print(f"  🔀 Hedging Overpass query to {self._label(url)}...")
+                    task = asyncio.ensure_future(self._attempt_async(url, query))
+                    pending[task] = (url, time.time())
+
+                delay = self._next_delay(self._newest(pending)) if remaining else None
+                done, _ = await asyncio.wait(list(pending),
+                                             timeout=self._wait_time(pending, delay),
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    pending.pop(task)
+                    data = task.result()
+                    if data is not None:
+                        return data
+                    failed = True
+        finally:
+            for task in pending:
+                task.cancel()
+
+        print(f"  ❌ All {len(urls)} Overpass servers failed")
+        return None
+
+    async def _attempt_async(self, url: str, query: str) -> Optional[dict]:
+        """Async variant of _attempt"""
+        started = time.time()
+        try:
+            response = await async_http.post(url, data=query, headers=self.headers,
+                                             timeout=self.timeout)
+            if response.status_code == 200:
+                data = self._parse(url, response)
+                if data is not None:
+                    self.record(url, time.time() - started, ok=True)
+                    print(f"  ✅ {self._label(url)} answered in {time.time() - started:.1f}s")
+                    return data
+                self.record(url, time.time() - started, ok=False)
+                return None
+
+            print(f"  ⚠️  {self._label(url)} error {response.status_code}")
+        except asyncio.CancelledError:
+            self.record(url, time.time() - started, ok=None)
+            raise
+        except Exception as e:
+            print(f"  ⚠️  {self._label(url)} error: {str(e)[:50] or type(e).__name__}")
+
+        self.record(url, time.time() - started, ok=False)
+        return None
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _parse(self, url: str, response) -> Optional[dict]:
+        """JSON body of a 200, or None if it is unparsable or carries an Overpass remark"""
+        try:
+            data = response.json()
+        except ValueError:
+            print(f"  ⚠️  {self._label(url)} returned invalid JSON")
+            return None
+        if not isinstance(data, dict):
+            print(f"  ⚠️  {self._label(url)} returned unexpected JSON")
+            return None
+        if data.get('remark'):
+            print(f"  ⚠️  {self._label(url)} remark: {str(data['remark'])[:60]}")
+            return None
+        return data
+
+    @staticmethod
+    def _newest(pending: dict) -> Optional[str]:
+        if not pending:
+            return None
+        return max(pending.values(), key=lambda item: item[1])[0]
+
+    def _hedge_due(self, pending: dict) -> bool:
+        """True once the newest in-flight request has waited its hedge delay"""
+        url, started = max(pending.values(), key=lambda item: item[1])
+        return time.time() - started >= self._next_delay(url)
+
+    def _wait_time(self, pending: dict, delay: Optional[float]) -> Optional[float]:
+        """How long to wait for a response before launching the next hedge"""
+        if delay is None:
+            return None
+        newest_started = max(started for _, started in pending.values())
+        return max(newest_started + delay - time.time(), 0)
+
+    def _label(self, url: str) -> str:
+        return f"Server {self.urls.index(url) + 1}/{len(self.urls)}" if url in self.urls else url
+
+
+# Global instance
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_overpass_client() -> OverpassClient:
+    """Get global Overpass client instance"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OverpassClient(
+                hedge=os.getenv('OVERPASS_HEDGE', 'true').lower() in ('1', 'true', 'yes'),
+                hedge_delay=float(os.getenv('OVERPASS_HEDGE_DELAY', '2.0')),
+                slow_latency=float(os.getenv('OVERPASS_HEDGE_SLOW_LATENCY', '8.0')),
+                timeout=float(os.getenv('OVERPASS_TIMEOUT', '30'))
+            )
+    return _client
@@ -0,0 +1,410 @@
+"""
+POI Fetcher Module
+One combined Overpass query per destination, shared by the hotel,
+restaurant and activity agents
+
+Each agent used to POST its own Overpass query over nearly the same bbox
+(each with its own mirror failover and rate-limit sleep). The fetcher builds
+a single union query with one output block per category, runs it once
+(concurrent callers for the same destination wait for the same request) and
+hands every agent the elements for its category in the usual Overpass JSON
+shape, so the agents' existing _parse_overpass_results work unchanged.
+
+Results are cached per grid tile on disk (see overpass_cache); only tiles
+that are not cached yet are put into the query. Responses carrying an
+Overpass `remark` (server-side timeout or out of memory) are treated as
+failures, and a tile whose block hit TILE_LIMIT is used for the current
+bundle but not cached, since it may be missing POIs. Destinations inside an area
+ingested into the local POI store (see poi_store) are served from it without
+any HTTP; with POI_STORE_OFFLINE=true Overpass is never called.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from overpass_client import OverpassClient, get_overpass_client
+from overpass_cache import OverpassTileCache, Tile, get_tile_cache
+
+
+# Category → (tag key, tag values)
+HOTEL_TAGS = ('tourism', ['hotel', 'guest_house', 'hostel'])
+RESTAURANT_TAGS = ('amenity', ['restaurant'])
+ACTIVITY_TAGS = ('tourism', ['museum', 'attraction', 'viewpoint', 'park', 'theatre', 'arts_centre'])
+
+CATEGORY_TAGS = {
+    'hotels': HOTEL_TAGS,
+    'restaurants': RESTAURANT_TAGS,
+    'activities': ACTIVITY_TAGS,
+}
+
+
+def tag_set_key(category: str) -> str:
+    """Cache key for a category's tag set, e.g. 'tourism=hotel|guest_house|hostel'"""
+    key, values = CATEGORY_TAGS[category]
+    return f"{key}={'|'.join(values)}"
+
+
+@dataclass
+class POIBundle:
+    """Raw Overpass elements for one destination, split by category"""
+    center_lat: float
+    center_lon: float
+    hotels: List[dict] = field(default_factory=list)
+    restaurants: List[dict] = field(default_factory=list)
+    activities: List[dict] = field(default_factory=list)
+    fetched_at: float = 0.0
+    partial: List[str] = field(default_factory=list)  # Categories with tiles that could not be fetched
+
+    def as_overpass(self, category: str, radius_km: Optional[float] = None) -> dict:
+        """
+        Elements for a category in Overpass response shape ({'elements': [...]}),
+        optionally narrowed to a square of radius_km around the center
+        """
+        elements = getattr(self, category)
+        if radius_km is not None:
+            offset = radius_km / 111.0
+            elements = [e for e in elements
+                        if abs(_element_lat(e) - self.center_lat) <= offset
+                        and abs(_element_lon(e) - self.center_lon) <= offset]
+        return {'elements': elements}
+
+
+def _element_lat(element: dict) -> float:
+    if 'lat' in element:
+        return element['lat']
+    return element.get('center', {}).get('lat', 0.0)
+
+
+def _element_lon(element: dict) -> float:
+    if 'lon' in element:
+        return element['lon']
+    return element.get('center', {}).get('lon', 0.0)
+
+
+def classify_element(element: dict) -> Optional[str]:
+    """Return the category ('hotels', 'restaurants', 'activities') for an element"""
+    tags = element.get('tags', {})
+    for category, (key, values) in CATEGORY_TAGS.items():
+        if tags.get(key) in values:
+            return category
+    return None
+
+
+class POIFetcher:
+    """Runs the combined Overpass query and shares the result between agents"""
+
+    # Per-category search radius (km) and output cap per tile
+    RADIUS_KM = {'hotels': 10.0, 'restaurants': 5.0, 'activities': 10.0}
+    TILE_LIMIT = {'hotels': 10, 'restaurants': 20, 'activities': 20}
+    # Closest POIs per category taken from the local store
+    STORE_LIMIT = {'hotels': 50, 'restaurants': 100, 'activities': 100}
+
+    def __init__(self, ttl_seconds: float = 600, tile_cache: Optional[OverpassTileCache] = None,
+                 client: Optional[OverpassClient] = None, store=None, offline: bool = False):
+        self.client = client or get_overpass_client()
+        self.ttl_seconds = ttl_seconds
+        self.tile_cache = tile_cache
+        self.store = store  # poi_store.POIStore; defaults to get_poi_store()
+        self.offline = offline
+
+        self._bundles: Dict[Tuple[float, float], POIBundle] = {}
+        self._pinned: Dict[Tuple[float, float], float] = {}  # Primed bundles (warm-up) → expiry time
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[float, float], threading.Event] = {}
+        self._async_inflight: Dict[Tuple[float, float], "asyncio.Future"] = {}
+
+        self.stats = {'requests': 0, 'shared': 0, 'failures': 0, 'store_hits': 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def fetch(self, lat: float, lon: float) -> Optional[POIBundle]:
+        """Get the POI bundle around (lat, lon), or None if every mirror (or the tile cache) failed"""
+        key = self._key(lat, lon)
+
+        bundle = self._cached(key)
+        if bundle:
+            return bundle
+        local, remaining = self._from_store(key, lat, lon)
+        if not remaining:
+            return local
+
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._inflight[key] = event
+
+        if not owner:
+            event.wait(timeout=60)
+            return self._cached(key)
+
+        try:
+            tiles, missing = self._lookup_tiles(lat, lon, remaining)
+            data = self._post_query(self.build_query(missing)) if missing else None
+            return self._store(key, lat, lon, tiles, missing, data, local)
+        except Exception as e:
+            print(f"  ⚠️ POI fetch error: {str(e)[:50]}")
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    async def fetch_async(self, lat: float, lon: float) -> Optional[POIBundle]:
+        """Async variant of fetch using the shared non-blocking HTTP client"""
+        key = self._key(lat, lon)
+
+        bundle = self._cached(key)
+        if bundle:
+            return bundle
+        local, remaining = self._from_store(key, lat, lon)
+        if not remaining:
+            return local
+
+        pending = self._async_inflight.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[key] = future
+        try:
+            tiles, missing = self._lookup_tiles(lat, lon, remaining)
+            data = await self._post_query_async(self.build_query(missing)) if missing else None
+            bundle = self._store(key, lat, lon, tiles, missing, data, local)
+            future.set_result(bundle)
+            return bundle
+        except Exception as e:
+            future.set_result(None)
+            print(f"  ⚠️ POI fetch error: {str(e)[:50]}")
+            return None
+        finally:
+            self._async_inflight.pop(key, None)
+
+    def prime(self, bundle: POIBundle, max_age_seconds: Optional[float] = None):
+        """
+        Serve a prebuilt bundle (e.g. from a warm-up job) for its center until
+        max_age_seconds after its fetched_at (no expiry if None)
+        """
+        key = self._key(bundle.center_lat, bundle.center_lon)
+        expires_at = float('inf') if max_age_seconds is None else bundle.fetched_at + max_age_seconds
+        with self._lock:
+            self._bundles[key] = bundle
+            self._pinned[key] = expires_at
+
+    def build_query(self, missing: List[Tuple[str, Tile]]) -> str:
+        """Build the union query: one bbox + output block per (category, tile)"""
+        blocks = []
+        for category, tile in missing:
+            key, values = CATEGORY_TAGS[category]
+            south, west, north, east = self._tile_bbox(tile)
+            bbox = f"{south},{west},{north},{east}"
+            if len(values) == 1:
+                selector = f'["{key}"="{values[0]}"]'
+            else:
+                selector = f'["{key}"~"^({"|".join(values)})$"]'
+            blocks.append(f"""(
+  node{selector}({bbox});
+  way{selector}({bbox});
+);
+out center {self.TILE_LIMIT[category]};""")
+
+        return "[out:json][timeout:25];\n" + "\n".join(blocks) + "\n"
+
+    def get_stats(self) -> Dict[str, int]:
+        """Request/sharing counters"""
+        return dict(self.stats)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(lat: float, lon: float) -> Tuple[float, float]:
+        """Snap the center to ~100 m so every agent's geocode maps to one bundle"""
+        return (round(lat, 3), round(lon, 3))
+
+    def _cached(self, key: Tuple[float, float]) -> Optional[POIBundle]:
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is None:
+                return None
+            now = time.time()
+            expires_at = self._pinned.get(key)
+            if expires_at is not None and now > expires_at:
+                del self._pinned[key]
+                expires_at = None
+            if expires_at is not None or now - bundle.fetched_at <= self.ttl_seconds:
+                self.stats['shared'] += 1
+                return bundle
+        return None
+
+    def _from_store(self, key: Tuple[float, float], lat: float,
+                    lon: float) -> Tuple[Optional[POIBundle], List[str]]:
+        """
+        Bundle of the categories the local POI store covers at (lat, lon)
+        (all of them when offline) and the categories left to fetch. A
+        complete bundle is cached like a fetched one.
+        """
+        categories = list(CATEGORY_TAGS)
+        if self.store is None:
+            from poi_store import get_poi_store
+            self.store = get_poi_store()
+        if self.store is None:
+            return None, [] if self.offline else categories
+
+        started = time.perf_counter()
+        try:
+            covered = categories if self.offline else [c for c in categories if self.store.covers(lat, lon, c)]
+            if not covered:
+                return None, categories
+            bundle = self.store.bundle(lat, lon, self.RADIUS_KM, self.STORE_LIMIT, covered)
+        except Exception as e:
+            print(f"  ⚠️ POI store error: {str(e)[:50]}")
+            return None, [] if self.offline else categories
+        counts = ', '.join(f"{len(getattr(bundle, c))} {c}" for c in covered)
+        print(f"  🗄️ POIs from local store: {counts} ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        remaining = [c for c in categories if c not in covered]
+        with self._lock:
+            if not remaining:
+                self._bundles[key] = bundle
+            self.stats['store_hits'] += 1
+        return bundle, remaining
+
+    def _category_bbox(self, category: str, lat: float, lon: float) -> Tuple[float, float, float, float]:
+        offset = self.RADIUS_KM[category] / 111.0
+        return (lat - offset, lon - offset, lat + offset, lon + offset)
+
+    def _tile_bbox(self, tile: Tile) -> Tuple[float, float, float, float]:
+        return self._tiles().tile_bbox(tile)
+
+    def _tiles(self) -> OverpassTileCache:
+        if self.tile_cache is None:
+            self.tile_cache = get_tile_cache()
+        return self.tile_cache
+
+    def _lookup_tiles(self, lat: float, lon: float, categories: Iterable[str] = tuple(CATEGORY_TAGS)
+                      ) -> Tuple[Dict[Tuple[str, Tile], List[dict]], List[Tuple[str, Tile]]]:
+        """Cached elements by (category, tile) and the (category, tile) pairs still missing"""
+        cache = self._tiles()
+        tiles = {}
+        missing = []
+        for category in categories:
+            cached, category_missing = cache.get_many(
+                tag_set_key(category), cache.tiles_for_bbox(*self._category_bbox(category, lat, lon))
+            )
+            for tile, elements in cached.items():
+                tiles[(category, tile)] = elements
+            missing.extend((category, tile) for tile in category_missing)
+
+        if missing:
+            print(f"  🗺️ POI tiles: {len(tiles)} cached, {len(missing)} to fetch")
+        else:
+            print(f"  🗺️ POI tiles: all {len(tiles)} served from cache")
+        return tiles, missing
+
+    def _split_response(self, data: dict, missing: List[Tuple[str, Tile]]) -> Dict[Tuple[str, Tile], List[dict]]:
+        """Assign response elements to the (category, tile) they fall in"""
+        cache = self._tiles()
+        fetched = {pair: [] for pair in missing}
+        seen = set()
+        for element in data.get('elements', []):
+            element_key = (element.get('type'), element.get('id'))
+            if element_key in seen:
+                continue
+            seen.add(element_key)
+
+            category = classify_element(element)
+            if category is None:
+                continue
+            pair = (category, cache.tile_for_point(_element_lat(element), _element_lon(element)))
+            if pair in fetched:
+                fetched[pair].append(element)
+        return fetched
+
+    def _store(self, key: Tuple[float, float], lat: float, lon: float,
+               tiles: Dict[Tuple[str, Tile], List[dict]], missing: List[Tuple[str, Tile]],
+               data: Optional[dict], local: Optional[POIBundle] = None) -> Optional[POIBundle]:
+        """
+        Cache fetched tiles and assemble the bundle from every tile in range
+        (on top of the categories already served by the local store)
+        """
+        if missing:
+            if data is not None and data.get('remark'):
+                print(f"  ⚠️ Overpass remark: {str(data['remark'])[:80]}")
+                data = None  # Empty or partial result; cache nothing from it
+            if data is None:
+                self.stats['failures'] += 1
+                if not tiles and local is None:
+                    return None
+                print(f"  ⚠️ Using {len(tiles)} cached tiles only")
+            else:
+                cache = self._tiles()
+                truncated = 0
+                for (category, tile), elements in self._split_response(data, missing).items():
+                    if len(elements) >= self.TILE_LIMIT[category]:
+                        truncated += 1  # Cut short by `out center N`; refetch next time
+                    else:
+                        cache.put(tag_set_key(category), tile, elements)
+                    tiles[(category, tile)] = elements
+                if truncated:
+                    print(f"  🗺️ {truncated} tiles hit the per-tile limit and were not cached")
+
+        bundle = POIBundle(center_lat=lat, center_lon=lon, fetched_at=time.time())
+        if missing and data is None:
+            bundle.partial = sorted({category for category, _ in missing})
+        if local is not None:
+            for category in CATEGORY_TAGS:
+                setattr(bundle, category, list(getattr(local, category)))
+        seen = set()
+        for (category, tile), elements in tiles.items():
+            south, west, north, east = self._category_bbox(category, lat, lon)
+            for element in elements:
+                element_key = (element.get('type'), element.get('id'))
+                if element_key in seen:
+                    continue
+                if south <= _element_lat(element) <= north and west <= _element_lon(element) <= east:
+                    seen.add(element_key)
+                    getattr(bundle, category).append(element)
+
+        print(f"  ✓ POIs: {len(bundle.hotels)} hotels, {len(bundle.restaurants)} restaurants, "
+              f"{len(bundle.activities)} attractions")
+
+        with self._lock:
+            self._bundles[key] = bundle
+            self._pinned.pop(key, None)
+        return bundle
+
+    def _post_query(self, query: str) -> Optional[dict]:
+        """POST the union query (hedged across mirrors, see overpass_client)"""
+        self.stats['requests'] += 1
+        print(f"  🔍 Querying Overpass (combined POI query)...")
+        return self.client.post(query)
+
+    async def _post_query_async(self, query: str) -> Optional[dict]:
+        """Async variant of _post_query"""
+        self.stats['requests'] += 1
+        return await self.client.post_async(query)
+
+
+# Global instance
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_poi_fetcher() -> POIFetcher:
+    """Get global POI fetcher instance"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = POIFetcher(
+                ttl_seconds=float(os.getenv('POI_FETCH_TTL', '600')),
+                offline=os.getenv('POI_STORE_OFFLINE', 'false').lower() in ('1', 'true', 'yes')
+            )
+    return _fetcher
@@ -0,0 +1,435 @@
+"""
+POI Store Module
+Local SQLite database of OSM points of interest with an R-tree index
+
+Production planning can't depend on public Overpass mirrors for every
+request. This store holds hotels, restaurants and attractions loaded ahead
+of time from OSM extracts (.osm XML, optionally .gz/.bz2) or saved Overpass
+JSON dumps:
+
+    python poi_store.py ingest karnataka.osm.bz2 mumbai_overpass.json
+    python poi_store.py query 12.9716 77.5946 --category restaurants --radius 2
+    python poi_store.py stats
+
+Each POI keeps its raw tags and is indexed three ways:
+- pois_rtree: an R-tree over its position, for bounding-box search
+- pois.category: an index on the category
+- poi_tags(key, value): an index over every tag, e.g. cuisine=south_indian
+
+Queries return elements in Overpass JSON shape, so the agents'
+_parse_overpass_results map rows exactly as they map live responses.
+Coverage is recorded per source and category: a source covers a category
+only if it held POIs of it, over its declared bounds (else their extent).
+POIFetcher serves each category from the store when the destination lies
+inside an area covered for it, and fetches the rest as usual (see
+get_poi_store). With POI_STORE_OFFLINE it never calls Overpass at all.
+
+PBF extracts need converting first (e.g. `osmium cat city.osm.pbf -o
+city.osm`).
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from poi_fetcher import CATEGORY_TAGS, POIBundle, classify_element
+
+BBox = Tuple[float, float, float, float]  # south, west, north, east
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pois (
+    id INTEGER PRIMARY KEY,
+    osm_type TEXT NOT NULL,
+    osm_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    name TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    UNIQUE (osm_type, osm_id)
+);
+CREATE INDEX IF NOT EXISTS pois_category ON pois (category);
+CREATE VIRTUAL TABLE IF NOT EXISTS pois_rtree USING rtree (id, min_lat, max_lat, min_lon, max_lon);
+CREATE TABLE IF NOT EXISTS poi_tags (
+    poi_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS poi_tags_key_value ON poi_tags (key, value);
+CREATE INDEX IF NOT EXISTS poi_tags_poi ON poi_tags (poi_id);
+CREATE TABLE IF NOT EXISTS coverage (
+    source TEXT NOT NULL,
+    category TEXT NOT NULL,
+    south REAL NOT NULL, west REAL NOT NULL, north REAL NOT NULL, east REAL NOT NULL,
+    pois INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (source, category)
+);
+"""
+
+
+# ----------------------------------------------------------------------
+# Readers: yield Overpass-shaped elements ({'type', 'id', 'lat'/'lon' or 'center', 'tags'})
+# ----------------------------------------------------------------------
+
+def _open(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_overpass_json(path: str) -> Tuple[Iterator[dict], Optional[BBox]]:
+    """Elements of a saved Overpass JSON response (no declared bounds)"""
+    with _open(path) as f:
+        data = json.load(f)
+    return iter(data.get('elements', [])), None
+
+
+def _iter_osm(path: str) -> Iterator[ET.Element]:
+    """Top-level elements of an OSM XML file, each cleared (with the root) once the caller is done"""
+    with _open(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'end' and elem.tag in ('bounds', 'node', 'way', 'relation'):
+                yield elem
+                elem.clear()
+                root.clear()
+
+
+def _osm_tags(elem: ET.Element) -> Dict[str, str]:
+    return {t.get('k'): t.get('v') for t in elem.iter('tag')}
+
+
+def read_osm_xml(path: str) -> Tuple[Iterator[dict], Optional[BBox]]:
+    """
+    Tagged nodes and ways of an OSM XML extract; ways get the mean of their
+    nodes' positions as center
+
+    Streams the file twice so memory stays flat on regional extracts: the
+    first pass finds the bounds and the nodes that POI ways reference, the
+    second yields elements, keeping coordinates only for those nodes.
+    """
+    bounds = None
+    wanted = set()
+    for elem in _iter_osm(path):
+        if elem.tag == 'bounds':
+            bounds = tuple(float(elem.get(k)) for k in ('minlat', 'minlon', 'maxlat', 'maxlon'))
+        elif elem.tag == 'way':
+            tags = _osm_tags(elem)
+            if tags and classify_element({'tags': tags}):
+                wanted.update(int(nd.get('ref')) for nd in elem.iter('nd'))
+    return _read_osm_elements(path, wanted), bounds
+
+
+def _read_osm_elements(path: str, wanted: set) -> Iterator[dict]:
+    node_coords: Dict[int, Tuple[float, float]] = {}
+    for elem in _iter_osm(path):
+        if elem.tag == 'node':
+            node_id = int(elem.get('id'))
+            lat, lon = float(elem.get('lat')), float(elem.get('lon'))
+            if node_id in wanted:
+                node_coords[node_id] = (lat, lon)
+            tags = _osm_tags(elem)
+            if tags and classify_element({'tags': tags}):
+                yield {'type': 'node', 'id': node_id, 'lat': lat, 'lon': lon, 'tags': tags}
+        elif elem.tag == 'way':
+            tags = _osm_tags(elem)
+            if tags and classify_element({'tags': tags}):
+                points = [node_coords[ref] for ref in (int(nd.get('ref')) for nd in elem.iter('nd'))
+                          if ref in node_coords]
+                if points:
+                    center = {'lat': sum(p[0] for p in points) / len(points),
+                              'lon': sum(p[1] for p in points) / len(points)}
+                    yield {'type': 'way', 'id': int(elem.get('id')), 'center': center, 'tags': tags}
+
+
+def read_source(path: str) -> Tuple[Iterator[dict], Optional[BBox]]:
+    """Pick the reader from the file name"""
+    name = path.lower()
+    for suffix in ('.gz', '.bz2'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    if name.endswith('.json'):
+        return read_overpass_json(path)
+    if name.endswith('.osm') or name.endswith('.xml'):
+        return read_osm_xml(path)
+    raise ValueError(f"unsupported POI source {path!r} (expected .json, .osm or .xml, optionally .gz/.bz2)")
+
+
+def _position(element: dict) -> Optional[Tuple[float, float]]:
+    if 'lat' in element and 'lon' in element:
+        return float(element['lat']), float(element['lon'])
+    center = element.get('center')
+    if center and 'lat' in center and 'lon' in center:
+        return float(center['lat']), float(center['lon'])
+    bounds = element.get('bounds')  # `out geom` / `out bb` ways
+    if bounds:
+        return ((bounds['minlat'] + bounds['maxlat']) / 2, (bounds['minlon'] + bounds['maxlon']) / 2)
+    return None
+
+
+class POIStore:
+    """SQLite POI database with an R-tree position index and a tag index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._coverage: Optional[List[Tuple[str, float, float, float, float]]] = None
+        self.stats = {'queries': 0, 'elements': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        legacy = self._db.execute("PRAGMA table_info(coverage)").fetchall()
+        if legacy and 'category' not in [column[1] for column in legacy]:
+            self._db.execute("ALTER TABLE coverage RENAME TO coverage_legacy")
+        self._db.executescript(SCHEMA)
+        if legacy and 'category' not in [column[1] for column in legacy]:
+            self._migrate_coverage()
+        self._db.commit()
+
+    def _migrate_coverage(self):
+        """Split source-wide coverage rows into one row per category that has POIs in the area"""
+        self._db.execute(
+            "INSERT OR REPLACE INTO coverage "
+            "SELECT c.source, p.category, c.south, c.west, c.north, c.east, COUNT(*), c.ingested_at "
+            "FROM coverage_legacy c JOIN pois p "
+            "ON p.lat BETWEEN c.south AND c.north AND p.lon BETWEEN c.west AND c.east "
+            "GROUP BY c.source, p.category"
+        )
+        self._db.execute("DROP TABLE coverage_legacy")
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def ingest(self, elements: Iterable[dict], source: str, bounds: Optional[BBox] = None) -> int:
+        """
+        Upsert the named hotel/restaurant/attraction elements and record the
+        covered area per category present (bounds, else that category's
+        extent). Returns the POI count.
+        """
+        count = 0
+        extents: Dict[str, List[float]] = {}  # category -> [south, west, north, east, pois]
+        with self._lock:
+            cursor = self._db.cursor()
+            cursor.execute("BEGIN")
+            try:
+                for element in elements:
+                    tags = element.get('tags') or {}
+                    category = classify_element(element)
+                    position = _position(element)
+                    if category is None or position is None or not tags.get('name'):
+                        continue
+                    lat, lon = position
+                    osm_type, osm_id = element.get('type', 'node'), int(element['id'])
+
+                    existing = cursor.execute("SELECT id FROM pois WHERE osm_type = ? AND osm_id = ?",
+                                              (osm_type, osm_id)).fetchone()
+                    if existing:
+                        self._delete(cursor, existing[0])
+                    cursor.execute(
+                        "INSERT INTO pois (osm_type, osm_id, category, lat, lon, name, tags) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (osm_type, osm_id, category, lat, lon, tags['name'],
+                         json.dumps(tags, ensure_ascii=False, separators=(',', ':')))
+                    )
+                    poi_id = cursor.lastrowid
+                    cursor.execute("INSERT INTO pois_rtree VALUES (?, ?, ?, ?, ?)", (poi_id, lat, lat, lon, lon))
+                    cursor.executemany("INSERT INTO poi_tags (poi_id, key, value) VALUES (?, ?, ?)",
+                                       [(poi_id, k, str(v)) for k, v in tags.items()])
+
+                    count += 1
+                    extent = extents.setdefault(category, [math.inf, math.inf, -math.inf, -math.inf, 0])
+                    extent[0], extent[2] = min(extent[0], lat), max(extent[2], lat)
+                    extent[1], extent[3] = min(extent[1], lon), max(extent[3], lon)
+                    extent[4] += 1
+
+                cursor.execute("DELETE FROM coverage WHERE source = ?", (source,))
+                now = time.time()
+                cursor.executemany("INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [(source, category, *(bounds or extent[:4]), extent[4], now)
+                                    for category, extent in extents.items()])
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            self._coverage = None
+        return count
+
+    def ingest_file(self, path: str) -> int:
+        elements, bounds = read_source(path)
+        return self.ingest(elements, os.path.abspath(path), bounds)
+
+    @staticmethod
+    def _delete(cursor: sqlite3.Cursor, poi_id: int):
+        cursor.execute("DELETE FROM pois WHERE id = ?", (poi_id,))
+        cursor.execute("DELETE FROM pois_rtree WHERE id = ?", (poi_id,))
+        cursor.execute("DELETE FROM poi_tags WHERE poi_id = ?", (poi_id,))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def covers(self, lat: float, lon: float, category: str) -> bool:
+        """Whether (lat, lon) lies inside an area ingested for category"""
+        with self._lock:
+            if self._coverage is None:
+                self._coverage = self._db.execute(
+                    "SELECT category, south, west, north, east FROM coverage").fetchall()
+            coverage = self._coverage
+        return any(c == category and s <= lat <= n and w <= lon <= e for c, s, w, n, e in coverage)
+
+    def query(self, bbox: BBox, category: Optional[str] = None,
+              tags: Optional[Dict[str, str]] = None, near: Optional[Tuple[float, float]] = None,
+              limit: Optional[int] = None) -> List[dict]:
+        """
+        Elements inside bbox (optionally of a category and with every given
+        tag), closest to near first (default: the bbox center)
+        """
+        south, west, north, east = bbox
+        lat0, lon0 = near or ((south + north) / 2, (west + east) / 2)
+        # Squared equirectangular distance is enough for ordering
+        scale = math.cos(math.radians(lat0)) ** 2
+        # CROSS JOIN keeps the R-tree as the outer loop (else SQLite may scan by category)
+        sql = ["SELECT p.osm_type, p.osm_id, p.lat, p.lon, p.tags FROM pois_rtree r "
+               "CROSS JOIN pois p ON p.id = r.id "
+               "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?"]
+        params: List = [south, north, west, east]
+        if category:
+            sql.append("AND p.category = ?")
+            params.append(category)
+        for key, value in (tags or {}).items():
+            sql.append("AND p.id IN (SELECT poi_id FROM poi_tags WHERE key = ? AND value = ?)")
+            params += [key, value]
+        sql.append("ORDER BY (p.lat - ?) * (p.lat - ?) + (p.lon - ?) * (p.lon - ?) * ?")
+        params += [lat0, lat0, lon0, lon0, scale]
+        if limit:
+            sql.append("LIMIT ?")
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(' '.join(sql), params).fetchall()
+            self.stats['queries'] += 1
+            self.stats['elements'] += len(rows)
+
+        elements = []
+        for osm_type, osm_id, lat, lon, tags_json in rows:
+            element = {'type': osm_type, 'id': osm_id, 'tags': json.loads(tags_json)}
+            if osm_type == 'node':
+                element.update(lat=lat, lon=lon)
+            else:
+                element['center'] = {'lat': lat, 'lon': lon}
+            elements.append(element)
+        return elements
+
+    def bundle(self, lat: float, lon: float, radius_km: Dict[str, float],
+               limit: Optional[Dict[str, int]] = None,
+               categories: Iterable[str] = tuple(CATEGORY_TAGS)) -> POIBundle:
+        """
+        POIBundle around (lat, lon), the same square per category that
+        POIFetcher queries (other categories are left empty)
+        """
+        bundle = POIBundle(center_lat=lat, center_lon=lon, fetched_at=time.time())
+        for category in categories:
+            offset = radius_km[category] / 111.0
+            bbox = (lat - offset, lon - offset, lat + offset, lon + offset)
+            setattr(bundle, category, self.query(bbox, category, near=(lat, lon),
+                                                 limit=(limit or {}).get(category)))
+        return bundle
+
+    def counts(self) -> Dict[str, int]:
+        """POIs per category"""
+        with self._lock:
+            return dict(self._db.execute("SELECT category, COUNT(*) FROM pois GROUP BY category").fetchall())
+
+    def sources(self) -> List[tuple]:
+        with self._lock:
+            return self._db.execute("SELECT source, category, south, west, north, east, pois, ingested_at "
+                                    "FROM coverage ORDER BY ingested_at, source, category").fetchall()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Query counters"""
+        return dict(self.stats)
+
+
+# Global instance
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_path() -> str:
+    return os.getenv('POI_STORE_PATH') or os.path.join(os.getenv('TRAVEL_CACHE_DIR', '.cache'), 'poi_store.sqlite')
+
+
+def get_poi_store() -> Optional[POIStore]:
+    """Get the global POI store, or None if nothing has been ingested (no database file)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = default_path()
+            if not os.path.exists(path):
+                return None
+            try:
+                _store = POIStore(path)
+            except sqlite3.Error as e:
+                print(f"  ⚠️ POI store unavailable ({e})")
+                return None
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OSM POI store")
+    parser.add_argument('--db', default=default_path(), help="Database path")
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest_cmd = commands.add_parser('ingest', help="Load .osm/.xml extracts or Overpass .json dumps")
+    ingest_cmd.add_argument('files', nargs='+')
+    query_cmd = commands.add_parser('query', help="POIs around a point")
+    query_cmd.add_argument('lat', type=float)
+    query_cmd.add_argument('lon', type=float)
+    query_cmd.add_argument('--radius', type=float, default=2.0, help="km")
+    query_cmd.add_argument('--category', choices=list(CATEGORY_TAGS))
+    query_cmd.add_argument('--tag', action='append', default=[], help="key=value, repeatable")
+    query_cmd.add_argument('--limit', type=int, default=20)
+    commands.add_parser('stats', help="POI counts and ingested sources")
+    args = parser.parse_args()
+
+    store = POIStore(args.db)
+    if args.command == 'ingest':
+        for path in args.files:
+            started = time.perf_counter()
+            count = store.ingest_file(path)
+            print(f"✅ {path}: {count} POIs ({time.perf_counter() - started:.1f}s)")
+        print(f"📦 {args.db}: {store.counts()}")
+    elif args.command == 'query':
+        offset = args.radius / 111.0
+        tags = dict(tag.split('=', 1) for tag in args.tag)
+        started = time.perf_counter()
+        elements = store.query((args.lat - offset, args.lon - offset, args.lat + offset, args.lon + offset),
+                               args.category, tags, near=(args.lat, args.lon), limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for element in elements:
+            lat, lon = _position(element)
+            print(f"  📍 {element['tags'].get('name')} ({classify_element(element)}) {lat:.5f}, {lon:.5f}")
+        print(f"✓ {len(elements)} POIs in {elapsed:.1f}ms")
+    else:
+        print(f"📦 {args.db}: {store.counts()}")
+        for source, category, south, west, north, east, pois, _ in store.sources():
+            print(f"  🗺️ {source} [{category}]: {pois} POIs in ({south:.3f}, {west:.3f}) - "
+                  f"({north:.3f}, {east:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Rate Limiter Module
+Process-wide token-bucket rate limiting keyed by upstream host
+
+Agents used to keep their own last_request_time and sleep in
+_apply_rate_limit, so three agents hitting the same host at once exceeded the
+host's real policy while a lone agent still waited for no reason. Every
+request made through http_session / async_http now takes a token from its
+host's bucket instead: requests within the burst allowance go out at once,
+and beyond it callers wait (time.sleep for threads, asyncio.sleep for
+coroutines) just long enough to stay within the host's rate.
+
+Rates are requests per second; override or add hosts with RATE_LIMITS, e.g.
+"nominatim.openstreetmap.org=1:1,maps.googleapis.com=10:20" (host=rate:burst).
+Hosts without a bucket are not limited.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+# host → (requests per second, burst)
+DEFAULT_LIMITS = {
+    'nominatim.openstreetmap.org': (1.0, 1),      # Nominatim usage policy: max 1 req/s
+    'overpass-api.de': (1.0, 2),
+    'lz4.overpass-api.de': (1.0, 2),
+    'overpass.kumi.systems': (1.0, 2),
+    'overpass.openstreetmap.ru': (1.0, 2),
+    'maps.googleapis.com': (10.0, 10),
+    'test.api.amadeus.com': (10.0, 10),
+    'app.ticketmaster.com': (5.0, 5),
+    'api.predicthq.com': (5.0, 5),
+    'api.openweathermap.org': (1.0, 5),           # 60 calls/minute on the free plan
+    'serpapi.com': (1.0, 2),
+    'www.numbeo.com': (0.5, 2),
+}
+
+
+class TokenBucket:
+    """Token bucket shared by threads and coroutines"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self) -> float:
+        """
+        Take a token and return how long the caller must wait before using it
+
+        The balance may go negative: each waiting caller holds a reservation,
+        so concurrent callers are spaced out instead of racing for one token.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self):
+        """Block the calling thread until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self.acquired,
+                'waited': self.waited,
+                'total_wait': round(self.total_wait, 3),
+                'max_wait': round(self.max_wait, 3),
+            }
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parse "host=rate:burst,host=rate" into a dict"""
+    limits = {}
+    for part in spec.split(','):
+        if '=' not in part:
+            continue
+        host, value = part.split('=', 1)
+        try:
+            rate, _, burst = value.partition(':')
+            limits[host.strip().lower()] = (float(rate), int(burst) if burst else 1)
+        except ValueError:
+            print(f"⚠️  Ignoring invalid RATE_LIMITS entry: {part.strip()}")
+    return limits
+
+
+class RateLimiter:
+    """Per-host token buckets"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.limits = dict(DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url_or_host: str) -> Optional[TokenBucket]:
+        """Bucket for a URL or host, or None if the host is not limited"""
+        host = (urlsplit(url_or_host).hostname if '://' in url_or_host else url_or_host) or ''
+        host = host.lower()
+        if host not in self.limits:
+            return None
+
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.limits[host]
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url_or_host: str):
+        """Wait (blocking) for the host's next request slot"""
+        bucket = self.bucket_for(url_or_host)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def acquire_async(self, url_or_host: str):
+        """Wait (non-blocking) for the host's next request slot"""
+        bucket = self.bucket_for(url_or_host)
+        if bucket is not None:
+            await bucket.acquire_async()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Wait-time metrics per host that has been used"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.get_stats() for host, bucket in buckets.items()}
+
+
+# Global instance
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get global rate limiter instance"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(_parse_limits(os.getenv('RATE_LIMITS', '')))
+    return _limiter
@@ -235,12 +235,15 @@ Handles Overpass 504 timeouts and ensures mock data works properly
 """
 
 import os
-import requests
 import random
-import time
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from gazetteer import get_gazetteer
+from geocoder import get_geocoder
+from poi_fetcher import POIBundle, get_poi_fetcher
+from scoring import Criterion, ScoringEngine
+
 
 @dataclass
 class RestaurantOption:
@@ -271,37 +274,15 @@ class RestaurantOption:
 class RestaurantAgent:
     """Restaurant Agent - FIXED to handle API timeouts"""
 
-    # City coordinates for mock data
-    CITY_COORDINATES = {
-        'tokyo': (35.6762, 139.6503),
-        'paris': (48.8566, 2.3522),
-        'london': (51.5074, -0.1278),
-        'new york': (40.7128, -74.0060),
-        'dubai': (25.2048, 55.2708),
-        'rome': (41.9028, 12.4964),
-        'barcelona': (41.3851, 2.1734),
-        'amsterdam': (52.3676, 4.9041),
-        'bangkok': (13.7563, 100.5018),
-        'sydney': (-33.8688, 151.2093),
-        'mangalore': (12.8698, 74.8430),
-        'bangalore': (12.9716, 77.5946),
-        'mumbai': (19.0760, 72.8777),
-        'delhi': (28.6139, 77.2090),
-    }
+    # rank_restaurants score: best rated first
+    RANKING = ScoringEngine(Criterion('rating', 1.0, scale=5.0))
 
     def __init__(self):
-        """Initialize restaurant agent with multiple Overpass servers"""
-        self.overpass_urls = [
-            "https://overpass-api.de/api/interpreter",
-            "https://overpass.kumi.systems/api/interpreter",
-            "https://lz4.overpass-api.de/api/interpreter",
-        ]
+        """Initialize restaurant agent"""
+        # Combined Overpass query shared with the hotel/activity agents
+        self.poi_fetcher = get_poi_fetcher()
         self.headers = {'User-Agent': 'TravelPlannerApp/1.0'}
-        self.nominatim_url = "https://nominatim.openstreetmap.org/search"
-        
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1.0
+        self.geocoder = get_geocoder()
 
     def _parse_cuisines(self, cuisine_str: str) -> List[str]:
         """Parse cuisine types"""
@@ -370,7 +351,45 @@ class RestaurantAgent:
             )
             print(f"   ✓ Generated {len(restaurants)} mock restaurants")
         
-        # Apply filters
+        return self._apply_filters(restaurants, dietary_restrictions, cuisine_preference,
+                                   max_price, min_rating, max_results)
+
+    async def search_restaurants_async(self,
+                                       location: str,
+                                       dietary_restrictions: Optional[List[str]] = None,
+                                       cuisine_preference: Optional[str] = None,
+                                       max_price: Optional[float] = None,
+                                       min_rating: float = 3.5,
+                                       max_results: int = 15) -> List[RestaurantOption]:
+        """
+        Async variant of search_restaurants using the shared non-blocking HTTP client
+        """
+        print(f"🔍 Searching restaurants in {location} (async)...")
+        
+        coords = await self._get_coordinates_async(location)
+        if not coords:
+            print(f"  ⚠️ Could not geocode {location}, using defaults")
+            coords = self._get_default_coords(location)
+        
+        lat, lon = coords
+        restaurants = await self._search_overpass_async(lat, lon, location, max_results)
+        
+        if not restaurants:
+            print(f"   ⚠️ No restaurants found (will use mock data)")
+            restaurants = self._generate_mock_restaurants(
+                location, max_results, coords=coords
+            )
+        
+        return self._apply_filters(restaurants, dietary_restrictions, cuisine_preference,
+                                   max_price, min_rating, max_results)
+
+    def _apply_filters(self, restaurants: List[RestaurantOption],
+                       dietary_restrictions: Optional[List[str]],
+                       cuisine_preference: Optional[str],
+                       max_price: Optional[float],
+                       min_rating: float,
+                       max_results: int) -> List[RestaurantOption]:
+        """Apply dietary/cuisine/price/rating filters and rank by rating"""
         if dietary_restrictions:
             restaurants = self._filter_by_dietary(restaurants, dietary_restrictions)
         
@@ -388,104 +407,38 @@ class RestaurantAgent:
         
         return restaurants[:max_results]
 
+    async def _get_coordinates_async(self, location: str) -> Optional[tuple]:
+        """Async variant of _get_coordinates"""
+        return await self.geocoder.geocode_async(location)
+
+    async def _search_overpass_async(self, lat: float, lon: float,
+                                     location: str, max_results: int) -> List[RestaurantOption]:
+        """Async variant of _search_overpass"""
+        bundle = await self.poi_fetcher.fetch_async(lat, lon)
+        return self._restaurants_from_bundle(bundle, location, max_results)
+
     def _get_coordinates(self, location: str) -> Optional[tuple]:
-        """Get coordinates from location name"""
-        try:
-            self._apply_rate_limit()
-            
-            params = {
-                'q': location,
-                'format': 'json',
-                'limit': 1
-            }
-            
-            response = requests.get(
-                self.nominatim_url,
-                params=params,
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    return (float(data[0]['lat']), float(data[0]['lon']))
-            
-            return None
-        except Exception as e:
-            print(f"  ⚠️ Geocoding error: {str(e)[:30]}")
-            return None
+        """Get coordinates from location name (via the shared cached geocoder)"""
+        return self.geocoder.geocode(location)
 
     def _get_default_coords(self, location: str) -> tuple:
-        """Get default coordinates for known cities"""
-        location_lower = location.lower()
-        for city, coords in self.CITY_COORDINATES.items():
-            if city in location_lower:
-                return coords
-        # Default to Tokyo if unknown
-        return self.CITY_COORDINATES['tokyo']
+        """Coordinates of a known city from the offline gazetteer (Tokyo if unknown)"""
+        gazetteer = get_gazetteer()
+        return gazetteer.coordinates(location) or gazetteer.coordinates('tokyo')
 
     def _search_overpass(self, lat: float, lon: float, 
                         location: str, max_results: int) -> List[RestaurantOption]:
-        """Search using Overpass API with improved timeout handling"""
-        
-        restaurants = []
-        
-        # Try each server
-        for server_idx, overpass_url in enumerate(self.overpass_urls, 1):
-            try:
-                self._apply_rate_limit()
-                
-                # SIMPLIFIED query to avoid timeouts
-                radius_km = 5  # Reduced from 10km to 5km
-                lat_offset = radius_km / 111.0
-                lon_offset = radius_km / 111.0
-                
-                bbox = (
-                    lat - lat_offset,
-                    lon - lon_offset,
-                    lat + lat_offset,
-                    lon + lon_offset
-                )
-                
-                # Simpler query - just restaurants, no complex filters
-                query = f"""[out:json][timeout:10];
-(
-  node["amenity"="restaurant"]({bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]});
-  way["amenity"="restaurant"]({bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]});
-);
-out center {max_results * 2};
-"""
-                
-                response = requests.post(
-                    overpass_url,
-                    data=query,
-                    headers=self.headers,
-                    timeout=15  # 15 second timeout
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    restaurants = self._parse_overpass_results(data, location)
-                    
-                    if restaurants:
-                        print(f"     ✓ Server {server_idx} succeeded")
-                        return restaurants[:max_results]
-                elif response.status_code == 504:
-                    print(f"     ⚠️ Server {server_idx} timeout (504)")
-                    continue
-                else:
-                    print(f"     ⚠️ Server {server_idx} error {response.status_code}")
-                    continue
-                    
-            except requests.Timeout:
-                print(f"     ⚠️ Server {server_idx} timeout")
-                continue
-            except Exception as e:
-                print(f"     ⚠️ Server {server_idx} error: {str(e)[:30]}")
-                continue
-        
-        return restaurants
+        """Get restaurants from the shared combined Overpass query (see poi_fetcher)"""
+        bundle = self.poi_fetcher.fetch(lat, lon)
+        return self._restaurants_from_bundle(bundle, location, max_results)
+
+    def _restaurants_from_bundle(self, bundle: Optional[POIBundle],
+                                 location: str, max_results: int) -> List[RestaurantOption]:
+        """Parse the restaurant elements of a POI bundle (within 5km of the center)"""
+        if bundle is None:
+            return []
+        restaurants = self._parse_overpass_results(bundle.as_overpass('restaurants', 5), location)
+        return restaurants[:max_results]
 
     def _parse_overpass_results(self, data: dict, location: str) -> List[RestaurantOption]:
         """Parse Overpass API results"""
@@ -627,13 +580,6 @@ out center {max_results * 2};
         
         return filtered if filtered else restaurants  # Return all if none match
 
-    def _apply_rate_limit(self):
-        """Apply rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
-
     def _estimate_price(self, cuisine: str) -> float:
         """Estimate price based on cuisine type"""
         price_map = {
@@ -690,12 +636,10 @@ out center {max_results * 2};
             return {'daily': tags['opening_hours']}
         return {'daily': '11:00-23:00'}
     
-    def rank_restaurants(self, restaurants: List[RestaurantOption]) -> List[RestaurantOption]:
-        """Rank restaurants"""
-        if not restaurants:
-            return []
-
-        restaurants.sort(key=lambda x: x.rating, reverse=True)
+    def rank_restaurants(self, restaurants: List[RestaurantOption],
+                         top_k: Optional[int] = None) -> List[RestaurantOption]:
+        """Rank restaurants in place (keeping only the best top_k when given)"""
+        restaurants[:] = self.RANKING.rank(restaurants, top_k)
         return restaurants
 
 
@@ -0,0 +1,94 @@
+"""
+Scoring Module
+Vectorized weighted scoring shared by the agents' rankers and the optimizer
+
+Every ranker (flights, accommodations, activities, restaurants) and the
+optimizer objective score a candidate the same way. Each criterion is
+either a "lower is better" value normalized as 1 - x / max(x) (price,
+duration, distance) or a value divided by a fixed scale (rating / 5,
+popularity). The weighted sum of the criteria is the score.
+
+ScoringEngine does this on NumPy columns for the whole candidate list at
+once, and picks the top k with a partial selection (np.partition) instead
+of a full sort. Ties keep their input order, exactly like a stable
+descending sort.
+"""
+
+from dataclasses import dataclass, replace
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Criterion:
+    """One weighted candidate attribute"""
+    attribute: str
+    weight: float
+    lower_is_better: bool = False  # Score 1 - x / max(x) (0 when max(x) <= 0)
+    scale: float = 1.0  # Otherwise score x / scale
+
+
+class ScoringEngine:
+    """Weighted sum of normalized criteria over NumPy columns"""
+
+    def __init__(self, *criteria: Criterion):
+        self.criteria = criteria
+
+    def with_weights(self, **weights: float) -> 'ScoringEngine':
+        """Same criteria with some weights replaced (keyed by attribute)"""
+        return ScoringEngine(*(replace(c, weight=weights.get(c.attribute, c.weight))
+                               for c in self.criteria))
+
+    def columns(self, items: Sequence[Any]) -> Dict[str, np.ndarray]:
+        """Criterion attributes of items as float columns"""
+        return {c.attribute: np.fromiter(map(attrgetter(c.attribute), items), dtype=float, count=len(items))
+                for c in self.criteria}
+
+    def scores(self, columns: Dict[str, np.ndarray], resolution: Optional[int] = None,
+               maxima: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Score of every row
+
+        resolution: truncate each criterion score to 1/resolution steps and
+            the weighted sum to an integer (the optimizer's integer objective)
+        maxima: normalizers for lower-is-better criteria instead of the
+            column maximum
+        """
+        total = None
+        for c in self.criteria:
+            values = np.asarray(columns[c.attribute], dtype=float)
+            if c.lower_is_better:
+                largest = (maxima or {}).get(c.attribute, values.max() if values.size else 0.0)
+                component = 1 - values / largest if largest > 0 else np.zeros_like(values)
+            else:
+                component = values / c.scale
+            if resolution:
+                component = np.trunc(component * resolution)
+            total = c.weight * component if total is None else total + c.weight * component
+        if total is None:
+            total = np.zeros(0)
+        return np.trunc(total).astype(np.int64) if resolution else total
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+        """Indices of the k best scores, best first; ties keep their input order"""
+        n = len(scores)
+        if k is None or k >= n:
+            return np.argsort(-scores, kind='stable')
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        chosen = np.concatenate([above, ties])
+        return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+    def rank(self, items: Sequence[Any], k: Optional[int] = None) -> List[Any]:
+        """items sorted by score, best first (only the top k when given)"""
+        if not items:
+            return []
+        order = self.top_k(self.scores(self.columns(items)), k)
+        return [items[i] for i in order]
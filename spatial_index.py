@@ -0,0 +1,197 @@
+"""
+Spatial Index Module
+Grid-bucket index over candidate POIs for radius and nearest-neighbour queries
+
+Hotels, restaurants and activities are projected once per plan onto a local
+flat grid (equirectangular projection around the candidates' mean latitude,
+accurate to well under 1% at city scale) and bucketed into cells of cell_km.
+A query only reads the cells that can hold an answer, then computes exact
+Haversine distances for those candidates in one NumPy pass:
+
+    index = CandidateIndex(accommodations=hotels, restaurants=restaurants, activities=activities)
+    index.nearest('restaurant', activity, k=3)      # 3 closest restaurants
+    index.within('activity', hotel, radius_km=5)    # everything within 5 km
+
+Items at (0, 0) have unknown coordinates and are never returned.
+
+The module also holds the shared Haversine helpers used by the agents.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance (km); arguments broadcast like NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(latitudes, longitudes) -> np.ndarray:
+    """Pairwise Haversine distances (km) between all points, in one NumPy pass"""
+    lat = np.asarray(latitudes, dtype=float)
+    lon = np.asarray(longitudes, dtype=float)
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+class SpatialIndex:
+    """Uniform grid over the coordinates of one list of items"""
+
+    def __init__(self, items: Sequence[Any], cell_km: float = 1.0):
+        self.items = list(items)
+        self.cell_km = cell_km
+        self.latitudes = np.fromiter((item.latitude or 0.0 for item in self.items), dtype=float,
+                                     count=len(self.items))
+        self.longitudes = np.fromiter((item.longitude or 0.0 for item in self.items), dtype=float,
+                                      count=len(self.items))
+        known = ~((self.latitudes == 0) & (self.longitudes == 0)) & np.isfinite(self.latitudes) \
+            & np.isfinite(self.longitudes)
+        self._known = np.flatnonzero(known)
+
+        # Local projection centred on the candidates
+        self._cos_lat = math.cos(math.radians(self.latitudes[known].mean())) if self._known.size else 1.0
+        cx, cy = self._cells(self.latitudes[self._known], self.longitudes[self._known])
+
+        # Bucket every known item by cell: sort by cell, then split into runs
+        self._buckets: Dict[Tuple[int, int], np.ndarray] = {}
+        if self._known.size:
+            order = np.lexsort((cy, cx))
+            cx, cy, members = cx[order], cy[order], self._known[order]
+            breaks = np.flatnonzero((np.diff(cx) != 0) | (np.diff(cy) != 0)) + 1
+            for run in np.split(np.arange(len(members)), breaks):
+                self._buckets[(int(cx[run[0]]), int(cy[run[0]]))] = members[run]
+            self._x_range = (int(cx.min()), int(cx.max()))
+            self._y_range = (int(cy.min()), int(cy.max()))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _cells(self, latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+        """Grid cell (column, row) of coordinates"""
+        x = np.radians(longitudes) * EARTH_RADIUS_KM * self._cos_lat
+        y = np.radians(latitudes) * EARTH_RADIUS_KM
+        return (np.floor(x / self.cell_km).astype(np.int64),
+                np.floor(y / self.cell_km).astype(np.int64))
+
+    def _ring(self, cx: int, cy: int, r: int) -> List[np.ndarray]:
+        """Buckets on the square ring r cells away from (cx, cy)"""
+        if r == 0:
+            bucket = self._buckets.get((cx, cy))
+            return [] if bucket is None else [bucket]
+        cells = [(cx + dx, cy + dy) for dx in (-r, r) for dy in range(-r, r + 1)]
+        cells += [(cx + dx, cy + dy) for dy in (-r, r) for dx in range(-r + 1, r)]
+        return [self._buckets[cell] for cell in cells if cell in self._buckets]
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        """Ring beyond which no bucket exists"""
+        return max(abs(cx - self._x_range[0]), abs(cx - self._x_range[1]),
+                   abs(cy - self._y_range[0]), abs(cy - self._y_range[1]))
+
+    def _distances(self, lat: float, lon: float, candidates: np.ndarray) -> np.ndarray:
+        return haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+
+    # Queries ----------------------------------------------------------------
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances) of items within radius_km, closest first"""
+        if not self._buckets:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        (cx,), (cy,) = self._cells(np.array([lat]), np.array([lon]))
+        # Cells are a little narrower than cell_km away from the projection's latitude
+        reach = min(int(math.ceil(radius_km * 1.01 / self.cell_km)), self._max_ring(cx, cy))
+        if (2 * reach + 1) ** 2 > len(self._buckets):
+            candidates = self._known  # Fewer buckets than cells to visit
+        else:
+            buckets = [bucket for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)
+                       for bucket in [self._buckets.get((cx + dx, cy + dy))] if bucket is not None]
+            candidates = np.concatenate(buckets) if buckets else np.zeros(0, dtype=np.int64)
+
+        distances = self._distances(lat, lon, candidates)
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def query_nearest(self, lat: float, lon: float, k: int = 1,
+                      max_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances) of the k closest items (within max_km), closest first"""
+        if not self._buckets or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        (cx,), (cy,) = self._cells(np.array([lat]), np.array([lon]))
+        last_ring = self._max_ring(cx, cy)
+
+        found: List[np.ndarray] = []
+        count = 0
+        for r in range(last_ring + 1):
+            if 8 * r > len(self._buckets):
+                found = [self._known]  # Rings now cost more than a full scan
+                break
+            ring = self._ring(cx, cy, r)
+            found += ring
+            count += sum(len(bucket) for bucket in ring)
+            # Anything in ring r + 1 is at least r cells away
+            reached = r * self.cell_km * 0.99
+            if max_km is not None and reached > max_km:
+                break
+            if count >= k:
+                candidates = np.concatenate(found)
+                distances = self._distances(lat, lon, candidates)
+                if np.partition(distances, k - 1)[k - 1] <= reached:
+                    break
+
+        candidates = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        distances = self._distances(lat, lon, candidates)
+        if max_km is not None:
+            inside = distances <= max_km
+            candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')[:k]
+        return candidates[order], distances[order]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Any, float]]:
+        """(item, km) within radius_km, closest first"""
+        indices, distances = self.query_radius(lat, lon, radius_km)
+        return [(self.items[i], float(d)) for i, d in zip(indices, distances)]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_km: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """(item, km) of the k closest items, closest first"""
+        indices, distances = self.query_nearest(lat, lon, k, max_km)
+        return [(self.items[i], float(d)) for i, d in zip(indices, distances)]
+
+
+class CandidateIndex:
+    """One SpatialIndex per candidate kind, built once per plan"""
+
+    KINDS = ('accommodation', 'restaurant', 'activity')
+
+    def __init__(self, accommodations: Sequence[Any] = (), restaurants: Sequence[Any] = (),
+                 activities: Sequence[Any] = (), cell_km: float = 1.0):
+        self.indexes = {
+            'accommodation': SpatialIndex(accommodations, cell_km),
+            'restaurant': SpatialIndex(restaurants, cell_km),
+            'activity': SpatialIndex(activities, cell_km),
+        }
+
+    def __getitem__(self, kind: str) -> SpatialIndex:
+        return self.indexes[kind]
+
+    def nearest(self, kind: str, anchor: Any, k: int = 1,
+                max_km: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """k candidates of a kind closest to anchor (anything with latitude/longitude)"""
+        return self.indexes[kind].nearest(anchor.latitude, anchor.longitude, k, max_km)
+
+    def within(self, kind: str, anchor: Any, radius_km: float) -> List[Tuple[Any, float]]:
+        """Candidates of a kind within radius_km of anchor"""
+        return self.indexes[kind].within(anchor.latitude, anchor.longitude, radius_km)
+
+    def near_any(self, kind: str, anchors: Sequence[Any], radius_km: float) -> np.ndarray:
+        """Sorted indices of candidates of a kind within radius_km of at least one anchor"""
+        index = self.indexes[kind]
+        hits = [index.query_radius(a.latitude, a.longitude, radius_km)[0] for a in anchors
+                if a.latitude or a.longitude]
+        return np.unique(np.concatenate(hits)) if hits else np.zeros(0, dtype=np.int64)
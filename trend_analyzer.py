@@ -5,11 +5,15 @@ Provides trend-based tour suggestions using REAL APIs
 
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-import requests
+import asyncio
 import os
 from dotenv import load_dotenv
 import json
 
+import async_http
+import http_session
+from geocoder import get_geocoder
+
 load_dotenv()
 
 
@@ -106,17 +110,7 @@ class TrendAnalyzer:
             
             # Fallback to static data if no API results
             if not suggestions:
-                country = self._find_country(destination)
-                if country in self.seasonal_attractions_fallback:
-                    attractions = self.seasonal_attractions_fallback[country].get(season, [])
-                    for attraction in attractions:
-                        suggestions.append({
-                            'name': attraction,
-                            'type': 'seasonal',
-                            'season': season,
-                            'relevance_score': 0.7,
-                            'source': 'fallback'
-                        })
+                suggestions = self._get_fallback_seasonal(destination, season)
             
             return suggestions[:10]  # Limit to top 10
             
@@ -124,45 +118,60 @@ class TrendAnalyzer:
             print(f"⚠️  Error getting seasonal suggestions: {e}")
             return []
 
+    async def get_seasonal_suggestions_async(self, destination: str, travel_date: str) -> List[Dict[str, Any]]:
+        """Async variant of get_seasonal_suggestions; queries the event APIs concurrently"""
+        try:
+            date_obj = datetime.strptime(travel_date, '%Y-%m-%d')
+            season = self._get_season(date_obj.month)
+            
+            lookups = []
+            if self.apis_available['ticketmaster']:
+                lookups.append(self._get_ticketmaster_attractions_async(destination, travel_date))
+            if self.apis_available['predicthq']:
+                lookups.append(self._get_predicthq_events_async(destination, travel_date, 'seasonal'))
+            
+            suggestions = []
+            for batch in await asyncio.gather(*lookups):
+                suggestions.extend(batch)
+            
+            if not suggestions:
+                suggestions = self._get_fallback_seasonal(destination, season)
+            
+            return suggestions[:10]
+            
+        except Exception as e:
+            print(f"⚠️  Error getting seasonal suggestions: {e}")
+            return []
+
+    def _get_fallback_seasonal(self, destination: str, season: str) -> List[Dict[str, Any]]:
+        """Static seasonal suggestions used when no API returned results"""
+        suggestions = []
+        country = self._find_country(destination)
+        if country in self.seasonal_attractions_fallback:
+            attractions = self.seasonal_attractions_fallback[country].get(season, [])
+            for attraction in attractions:
+                suggestions.append({
+                    'name': attraction,
+                    'type': 'seasonal',
+                    'season': season,
+                    'relevance_score': 0.7,
+                    'source': 'fallback'
+                })
+        return suggestions
+
     def _get_ticketmaster_attractions(self, destination: str, date: str) -> List[Dict[str, Any]]:
         """Fetch attractions from Ticketmaster API"""
         if not self.ticketmaster_key:
             return []
         
         try:
-            # Parse date for range
             start_date = datetime.strptime(date, '%Y-%m-%d')
-            end_date = start_date + timedelta(days=30)
+            params = self._ticketmaster_params(destination, start_date)
             
-            params = {
-                'apikey': self.ticketmaster_key,
-                'city': destination.split(',')[0],  # Extract city name
-                'startDateTime': start_date.strftime('%Y-%m-%dT00:00:00Z'),
-                'endDateTime': end_date.strftime('%Y-%m-%dT23:59:59Z'),
-                'size': 20,
-                'sort': 'relevance,desc'
-            }
-            
-            response = requests.get(self.ticketmaster_url, params=params, timeout=10)
+            response = http_session.get(self.ticketmaster_url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                suggestions = []
-                
-                if '_embedded' in data and 'events' in data['_embedded']:
-                    for event in data['_embedded']['events'][:10]:
-                        suggestions.append({
-                            'name': event.get('name', 'Unknown Event'),
-                            'type': 'event',
-                            'season': self._get_season(start_date.month),
-                            'relevance_score': 0.9,
-                            'source': 'ticketmaster',
-                            'date': event.get('dates', {}).get('start', {}).get('localDate', ''),
-                            'url': event.get('url', ''),
-                            'category': event.get('classifications', [{}])[0].get('segment', {}).get('name', 'Entertainment')
-                        })
-                
-                return suggestions
+                return self._parse_ticketmaster_events(response.json(), start_date)
             else:
                 print(f"⚠️  Ticketmaster API returned status {response.status_code}")
                 return []
@@ -171,6 +180,58 @@ class TrendAnalyzer:
             print(f"⚠️  Ticketmaster API error: {e}")
             return []
 
+    async def _get_ticketmaster_attractions_async(self, destination: str, date: str) -> List[Dict[str, Any]]:
+        """Async variant of _get_ticketmaster_attractions"""
+        if not self.ticketmaster_key:
+            return []
+        
+        try:
+            start_date = datetime.strptime(date, '%Y-%m-%d')
+            params = self._ticketmaster_params(destination, start_date)
+            
+            response = await async_http.get(self.ticketmaster_url, params=params, timeout=10)
+            
+            if response.status_code == 200:
+                return self._parse_ticketmaster_events(response.json(), start_date)
+            print(f"⚠️  Ticketmaster API returned status {response.status_code}")
+            return []
+                
+        except Exception as e:
+            print(f"⚠️  Ticketmaster API error: {e}")
+            return []
+
+    def _ticketmaster_params(self, destination: str, start_date: datetime) -> Dict[str, Any]:
+        """Build Ticketmaster query parameters for a 30-day window"""
+        end_date = start_date + timedelta(days=30)
+        
+        return {
+            'apikey': self.ticketmaster_key,
+            'city': destination.split(',')[0],  # Extract city name
+            'startDateTime': start_date.strftime('%Y-%m-%dT00:00:00Z'),
+            'endDateTime': end_date.strftime('%Y-%m-%dT23:59:59Z'),
+            'size': 20,
+            'sort': 'relevance,desc'
+        }
+
+    def _parse_ticketmaster_events(self, data: dict, start_date: datetime) -> List[Dict[str, Any]]:
+        """Parse a Ticketmaster events response into suggestions"""
+        suggestions = []
+        
+        if '_embedded' in data and 'events' in data['_embedded']:
+            for event in data['_embedded']['events'][:10]:
+                suggestions.append({
+                    'name': event.get('name', 'Unknown Event'),
+                    'type': 'event',
+                    'season': self._get_season(start_date.month),
+                    'relevance_score': 0.9,
+                    'source': 'ticketmaster',
+                    'date': event.get('dates', {}).get('start', {}).get('localDate', ''),
+                    'url': event.get('url', ''),
+                    'category': event.get('classifications', [{}])[0].get('segment', {}).get('name', 'Entertainment')
+                })
+        
+        return suggestions
+
     def _get_predicthq_events(self, destination: str, date: str, category: str = 'seasonal') -> List[Dict[str, Any]]:
         """Fetch events from PredictHQ API"""
         if not self.predicthq_token:
@@ -178,39 +239,12 @@ class TrendAnalyzer:
         
         try:
             start_date = datetime.strptime(date, '%Y-%m-%d')
-            end_date = start_date + timedelta(days=30)
+            headers, params = self._predicthq_request(destination, start_date)
             
-            headers = {
-                'Authorization': f'Bearer {self.predicthq_token}',
-                'Accept': 'application/json'
-            }
-            
-            params = {
-                'q': destination,
-                'start.gte': start_date.strftime('%Y-%m-%d'),
-                'start.lte': end_date.strftime('%Y-%m-%d'),
-                'limit': 20,
-                'sort': 'rank'
-            }
-            
-            response = requests.get(self.predicthq_url, headers=headers, params=params, timeout=10)
+            response = http_session.get(self.predicthq_url, headers=headers, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                suggestions = []
-                
-                for event in data.get('results', [])[:10]:
-                    suggestions.append({
-                        'name': event.get('title', 'Unknown Event'),
-                        'type': category,
-                        'season': self._get_season(start_date.month),
-                        'relevance_score': min(event.get('rank', 50) / 100, 1.0),
-                        'source': 'predicthq',
-                        'date': event.get('start', ''),
-                        'category': event.get('category', 'Unknown')
-                    })
-                
-                return suggestions
+                return self._parse_predicthq_events(response.json(), category, start_date)
             else:
                 print(f"⚠️  PredictHQ API returned status {response.status_code}")
                 return []
@@ -219,6 +253,64 @@ class TrendAnalyzer:
             print(f"⚠️  PredictHQ API error: {e}")
             return []
 
+    async def _get_predicthq_events_async(self, destination: str, date: str,
+                                          category: str = 'seasonal') -> List[Dict[str, Any]]:
+        """Async variant of _get_predicthq_events"""
+        if not self.predicthq_token:
+            return []
+        
+        try:
+            start_date = datetime.strptime(date, '%Y-%m-%d')
+            headers, params = self._predicthq_request(destination, start_date)
+            
+            response = await async_http.get(self.predicthq_url, params=params,
+                                            headers=headers, timeout=10)
+            
+            if response.status_code == 200:
+                return self._parse_predicthq_events(response.json(), category, start_date)
+            print(f"⚠️  PredictHQ API returned status {response.status_code}")
+            return []
+                
+        except Exception as e:
+            print(f"⚠️  PredictHQ API error: {e}")
+            return []
+
+    def _predicthq_request(self, destination: str, start_date: datetime):
+        """Build PredictHQ headers and query parameters for a 30-day window"""
+        end_date = start_date + timedelta(days=30)
+        
+        headers = {
+            'Authorization': f'Bearer {self.predicthq_token}',
+            'Accept': 'application/json'
+        }
+        
+        params = {
+            'q': destination,
+            'start.gte': start_date.strftime('%Y-%m-%d'),
+            'start.lte': end_date.strftime('%Y-%m-%d'),
+            'limit': 20,
+            'sort': 'rank'
+        }
+        return headers, params
+
+    def _parse_predicthq_events(self, data: dict, category: str,
+                                start_date: datetime) -> List[Dict[str, Any]]:
+        """Parse a PredictHQ events response into suggestions"""
+        suggestions = []
+        
+        for event in data.get('results', [])[:10]:
+            suggestions.append({
+                'name': event.get('title', 'Unknown Event'),
+                'type': category,
+                'season': self._get_season(start_date.month),
+                'relevance_score': min(event.get('rank', 50) / 100, 1.0),
+                'source': 'predicthq',
+                'date': event.get('start', ''),
+                'category': event.get('category', 'Unknown')
+            })
+        
+        return suggestions
+
     def get_popular_events(self, destination: str, travel_date: str) -> List[Dict[str, Any]]:
         """
         Get popular events happening during travel dates using real APIs
@@ -243,28 +335,57 @@ class TrendAnalyzer:
                 phq_events = self._get_predicthq_events(destination, travel_date, 'popular')
                 events.extend(phq_events)
             
-            # Remove duplicates by name
-            seen_names = set()
-            unique_events = []
-            for event in events:
-                if event['name'] not in seen_names:
-                    seen_names.add(event['name'])
-                    unique_events.append(event)
+            return self._dedupe_events(events)
+            
+        except Exception as e:
+            print(f"⚠️  Error getting popular events: {e}")
+            return []
+
+    async def get_popular_events_async(self, destination: str, travel_date: str) -> List[Dict[str, Any]]:
+        """Async variant of get_popular_events; queries the event APIs concurrently"""
+        try:
+            lookups = []
+            if self.apis_available['ticketmaster']:
+                lookups.append(self._get_ticketmaster_events_async(destination, travel_date))
+            if self.apis_available['predicthq']:
+                lookups.append(self._get_predicthq_events_async(destination, travel_date, 'popular'))
             
-            # Sort by relevance/popularity
-            unique_events.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+            events = []
+            for batch in await asyncio.gather(*lookups):
+                events.extend(batch)
             
-            return unique_events[:10]
+            return self._dedupe_events(events)
             
         except Exception as e:
             print(f"⚠️  Error getting popular events: {e}")
             return []
 
+    def _dedupe_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove duplicate events by name and keep the 10 most relevant"""
+        seen_names = set()
+        unique_events = []
+        for event in events:
+            if event['name'] not in seen_names:
+                seen_names.add(event['name'])
+                unique_events.append(event)
+        
+        # Sort by relevance/popularity
+        unique_events.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+        
+        return unique_events[:10]
+
     def _get_ticketmaster_events(self, destination: str, date: str) -> List[Dict[str, Any]]:
         """Get events from Ticketmaster (same as attractions but formatted for events)"""
         attractions = self._get_ticketmaster_attractions(destination, date)
-        
-        # Convert to event format
+        return self._attractions_to_events(attractions, date)
+
+    async def _get_ticketmaster_events_async(self, destination: str, date: str) -> List[Dict[str, Any]]:
+        """Async variant of _get_ticketmaster_events"""
+        attractions = await self._get_ticketmaster_attractions_async(destination, date)
+        return self._attractions_to_events(attractions, date)
+
+    def _attractions_to_events(self, attractions: List[Dict[str, Any]], date: str) -> List[Dict[str, Any]]:
+        """Convert Ticketmaster attractions to event format"""
         events = []
         for attr in attractions:
             events.append({
@@ -309,23 +430,10 @@ class TrendAnalyzer:
             return []
         
         try:
-            # First get coordinates for the city
-            geocoding_url = f"http://api.openweathermap.org/geo/1.0/direct"
-            geo_params = {
-                'q': destination.split(',')[0],
-                'limit': 1,
-                'appid': self.openweather_key
-            }
-            
-            geo_response = requests.get(geocoding_url, params=geo_params, timeout=10)
-            
-            if geo_response.status_code == 200:
-                geo_data = geo_response.json()
-                if not geo_data:
-                    return self._get_seasonal_weather_suggestions(datetime.strptime(date, '%Y-%m-%d').month)
-                
-                lat = geo_data[0]['lat']
-                lon = geo_data[0]['lon']
+            # First get coordinates for the city (shared cached geocoder)
+            coords = get_geocoder().geocode(destination)
+            if coords:
+                lat, lon = coords
                 
                 # Get weather forecast
                 weather_params = {
@@ -335,7 +443,7 @@ class TrendAnalyzer:
                     'units': 'metric'
                 }
                 
-                weather_response = requests.get(self.openweather_url, params=weather_params, timeout=10)
+                weather_response = http_session.get(self.openweather_url, params=weather_params, timeout=10)
                 
                 if weather_response.status_code == 200:
                     weather_data = weather_response.json()
@@ -415,7 +523,7 @@ class TrendAnalyzer:
                 'api_key': self.serpapi_key
             }
             
-            response = requests.get(self.serpapi_url, params=params, timeout=10)
+            response = http_session.get(self.serpapi_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
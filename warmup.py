@@ -0,0 +1,267 @@
+"""
+Warm-up Module
+Precomputes per-destination bundles so the first plan for a popular city is warm
+
+After a deploy every cache is cold, so the first request for a city pays the
+full path: Nominatim geocode, the combined Overpass query, a Numbeo scrape
+and the distance matrices. The warm-up job does all of that ahead of time
+and writes one versioned bundle per city:
+
+    python warmup.py                       # every seeded gazetteer city
+    python warmup.py Bangalore "Goa" Paris --workers 4
+    python warmup.py --list                # bundles on disk
+
+A bundle is <dir>/<city>.v<BUNDLE_VERSION>.json.gz, holding the geocode,
+airport, raw POI elements per category and the Numbeo transport rates.
+A sibling .npz holds the distance matrix over the bundle's POIs. POIs are
+only written from a complete fetch: if Overpass failed for any tile, the
+bundle records the error and the planner fetches POIs live.
+
+load_bundles() runs when the planner and orchestrator start. It primes the
+geocoder, POI fetcher, transport rate and transport matrix caches, so
+nothing in a bundle is fetched again. Bundles written by another format
+version, or older than WARMUP_BUNDLE_MAX_AGE_DAYS, are skipped, and primed
+POIs stop being served once they pass that age in a long-running process.
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from gazetteer import SEED_PLACES, get_gazetteer
+from geocoder import airport_code_for, get_geocoder, normalize_key
+from ground_transport_agent import get_transport_rates, prime_transport_rates
+from local_transport_agent import get_matrix_cache
+from poi_fetcher import CATEGORY_TAGS, POIBundle, _element_lat, _element_lon, get_poi_fetcher
+from spatial_index import haversine_matrix
+
+BUNDLE_VERSION = 2
+
+
+def bundle_dir() -> str:
+    return os.getenv('WARMUP_BUNDLE_DIR') or os.path.join(os.getenv('TRAVEL_CACHE_DIR', '.cache'), 'bundles')
+
+
+def _slug(city: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', normalize_key(city)).strip('-') or 'city'
+
+
+def bundle_path(city: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or bundle_dir(), f"{_slug(city)}.v{BUNDLE_VERSION}.json.gz")
+
+
+def default_destinations() -> List[str]:
+    """Every city in the gazetteer seed (the union of the agents' former city tables)"""
+    return [name for name, *_ in SEED_PLACES]
+
+
+# ----------------------------------------------------------------------
+# Building
+# ----------------------------------------------------------------------
+
+def build_bundle(city: str, directory: Optional[str] = None) -> Dict[str, Any]:
+    """Fetch and compute everything for one city and write its bundle; returns the manifest"""
+    directory = directory or bundle_dir()
+    manifest: Dict[str, Any] = {
+        'version': BUNDLE_VERSION, 'city': city, 'key': normalize_key(city), 'built_at': time.time(),
+        'geocode': None, 'airport': None, 'poi_center': None, 'pois': {}, 'transport_rates': None,
+        'matrix': None, 'timings': {}, 'errors': {},
+    }
+
+    def step(name, fn):
+        started = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            manifest['errors'][name] = f"{type(e).__name__}: {e}"
+            return None
+        finally:
+            manifest['timings'][name] = round(time.perf_counter() - started, 3)
+
+    coords = step('geocode', lambda: get_geocoder().geocode(city) or get_gazetteer().coordinates(city))
+    if coords is None:
+        manifest['errors'].setdefault('geocode', "not found")
+    else:
+        manifest['geocode'] = list(coords)
+    manifest['airport'] = step('airport', lambda: airport_code_for(city))
+
+    if coords is not None:
+        bundle = step('pois', lambda: get_poi_fetcher().fetch(*coords))
+        if bundle is None:
+            manifest['errors'].setdefault('pois', "fetch failed")
+        elif bundle.partial:
+            manifest['errors']['pois'] = f"partial fetch ({', '.join(bundle.partial)})"
+        else:
+            manifest['poi_center'] = [bundle.center_lat, bundle.center_lon]
+            manifest['pois'] = {category: getattr(bundle, category) for category in CATEGORY_TAGS}
+
+    manifest['transport_rates'] = step('transport_rates', lambda: get_transport_rates(city))
+
+    os.makedirs(directory, exist_ok=True)
+    path = bundle_path(city, directory)
+    points = [e for category in CATEGORY_TAGS for e in manifest['pois'].get(category, [])]
+    if len(points) > 1:
+        matrix_path = path[:-len('.json.gz')] + '.npz'
+        step('matrix', lambda: _write_matrix(points, matrix_path))
+        if os.path.exists(matrix_path):
+            manifest['matrix'] = os.path.basename(matrix_path)
+
+    tmp = path + '.tmp'
+    with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    os.replace(tmp, path)
+    return manifest
+
+
+def _write_matrix(elements: List[dict], path: str):
+    """Distance matrix over the bundle's POIs (category order, as in the manifest)"""
+    latitudes = np.array([_element_lat(e) for e in elements], dtype=float)
+    longitudes = np.array([_element_lon(e) for e in elements], dtype=float)
+    tmp = path + '.tmp.npz'
+    np.savez_compressed(tmp, latitudes=latitudes, longitudes=longitudes,
+                        distance_km=haversine_matrix(latitudes, longitudes))
+    os.replace(tmp, path)
+
+
+def warm_up(cities: List[str], directory: Optional[str] = None, workers: int = 4,
+            force: bool = False) -> List[Dict[str, Any]]:
+    """Build bundles for cities (skipping fresh ones unless force), several at a time"""
+    directory = directory or bundle_dir()
+    max_age = float(os.getenv('WARMUP_BUNDLE_MAX_AGE_DAYS', '7')) * 86400
+    todo = [city for city in cities if force or not _is_fresh(bundle_path(city, directory), max_age)]
+    print(f"🔥 Warming {len(todo)} destinations ({len(cities) - len(todo)} already fresh) → {directory}")
+
+    manifests = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="warmup") as executor:
+        futures = {executor.submit(build_bundle, city, directory): city for city in todo}
+        for future in as_completed(futures):
+            city = futures[future]
+            try:
+                manifest = future.result()
+            except Exception as e:
+                print(f"  ❌ {city}: {e}")
+                continue
+            manifests.append(manifest)
+            counts = '/'.join(str(len(manifest['pois'].get(c, []))) for c in CATEGORY_TAGS)
+            errors = f" ⚠️ {', '.join(manifest['errors'])}" if manifest['errors'] else ""
+            print(f"  ✅ {city}: POIs {counts}, rates {'yes' if manifest['transport_rates'] else 'no'}, "
+                  f"{sum(manifest['timings'].values()):.1f}s{errors}")
+    return manifests
+
+
+def _is_fresh(path: str, max_age: float) -> bool:
+    """Recent enough, and not missing POIs from a failed fetch (those are retried every run)"""
+    if not os.path.exists(path) or time.time() - os.path.getmtime(path) > max_age:
+        return False
+    manifest = read_bundle(path)
+    return manifest is not None and 'pois' not in manifest.get('errors', {})
+
+
+# ----------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------
+
+def read_bundle(path: str) -> Optional[Dict[str, Any]]:
+    """Manifest of a bundle file, or None if unreadable or another format version"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == BUNDLE_VERSION else None
+
+
+def load_bundles(directory: Optional[str] = None, max_age_days: Optional[float] = None) -> int:
+    """Prime the process-wide caches from every current bundle; returns how many were loaded"""
+    directory = directory or bundle_dir()
+    if max_age_days is None:
+        max_age_days = float(os.getenv('WARMUP_BUNDLE_MAX_AGE_DAYS', '7'))
+    geocoder, fetcher, matrices = get_geocoder(), get_poi_fetcher(), get_matrix_cache()
+
+    loaded = 0
+    for path in sorted(glob.glob(os.path.join(directory, f"*.v{BUNDLE_VERSION}.json.gz"))):
+        manifest = read_bundle(path)
+        if manifest is None or time.time() - manifest.get('built_at', 0) > max_age_days * 86400:
+            continue
+
+        city = manifest['city']
+        if manifest.get('geocode'):
+            lat, lon = manifest['geocode']
+            geocoder.prime(city, (lat, lon))
+        if manifest.get('poi_center') and manifest.get('pois'):
+            lat, lon = manifest['poi_center']
+            fetcher.prime(POIBundle(center_lat=lat, center_lon=lon, fetched_at=manifest['built_at'],
+                                    **{c: manifest['pois'].get(c, []) for c in CATEGORY_TAGS}),
+                          max_age_seconds=max_age_days * 86400)
+        if manifest.get('transport_rates'):
+            prime_transport_rates(city, manifest['transport_rates'])
+        if manifest.get('matrix'):
+            _register_matrix(os.path.join(directory, manifest['matrix']), matrices)
+        loaded += 1
+    return loaded
+
+
+def _register_matrix(path: str, cache):
+    """Register a bundle's distance matrix; only the coordinates are read now"""
+    try:
+        with np.load(path) as data:
+            latitudes, longitudes = data['latitudes'], data['longitudes']
+    except (OSError, KeyError, ValueError):
+        return
+
+    def load_distance() -> np.ndarray:
+        with np.load(path) as data:
+            return data['distance_km']
+
+    cache.register(latitudes, longitudes, load_distance)
+
+
+def warm_start():
+    """Load warm-up bundles at startup (WARMUP_BUNDLES=false to skip)"""
+    if os.getenv('WARMUP_BUNDLES', 'true').lower() not in ('1', 'true', 'yes'):
+        return
+    if not os.path.isdir(bundle_dir()):
+        return
+    started = time.perf_counter()
+    loaded = load_bundles()
+    if loaded:
+        print(f"  📦 Loaded {loaded} destination bundles ({(time.perf_counter() - started) * 1000:.0f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute destination bundles")
+    parser.add_argument('cities', nargs='*', help="Destinations (default: every seeded gazetteer city)")
+    parser.add_argument('--output', default=None, help="Bundle directory (default: WARMUP_BUNDLE_DIR)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WARMUP_WORKERS', '4')))
+    parser.add_argument('--force', action='store_true', help="Rebuild fresh bundles too")
+    parser.add_argument('--list', action='store_true', help="List bundles on disk")
+    args = parser.parse_args()
+    directory = args.output or bundle_dir()
+
+    if args.list:
+        for path in sorted(glob.glob(os.path.join(directory, '*.json.gz'))):
+            manifest = read_bundle(path)
+            if manifest is None:
+                print(f"  ⚠️ {os.path.basename(path)}: unreadable or another format version")
+                continue
+            age_hours = (time.time() - manifest['built_at']) / 3600
+            counts = '/'.join(str(len(manifest['pois'].get(c, []))) for c in CATEGORY_TAGS)
+            print(f"  📦 {manifest['city']}: POIs {counts}, airport {manifest.get('airport')}, "
+                  f"{age_hours:.1f}h old")
+        return
+
+    started = time.perf_counter()
+    manifests = warm_up(args.cities or default_destinations(), directory, args.workers, args.force)
+    print(f"✅ Wrote {len(manifests)} bundles in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()